@@ -0,0 +1,169 @@
+import io
+import queue
+import sys
+import tarfile
+import threading
+import time
+import zipfile
+import zlib
+from collections.abc import Callable, Iterator
+from dataclasses import dataclass
+from pathlib import Path, PurePosixPath
+
+
+ZIP_SUFFIXES = (".zip",)
+TAR_SUFFIXES = (".tar", ".tar.gz", ".tgz", ".tar.bz2", ".tbz2", ".tar.xz", ".txz")
+TAR_WRITE_MODES = {
+    ".tar": "w",
+    ".tar.gz": "w:gz",
+    ".tgz": "w:gz",
+    ".tar.bz2": "w:bz2",
+    ".tbz2": "w:bz2",
+    ".tar.xz": "w:xz",
+    ".txz": "w:xz",
+}
+WRITER_QUEUE_SIZE = 64
+
+MemberFilter = Callable[[PurePosixPath], bool]
+
+
+@dataclass(frozen=True)
+class ArchiveMember:
+    archive: Path
+    name: PurePosixPath
+    data: bytes
+
+    @property
+    def path(self) -> Path:
+        # Caminho apenas para exibicao e nomes de saida; o membro nunca e extraido.
+        return self.archive.joinpath(*self.name.parts)
+
+
+def has_archive_suffix(path: Path) -> bool:
+    return path.name.casefold().endswith(ZIP_SUFFIXES + TAR_SUFFIXES)
+
+
+def is_archive(path: Path) -> bool:
+    return path.is_file() and has_archive_suffix(path)
+
+
+def _safe_member_name(archive: Path, name: str) -> PurePosixPath | None:
+    member_name = PurePosixPath(name)
+    if member_name.is_absolute() or ".." in member_name.parts:
+        print(f"Membro ignorado {archive}:{name}: caminho fora do arquivo compactado.", file=sys.stderr)
+        return None
+    if any(part.startswith(".") or part == "__MACOSX" for part in member_name.parts):
+        return None
+    return member_name
+
+
+def _iter_zip_members(archive: Path, accepts: MemberFilter | None) -> Iterator[ArchiveMember]:
+    with zipfile.ZipFile(archive) as bundle:
+        for info in bundle.infolist():
+            if info.is_dir():
+                continue
+            member_name = _safe_member_name(archive, info.filename)
+            if member_name is not None and (accepts is None or accepts(member_name)):
+                yield ArchiveMember(archive, member_name, bundle.read(info))
+
+
+def _iter_tar_members(archive: Path, accepts: MemberFilter | None) -> Iterator[ArchiveMember]:
+    # Modo de fluxo (r|*): o tar.gz e lido uma unica vez, sem voltar no arquivo.
+    with tarfile.open(archive, mode="r|*") as bundle:
+        for info in bundle:
+            if not info.isfile():
+                continue
+            member_name = _safe_member_name(archive, info.name)
+            if member_name is None or (accepts is not None and not accepts(member_name)):
+                continue
+            member_file = bundle.extractfile(info)
+            if member_file is not None:
+                yield ArchiveMember(archive, member_name, member_file.read())
+
+
+def iter_archive_members(archive: Path, accepts: MemberFilter | None = None) -> Iterator[ArchiveMember]:
+    # Os membros sao lidos um de cada vez, na ordem do arquivo compactado; quem
+    # consome decide quantos ficam em memoria ao mesmo tempo. O filtro `accepts`
+    # olha so o nome, antes de o conteudo do membro ser lido.
+    if archive.name.casefold().endswith(ZIP_SUFFIXES):
+        members = _iter_zip_members(archive, accepts)
+    else:
+        members = _iter_tar_members(archive, accepts)
+    try:
+        yield from members
+    except (zipfile.BadZipFile, tarfile.TarError, EOFError, zlib.error, OSError) as exc:
+        raise ValueError(f"arquivo compactado invalido ou incompleto: {exc}") from exc
+
+
+class ArchiveWriteError(OSError):
+    pass
+
+
+class ArchiveWriter:
+    # Todas as saidas de um lote vao para um unico arquivo compactado gravado
+    # sequencialmente por uma thread; o processo principal so enfileira os bytes
+    # que os workers devolvem, sem arquivos temporarios no destino.
+    def __init__(self, path: Path, queue_size: int = WRITER_QUEUE_SIZE) -> None:
+        self.path = path
+        self.error: Exception | None = None
+        self.count = 0
+        self._queue: queue.Queue[tuple[str, bytes] | None] = queue.Queue(maxsize=queue_size)
+        self._thread = threading.Thread(target=self._run, name="statement-converter-archive", daemon=True)
+
+    def __enter__(self) -> "ArchiveWriter":
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def _open(self) -> zipfile.ZipFile | tarfile.TarFile:
+        name = self.path.name.casefold()
+        if name.endswith(ZIP_SUFFIXES):
+            return zipfile.ZipFile(self.path, "w", compression=zipfile.ZIP_DEFLATED)
+        suffix = next(suffix for suffix in TAR_WRITE_MODES if name.endswith(suffix))
+        return tarfile.open(self.path, TAR_WRITE_MODES[suffix])
+
+    def _write(self, bundle: zipfile.ZipFile | tarfile.TarFile, name: str, data: bytes) -> None:
+        if isinstance(bundle, zipfile.ZipFile):
+            info = zipfile.ZipInfo(name, date_time=time.localtime()[:6])
+            info.compress_type = zipfile.ZIP_DEFLATED
+            bundle.writestr(info, data)
+            return
+        info = tarfile.TarInfo(name)
+        info.size = len(data)
+        info.mtime = int(time.time())
+        bundle.addfile(info, io.BytesIO(data))
+
+    def _run(self) -> None:
+        bundle = None
+        try:
+            bundle = self._open()
+            while (item := self._queue.get()) is not None:
+                self._write(bundle, *item)
+                self.count += 1
+        except Exception as exc:
+            self.error = exc
+            # Continua consumindo a fila para que quem enfileira nunca fique bloqueado.
+            while self._queue.get() is not None:
+                pass
+        finally:
+            if bundle is not None:
+                try:
+                    bundle.close()
+                except Exception as exc:
+                    self.error = self.error or exc
+
+    def add(self, name: str, data: bytes) -> None:
+        if self.error is not None:
+            raise ArchiveWriteError(str(self.error)) from self.error
+        self._queue.put((name, data))
+
+    def close(self) -> None:
+        if not self._thread.is_alive():
+            return
+        self._queue.put(None)
+        self._thread.join()
+        if self.error is not None:
+            raise ArchiveWriteError(str(self.error)) from self.error
@@ -0,0 +1,537 @@
+import argparse
+import io
+import multiprocessing
+import multiprocessing.connection
+import os
+import signal
+import tempfile
+import time
+from collections.abc import Callable, Iterable, Iterator
+from concurrent.futures import Future, ProcessPoolExecutor
+from contextlib import redirect_stdout
+from dataclasses import dataclass
+from pathlib import Path
+from typing import BinaryIO, TypeVar
+
+from statement_converter._cache import ConversionCache, parse_size
+from statement_converter._metrics import ConversionMetrics, measure, memory_limit, span
+from statement_converter._profiling import RawStats, profiled, profiling_requested
+from statement_converter._source import is_stdio_path, stdout_output
+from statement_converter.converter_registry import ConverterSpec, converter_dependencies
+
+
+@dataclass(frozen=True)
+class ConversionTask:
+    converter: ConverterSpec
+    input_file: Path
+    output_file: Path
+    # Conteudo ja em memoria (membro de arquivo compactado); input_file fica so para exibicao.
+    data: bytes | None = None
+
+
+@dataclass(frozen=True)
+class ConversionResult:
+    input_file: Path
+    output_file: Path
+    output: str
+    error: str | None = None
+    model: str | None = None
+    # Preenchido quando a saida vai para um arquivo compactado em vez do disco.
+    output_data: bytes | None = None
+    error_type: str | None = None
+    metrics: ConversionMetrics | None = None
+    profile_stats: RawStats | None = None
+
+    @property
+    def succeeded(self) -> bool:
+        return self.error is None
+
+
+_Payload = TypeVar("_Payload")
+
+_worker_converter: ConverterSpec | None = None
+_worker_args: argparse.Namespace | None = None
+
+
+def default_jobs() -> int:
+    return os.cpu_count() or 1
+
+
+def build_run_args(args: argparse.Namespace, input_path: Path, output_path: Path) -> argparse.Namespace:
+    values = vars(args).copy()
+    values["input_path"] = input_path
+    values["output_path"] = output_path
+    return argparse.Namespace(**values)
+
+
+def run_single_conversion(converter: ConverterSpec, args: argparse.Namespace, input_file: Path, output_file: Path) -> None:
+    converter.handler(build_run_args(args, input_file, output_file))
+
+
+def run_buffer_conversion(
+    converter: ConverterSpec,
+    args: argparse.Namespace,
+    input_file: Path,
+    data: bytes,
+    output_file: Path,
+) -> None:
+    if converter.stream_handler is not None:
+        # A saida so e gravada quando a conversao termina, sem arquivo parcial em caso de erro.
+        output_data = convert_to_bytes(converter, args, input_file, output_file, data)
+        with span("write"):
+            output_file.write_bytes(output_data)
+        return
+
+    with tempfile.TemporaryDirectory(prefix="statement-converter-") as directory:
+        temporary_input = Path(directory) / input_file.name
+        temporary_input.write_bytes(data)
+        run_single_conversion(converter, args, temporary_input, output_file)
+
+
+def convert_to_bytes(
+    converter: ConverterSpec,
+    args: argparse.Namespace,
+    input_file: Path,
+    output_file: Path,
+    data: bytes | None = None,
+) -> bytes:
+    if converter.stream_handler is not None:
+        output = io.BytesIO()
+        source = input_file if data is None else data
+        converter.stream_handler(source, build_run_args(args, input_file, output_file), output)
+        return output.getvalue()
+
+    # Handlers sem stream_handler so sabem gravar em caminhos.
+    with tempfile.TemporaryDirectory(prefix="statement-converter-") as directory:
+        temporary_output = Path(directory) / output_file.name
+        if data is None:
+            run_single_conversion(converter, args, input_file, temporary_output)
+        else:
+            run_buffer_conversion(converter, args, input_file, data, temporary_output)
+        return temporary_output.read_bytes()
+
+
+def _run_in_memory_conversion(
+    cache: ConversionCache | None,
+    converter: ConverterSpec,
+    args: argparse.Namespace,
+    input_file: Path,
+    output_file: Path,
+    data: bytes | None = None,
+) -> bytes:
+    key = None
+    if cache is not None:
+        key = cache.key_for(input_file if data is None else data, converter, args)
+        cached = cache.read(key)
+        if cached is not None:
+            print(f"Conversao reaproveitada do cache: {output_file}")
+            return cached
+
+    output_data = convert_to_bytes(converter, args, input_file, output_file, data)
+    if key is not None:
+        cache.write(key, output_data)
+    return output_data
+
+
+def _run_stdout_conversion(
+    cache: ConversionCache | None,
+    converter: ConverterSpec,
+    args: argparse.Namespace,
+    input_file: Path,
+    output_file: Path,
+    data: bytes | None,
+    output: BinaryIO,
+) -> None:
+    # Sem cache o stream_handler grava em stdout a medida que renderiza.
+    if cache is None and converter.stream_handler is not None:
+        source = input_file if data is None else data
+        converter.stream_handler(source, build_run_args(args, input_file, output_file), output)
+    else:
+        output.write(_run_in_memory_conversion(cache, converter, args, input_file, output_file, data))
+    output.flush()
+
+
+def _run_cached_conversion(
+    cache: ConversionCache,
+    converter: ConverterSpec,
+    args: argparse.Namespace,
+    input_file: Path,
+    output_file: Path,
+    data: bytes | None = None,
+) -> None:
+    key = cache.key_for(input_file if data is None else data, converter, args)
+    if cache.fetch(key, output_file):
+        print(f"Conversao reaproveitada do cache: {output_file}")
+        return
+
+    if data is None:
+        run_single_conversion(converter, args, input_file, output_file)
+    else:
+        run_buffer_conversion(converter, args, input_file, data, output_file)
+    cache.store(key, output_file)
+
+
+def _input_size(input_file: Path, data: bytes | None) -> int | None:
+    if data is not None:
+        return len(data)
+    try:
+        return input_file.stat().st_size
+    except OSError:
+        return None
+
+
+def _output_size(output_file: Path, output_data: bytes | None) -> int | None:
+    if output_data is not None:
+        return len(output_data)
+    if is_stdio_path(output_file):
+        return None
+    try:
+        return output_file.stat().st_size
+    except OSError:
+        return None
+
+
+def convert_file(
+    converter: ConverterSpec,
+    args: argparse.Namespace,
+    input_file: Path,
+    output_file: Path,
+    data: bytes | None = None,
+) -> ConversionResult:
+    missing_options = [option for option in converter.required_options if not getattr(args, option, None)]
+    if missing_options:
+        labels = ", ".join(f"--{option.replace('_', '-')}" for option in missing_options)
+        error = f"o modelo {converter.model} exige opcoes extras: {labels}"
+        return ConversionResult(input_file, output_file, "", error=error, model=converter.model, error_type="ValueError")
+
+    # A saida de cada conversor e capturada para que o processo principal a
+    # imprima de uma vez, sem intercalar mensagens de arquivos diferentes.
+    captured = io.StringIO()
+    cache = ConversionCache.from_args(args)
+    output_data = None
+    error = None
+    error_type = None
+    # O pico de memoria so e zerado e lido quando ha relatorio (--report); o
+    # tracemalloc so com --trace-memory e o cProfile so com --profile.
+    track_memory = bool(getattr(args, "report", None))
+    trace_allocations = bool(getattr(args, "trace_memory", False))
+    max_memory = getattr(args, "max_memory", None)
+    max_memory_bytes = parse_size(max_memory) if max_memory else None
+    # O stdout real e guardado antes de redirect_stdout, que captura so as mensagens.
+    stdout = stdout_output() if is_stdio_path(output_file) else None
+    with measure(track_memory, trace_allocations) as metrics, profiled(profiling_requested(args)) as profile:
+        try:
+            preload = converter_dependencies(converter) if max_memory_bytes else ()
+            with redirect_stdout(captured), memory_limit(max_memory_bytes, preload):
+                if stdout is not None:
+                    _run_stdout_conversion(cache, converter, args, input_file, output_file, data, stdout)
+                elif getattr(args, "in_memory_output", False):
+                    output_data = _run_in_memory_conversion(cache, converter, args, input_file, output_file, data)
+                elif cache is not None:
+                    _run_cached_conversion(cache, converter, args, input_file, output_file, data)
+                elif data is None:
+                    run_single_conversion(converter, args, input_file, output_file)
+                else:
+                    run_buffer_conversion(converter, args, input_file, data, output_file)
+        except Exception as exc:
+            error = str(exc)
+            error_type = type(exc).__name__
+    metrics.input_bytes = _input_size(input_file, data)
+    if error is None:
+        metrics.output_bytes = _output_size(output_file, output_data)
+    return ConversionResult(
+        input_file,
+        output_file,
+        captured.getvalue(),
+        error=error,
+        model=converter.model,
+        output_data=output_data,
+        error_type=error_type,
+        metrics=metrics,
+        profile_stats=profile.stats,
+    )
+
+
+def _init_worker(converter: ConverterSpec | None, args: argparse.Namespace) -> None:
+    global _worker_converter, _worker_args
+    # Ctrl+C e tratado pelo processo principal, que encerra o pool de forma ordenada.
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    _worker_converter = converter
+    _worker_args = args
+
+
+def _convert_in_worker(
+    input_file: Path,
+    output_file: Path,
+    converter: ConverterSpec | None = None,
+    data: bytes | None = None,
+) -> ConversionResult:
+    converter = converter or _worker_converter
+    assert converter is not None and _worker_args is not None
+    return convert_file(converter, _worker_args, input_file, output_file, data)
+
+
+def worker_context(threaded: bool = False):
+    # Com fork os workers herdam o registro ja carregado e o conversor nao
+    # precisa ser serializado; nas demais plataformas o handler e enviado por pickle.
+    # Quando o processo principal tem outras threads (a gravacao de um .zip/.tar),
+    # um fork copiaria locks presos por elas; os workers partem de um forkserver.
+    methods = multiprocessing.get_all_start_methods()
+    if threaded and "forkserver" in methods:
+        context = multiprocessing.get_context("forkserver")
+        context.set_forkserver_preload([__name__])
+        return context
+    if "fork" in methods:
+        return multiprocessing.get_context("fork")
+    return multiprocessing.get_context()
+
+
+class OwnedWorkerContext:
+    # Contexto de multiprocessing que guarda os processos criados pelo pool.
+    # shutdown(cancel_futures=True) so descarta o que esta na fila; com os
+    # processos em maos um cancelamento encerra tambem o parse em andamento.
+    def __init__(self, context=None) -> None:
+        self._context = context or worker_context()
+        self.processes: list[multiprocessing.process.BaseProcess] = []
+
+    def __getattr__(self, name: str):
+        return getattr(self._context, name)
+
+    def Process(self, *args, **kwargs):
+        process = self._context.Process(*args, **kwargs)
+        self.processes.append(process)
+        return process
+
+    def terminate(self) -> None:
+        for process in self.processes:
+            if process.is_alive():
+                process.terminate()
+
+
+def create_worker_pool(converter: ConverterSpec | None, args: argparse.Namespace, jobs: int) -> ProcessPoolExecutor:
+    return ProcessPoolExecutor(
+        max_workers=jobs,
+        mp_context=worker_context(),
+        initializer=_init_worker,
+        initargs=(converter, args),
+    )
+
+
+def submit_conversion(
+    executor: ProcessPoolExecutor,
+    input_file: Path,
+    output_file: Path,
+    converter: ConverterSpec | None = None,
+    data: bytes | None = None,
+) -> "Future[ConversionResult]":
+    return executor.submit(_convert_in_worker, input_file, output_file, converter, data)
+
+
+def _serve(connection, initializer, initargs: tuple, handler) -> None:
+    initializer(*initargs)
+    while True:
+        try:
+            message = connection.recv()
+        except EOFError:
+            return
+        if message is None:
+            return
+        connection.send(handler(*message))
+
+
+class _Worker:
+    # Processo dedicado com um pipe proprio: diferente do ProcessPoolExecutor,
+    # pode ser morto sozinho (tempo limite, falha) sem quebrar os demais.
+    def __init__(self, initializer, initargs: tuple, handler, context=None) -> None:
+        context = context or worker_context()
+        self.connection, child_connection = context.Pipe()
+        self.process = context.Process(
+            target=_serve,
+            args=(child_connection, initializer, initargs, handler),
+            daemon=True,
+        )
+        self.process.start()
+        child_connection.close()
+        self.index = -1
+        self.started = 0.0
+
+    def submit(self, index: int, message: tuple) -> None:
+        self.index = index
+        self.started = time.monotonic()
+        self.connection.send(message)
+
+    def stop(self) -> None:
+        try:
+            self.connection.send(None)
+        except OSError:
+            pass
+        self.process.join(timeout=5)
+        self.kill()
+
+    def kill(self) -> None:
+        if self.process.is_alive():
+            self.process.kill()
+        self.process.join()
+        self.connection.close()
+
+
+@dataclass(frozen=True)
+class WorkerFailure:
+    error: str
+    error_type: str
+    elapsed: float
+
+
+def failed_result(
+    failure: WorkerFailure,
+    input_file: Path,
+    output_file: Path,
+    model: str | None = None,
+    data: bytes | None = None,
+) -> ConversionResult:
+    metrics = ConversionMetrics(input_bytes=_input_size(input_file, data), wall_seconds=failure.elapsed)
+    return ConversionResult(
+        input_file,
+        output_file,
+        "",
+        error=failure.error,
+        model=model,
+        error_type=failure.error_type,
+        metrics=metrics,
+    )
+
+
+def supervise(
+    items: Iterable[tuple[tuple | None, _Payload]],
+    jobs: int,
+    initializer: Callable[..., None],
+    initargs: tuple,
+    handler: Callable[..., object],
+    timeout: float | None = None,
+    context=None,
+    activity: str = "conversao",
+) -> Iterator[tuple[_Payload, object, WorkerFailure | None]]:
+    # Cada item traz a mensagem para um worker e um valor devolvido junto com a
+    # resposta; sem mensagem (None) o item so atravessa, mantendo a ordem. Os
+    # resultados saem na ordem dos itens. Um item que passa de --timeout ou
+    # derruba o processo vira uma falha e o worker e trocado.
+    item_iterator = iter(items)
+    exhausted = False
+    idle: list[_Worker] = []
+    busy: list[_Worker] = []
+    payloads: dict[int, _Payload] = {}
+    finished: dict[int, tuple[object, WorkerFailure | None]] = {}
+    submitted = 0
+    next_index = 0
+
+    def start_worker() -> _Worker:
+        return _Worker(initializer, initargs, handler, context)
+
+    def replace(worker: _Worker) -> None:
+        busy.remove(worker)
+        worker.kill()
+        idle.append(start_worker())
+
+    try:
+        while True:
+            while not exhausted and len(busy) < jobs and submitted - next_index < jobs * 2:
+                item = next(item_iterator, None)
+                if item is None:
+                    exhausted = True
+                    break
+                message, payloads[submitted] = item
+                if message is None:
+                    finished[submitted] = (None, None)
+                else:
+                    worker = idle.pop() if idle else start_worker()
+                    worker.submit(submitted, message)
+                    busy.append(worker)
+                submitted += 1
+
+            while next_index in finished:
+                response, failure = finished.pop(next_index)
+                yield payloads.pop(next_index), response, failure
+                next_index += 1
+            if not busy:
+                if exhausted:
+                    return
+                continue
+
+            wait_timeout = None
+            if timeout is not None:
+                deadline = min(worker.started for worker in busy) + timeout
+                wait_timeout = max(0.0, deadline - time.monotonic())
+            ready = multiprocessing.connection.wait(
+                [worker.connection for worker in busy] + [worker.process.sentinel for worker in busy],
+                timeout=wait_timeout,
+            )
+
+            for worker in list(busy):
+                elapsed = time.monotonic() - worker.started
+                if worker.connection in ready or worker.process.sentinel in ready:
+                    try:
+                        finished[worker.index] = (worker.connection.recv(), None)
+                    except (EOFError, OSError):
+                        worker.process.join()
+                        error = f"o processo de {activity} terminou inesperadamente (codigo {worker.process.exitcode})"
+                        finished[worker.index] = (None, WorkerFailure(error, "WorkerCrashed", elapsed))
+                        replace(worker)
+                        continue
+                    busy.remove(worker)
+                    idle.append(worker)
+                elif timeout is not None and elapsed >= timeout:
+                    error = f"tempo limite de {timeout:g}s excedido (--timeout)"
+                    finished[worker.index] = (None, WorkerFailure(error, "TimeoutError", elapsed))
+                    replace(worker)
+    finally:
+        for worker in busy:
+            worker.kill()
+        for worker in idle:
+            worker.stop()
+
+
+def run_supervised_conversions(
+    args: argparse.Namespace,
+    tasks: Iterable[ConversionTask],
+    jobs: int,
+    default_converter: ConverterSpec | None = None,
+    timeout: float | None = None,
+    context=None,
+) -> Iterator[ConversionResult]:
+    def messages() -> Iterator[tuple[tuple, ConversionTask]]:
+        for task in tasks:
+            routed_converter = None if task.converter is default_converter else task.converter
+            yield (task.input_file, task.output_file, routed_converter, task.data), task
+
+    supervised = supervise(
+        messages(),
+        jobs,
+        _init_worker,
+        (default_converter, args),
+        _convert_in_worker,
+        timeout,
+        context,
+    )
+    for task, result, failure in supervised:
+        if failure is not None:
+            result = failed_result(failure, task.input_file, task.output_file, task.converter.model, task.data)
+        yield result
+
+
+def run_routed_conversions(
+    args: argparse.Namespace,
+    tasks: Iterable[ConversionTask],
+    jobs: int,
+    default_converter: ConverterSpec | None = None,
+    context=None,
+) -> Iterator[ConversionResult]:
+    timeout = getattr(args, "timeout", None)
+    if jobs <= 1 and timeout is None:
+        for task in tasks:
+            yield convert_file(task.converter, args, task.input_file, task.output_file, task.data)
+        return
+
+    # Um unico conjunto de workers atende todos os modelos do lote; so o
+    # conversor que difere do padrao e serializado junto com a tarefa. Com
+    # --timeout mesmo --jobs 1 roda fora do processo principal, que pode mata-lo.
+    yield from run_supervised_conversions(args, tasks, jobs, default_converter, timeout, context)
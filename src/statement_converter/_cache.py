@@ -0,0 +1,182 @@
+import argparse
+import hashlib
+import os
+import re
+import shutil
+from collections.abc import Sequence
+from dataclasses import dataclass
+from pathlib import Path
+
+from statement_converter._manifest import HASH_CHUNK_SIZE, package_version
+from statement_converter.converter_registry import ConverterSpec
+
+
+DEFAULT_MAX_SIZE = 512 * 1024 * 1024
+SIZE_PATTERN = re.compile(r"^\s*(\d+)\s*([KMG]?)B?\s*$", re.IGNORECASE)
+SIZE_UNITS = {"": 1, "K": 1024, "M": 1024**2, "G": 1024**3}
+
+
+@dataclass(frozen=True)
+class CacheStats:
+    directory: Path
+    entries: int
+    total_bytes: int
+    max_size: int
+
+
+def default_cache_dir() -> Path:
+    base = os.environ.get("XDG_CACHE_HOME")
+    return (Path(base) if base else Path.home() / ".cache") / "statement-converter"
+
+
+def parse_size(value: str) -> int:
+    match = SIZE_PATTERN.match(value)
+    if not match:
+        raise ValueError(f"Tamanho invalido: {value}. Use um numero com sufixo opcional K, M ou G.")
+    return int(match.group(1)) * SIZE_UNITS[match.group(2).upper()]
+
+
+def format_size(value: int) -> str:
+    for unit in ("G", "M", "K"):
+        if value >= SIZE_UNITS[unit]:
+            return f"{value / SIZE_UNITS[unit]:.1f}{unit}B"
+    return f"{value}B"
+
+
+class ConversionCache:
+    def __init__(self, directory: Path, max_size: int = DEFAULT_MAX_SIZE) -> None:
+        self.directory = directory
+        self.max_size = max_size
+
+    @classmethod
+    def from_args(cls, args: argparse.Namespace) -> "ConversionCache | None":
+        if not getattr(args, "cache", False):
+            return None
+        return cls(
+            Path(getattr(args, "cache_dir", None) or default_cache_dir()),
+            parse_size(getattr(args, "cache_max_size", None) or str(DEFAULT_MAX_SIZE)),
+        )
+
+    def key_for(self, input_file: Path | bytes, converter: ConverterSpec, args: argparse.Namespace) -> str:
+        # Somente as opcoes declaradas pelo conversor alteram o resultado; caminhos
+        # e nomes de arquivo ficam de fora para que copias renomeadas compartilhem a entrada.
+        digest = hashlib.sha256()
+        if isinstance(input_file, bytes):
+            digest.update(input_file)
+        else:
+            with input_file.open("rb") as file:
+                while chunk := file.read(HASH_CHUNK_SIZE):
+                    digest.update(chunk)
+        digest.update(f"\0{converter.model}\0{package_version()}".encode())
+        for option in sorted(converter.required_options):
+            digest.update(f"\0{option}={getattr(args, option, None)}".encode())
+        return digest.hexdigest()
+
+    def _entry_path(self, key: str) -> Path:
+        return self.directory / key[:2] / key
+
+    def fetch(self, key: str, output_file: Path) -> bool:
+        entry_path = self._entry_path(key)
+        try:
+            shutil.copyfile(entry_path, output_file)
+        except FileNotFoundError:
+            return False
+        # O mtime marca o ultimo uso e define a ordem de remocao (LRU) no prune.
+        os.utime(entry_path)
+        return True
+
+    def store(self, key: str, output_file: Path) -> None:
+        entry_path = self._entry_path(key)
+        entry_path.parent.mkdir(parents=True, exist_ok=True)
+        temporary_path = entry_path.with_name(f".{key}.{os.getpid()}.tmp")
+        shutil.copyfile(output_file, temporary_path)
+        os.replace(temporary_path, entry_path)
+
+    def read(self, key: str) -> bytes | None:
+        entry_path = self._entry_path(key)
+        try:
+            data = entry_path.read_bytes()
+        except FileNotFoundError:
+            return None
+        os.utime(entry_path)
+        return data
+
+    def write(self, key: str, data: bytes) -> None:
+        entry_path = self._entry_path(key)
+        entry_path.parent.mkdir(parents=True, exist_ok=True)
+        temporary_path = entry_path.with_name(f".{key}.{os.getpid()}.tmp")
+        temporary_path.write_bytes(data)
+        os.replace(temporary_path, entry_path)
+
+    def _entries(self) -> list[tuple[float, int, Path]]:
+        entries = []
+        if not self.directory.is_dir():
+            return entries
+        with os.scandir(self.directory) as buckets:
+            for bucket in buckets:
+                if not bucket.is_dir(follow_symlinks=False):
+                    continue
+                with os.scandir(bucket.path) as files:
+                    for entry in files:
+                        if entry.name.startswith(".") or not entry.is_file(follow_symlinks=False):
+                            continue
+                        stat = entry.stat()
+                        entries.append((stat.st_mtime, stat.st_size, Path(entry.path)))
+        return entries
+
+    def stats(self) -> CacheStats:
+        entries = self._entries()
+        return CacheStats(
+            directory=self.directory,
+            entries=len(entries),
+            total_bytes=sum(size for _, size, _ in entries),
+            max_size=self.max_size,
+        )
+
+    def prune(self, max_size: int | None = None) -> int:
+        limit = self.max_size if max_size is None else max_size
+        entries = sorted(self._entries())
+        total_bytes = sum(size for _, size, _ in entries)
+        removed = 0
+        for _, size, path in entries:
+            if total_bytes <= limit:
+                break
+            path.unlink(missing_ok=True)
+            total_bytes -= size
+            removed += 1
+        return removed
+
+
+def build_argument_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="statement-converter cache",
+        description="Manutencao do cache de conversoes (--cache).",
+    )
+    parser.add_argument("action", choices=("stats", "prune"))
+    parser.add_argument("--cache-dir", type=Path, default=None, help="Diretorio do cache. Padrao: ~/.cache/statement-converter.")
+    parser.add_argument(
+        "--max-size",
+        default=None,
+        help="Tamanho maximo mantido pelo prune, por exemplo 200M ou 1G. Padrao: 512M; 0 esvazia o cache.",
+    )
+    return parser
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    parser = build_argument_parser()
+    args = parser.parse_args(argv)
+    try:
+        max_size = parse_size(args.max_size) if args.max_size is not None else DEFAULT_MAX_SIZE
+    except ValueError as exc:
+        parser.error(str(exc))
+
+    cache = ConversionCache(args.cache_dir or default_cache_dir(), max_size)
+    if args.action == "prune":
+        removed = cache.prune()
+        print(f"{removed} entrada(s) removida(s) do cache.")
+
+    stats = cache.stats()
+    print(f"Diretorio: {stats.directory}")
+    print(f"Entradas: {stats.entries}")
+    print(f"Tamanho: {format_size(stats.total_bytes)} de {format_size(stats.max_size)}")
+    return 0
@@ -0,0 +1,62 @@
+import hashlib
+import json
+import os
+from importlib import metadata
+from pathlib import Path
+
+
+# Catalogo dos conversores registrados (modelos, aliases, opcoes e a referencia
+# modulo:funcao de cada handler), gravado na primeira execucao. --help, o
+# autocompletar e a escolha do modelo leem so este arquivo, sem importar os
+# modulos convert_*.
+MANIFEST_VERSION = 1
+MANIFEST_FILE_NAME = "converters.json"
+
+
+def manifest_path() -> Path:
+    base = os.environ.get("XDG_CACHE_HOME")
+    return (Path(base) if base else Path.home() / ".cache") / "statement-converter" / MANIFEST_FILE_NAME
+
+
+def package_key(package_dirs: list[str], module_names: list[str]) -> str:
+    # A versao do pacote cobre instalacoes; tamanho e mtime dos modulos convert_*
+    # cobrem um checkout em desenvolvimento em que um conversor mudou.
+    try:
+        version = metadata.version("statement-converter")
+    except metadata.PackageNotFoundError:
+        version = "0"
+    digest = hashlib.sha256(version.encode())
+    for module_name in sorted(module_names):
+        short_name = module_name.rpartition(".")[2]
+        for package_dir in package_dirs:
+            try:
+                stat = os.stat(os.path.join(package_dir, f"{short_name}.py"))
+            except OSError:
+                continue
+            digest.update(f"\0{short_name}:{stat.st_size}:{stat.st_mtime_ns}".encode())
+            break
+    return digest.hexdigest()
+
+
+def read_manifest(path: Path, key: str) -> dict[str, list[dict] | None] | None:
+    try:
+        payload = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+    if not isinstance(payload, dict) or payload.get("version") != MANIFEST_VERSION or payload.get("key") != key:
+        return None
+    modules = payload.get("modules")
+    return modules if isinstance(modules, dict) else None
+
+
+def write_manifest(path: Path, key: str, modules: dict[str, list[dict] | None]) -> None:
+    # O catalogo e so um atalho: sem permissao de escrita os modulos continuam
+    # sendo importados a cada execucao.
+    payload = {"version": MANIFEST_VERSION, "key": key, "modules": modules}
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        temporary_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+        temporary_path.write_text(json.dumps(payload, indent=2, ensure_ascii=False), encoding="utf-8")
+        os.replace(temporary_path, path)
+    except OSError:
+        pass
@@ -0,0 +1,311 @@
+import argparse
+import importlib
+import io
+import json
+import os
+import signal
+import socket
+import stat
+import struct
+import sys
+import tempfile
+import time
+from collections.abc import Sequence
+from contextlib import redirect_stderr, redirect_stdout
+from pathlib import Path
+from typing import BinaryIO
+
+from statement_converter.converter_registry import HEAVY_DEPENDENCIES, ConverterRegistry, registry
+
+
+SOCKET_ENV = "STATEMENT_CONVERTER_SOCKET"
+NO_DAEMON_ENV = "STATEMENT_CONVERTER_NO_DAEMON"
+# Variaveis do cliente que mudam o resultado da conversao (diretorio do cache,
+# arquivos temporarios, fuso horario) e por isso acompanham cada requisicao.
+FORWARDED_ENVIRONMENT = ("HOME", "XDG_CACHE_HOME", "TMPDIR", "TZ")
+
+
+def default_socket_path() -> Path:
+    configured = os.environ.get(SOCKET_ENV)
+    if configured:
+        return Path(configured)
+    runtime_dir = os.environ.get("XDG_RUNTIME_DIR")
+    if runtime_dir:
+        return Path(runtime_dir) / "statement-converter.sock"
+    # Fora do XDG_RUNTIME_DIR o socket fica num diretorio 0700 do proprio usuario,
+    # e nao direto em /tmp, onde outro usuario poderia criar o caminho antes.
+    return Path("/tmp") / f"statement-converter-{os.getuid()}" / "daemon.sock"
+
+
+class _DaemonStop(Exception):
+    pass
+
+
+def _send(writer: BinaryIO, message: dict) -> None:
+    writer.write(json.dumps(message).encode() + b"\n")
+    writer.flush()
+
+
+class _ForwardedStream(io.TextIOBase):
+    # Repassa cada escrita ao cliente assim que acontece, preservando a ordem
+    # entre stdout e stderr como no modo em processo.
+    def __init__(self, writer: BinaryIO, name: str) -> None:
+        self._writer = writer
+        self._name = name
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, text: str) -> int:
+        if text:
+            _send(self._writer, {"stream": self._name, "data": text})
+        return len(text)
+
+
+def _owned_socket(socket_path: Path) -> bool:
+    try:
+        status = os.lstat(socket_path)
+    except OSError:
+        return False
+    return stat.S_ISSOCK(status.st_mode) and status.st_uid == os.getuid()
+
+
+def _peer_uid(client: socket.socket) -> int | None:
+    if not hasattr(socket, "SO_PEERCRED"):
+        return None
+    credentials = client.getsockopt(socket.SOL_SOCKET, socket.SO_PEERCRED, struct.calcsize("3i"))
+    _, uid, _ = struct.unpack("3i", credentials)
+    return uid
+
+
+def _connect(socket_path: Path) -> socket.socket | None:
+    # argv, cwd e ambiente so seguem para um daemon do proprio usuario; um socket
+    # de outro dono (ou que nao e socket) e ignorado e a conversao roda localmente.
+    if not _owned_socket(socket_path):
+        return None
+    client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        client.connect(str(socket_path))
+        peer_uid = _peer_uid(client)
+    except OSError:
+        client.close()
+        return None
+    if peer_uid is not None and peer_uid != os.getuid():
+        client.close()
+        return None
+    return client
+
+
+def _prepare_socket_directory(directory: Path) -> None:
+    directory.mkdir(mode=0o700, parents=True, exist_ok=True)
+    if directory.stat().st_uid != os.getuid():
+        raise RuntimeError(f"O diretorio do socket {directory} pertence a outro usuario.")
+
+
+def forward_to_daemon(argv: Sequence[str], socket_path: Path | None = None) -> int | None:
+    if os.environ.get(NO_DAEMON_ENV) or "_ARGCOMPLETE" in os.environ:
+        return None
+
+    client = _connect(socket_path or default_socket_path())
+    if client is None:
+        return None
+
+    with client, client.makefile("rb") as reader, client.makefile("wb") as writer:
+        environment = {name: os.environ.get(name) for name in FORWARDED_ENVIRONMENT}
+        _send(writer, {"argv": list(argv), "cwd": os.getcwd(), "env": environment})
+        for line in reader:
+            message = json.loads(line)
+            if "exit_code" in message:
+                return message["exit_code"]
+            stream = sys.stderr if message.get("stream") == "stderr" else sys.stdout
+            stream.write(message.get("data", ""))
+
+    print("A conexao com o daemon do statement-converter foi encerrada antes do fim da conversao.", file=sys.stderr)
+    return 1
+
+
+def _exit_code(exc: SystemExit) -> int:
+    if exc.code is None:
+        return 0
+    if isinstance(exc.code, int):
+        return exc.code
+    print(exc.code, file=sys.stderr)
+    return 1
+
+
+def _apply_environment(environment: dict[str, str | None]) -> None:
+    for name, value in environment.items():
+        if value is None:
+            os.environ.pop(name, None)
+        else:
+            os.environ[name] = value
+    # tempfile e time guardam em cache o TMPDIR e o TZ lidos na primeira consulta.
+    tempfile.tempdir = None
+    time.tzset()
+
+
+def _handle_connection(connection: socket.socket) -> None:
+    from statement_converter import statement_converter
+
+    with connection, connection.makefile("rb") as reader, connection.makefile("wb") as writer:
+        line = reader.readline()
+        if not line:
+            return
+        request = json.loads(line)
+        if request.get("command") == "ping":
+            _send(writer, {"exit_code": 0, "pid": os.getppid()})
+            return
+
+        os.chdir(request["cwd"])
+        forwarded = request.get("env") or {}
+        _apply_environment({name: forwarded.get(name) for name in FORWARDED_ENVIRONMENT})
+        with redirect_stdout(_ForwardedStream(writer, "stdout")), redirect_stderr(_ForwardedStream(writer, "stderr")):
+            try:
+                exit_code = statement_converter.main(request["argv"])
+            except SystemExit as exc:
+                exit_code = _exit_code(exc)
+            except Exception as exc:
+                print(f"Erro inesperado no daemon: {exc}", file=sys.stderr)
+                exit_code = 1
+        _send(writer, {"exit_code": exit_code})
+
+
+def _worker_loop(server: socket.socket) -> None:
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    home = os.getcwd()
+    environment = {name: os.environ.get(name) for name in FORWARDED_ENVIRONMENT}
+    while True:
+        connection, _ = server.accept()
+        try:
+            _handle_connection(connection)
+        except Exception as exc:
+            print(f"Requisicao invalida recebida pelo daemon: {exc}", file=sys.stderr)
+        finally:
+            os.chdir(home)
+            _apply_environment(environment)
+
+
+def _spawn_worker(server: socket.socket) -> int:
+    pid = os.fork()
+    if pid == 0:
+        try:
+            _worker_loop(server)
+        finally:
+            os._exit(0)
+    return pid
+
+
+def serve(socket_path: Path, workers: int, converter_registry: ConverterRegistry = registry) -> None:
+    from statement_converter.statement_converter import _ensure_builtin_converters_loaded
+
+    # Os conversores e suas dependencias (pandas, pypdf, ofxparse) sao importados uma
+    # unica vez aqui; cada worker pre-criado herda o processo ja aquecido via fork.
+    # Como os conversores (lidos do catalogo) e as dependencias so sao importados
+    # no primeiro uso, o daemon os carrega explicitamente.
+    _ensure_builtin_converters_loaded(converter_registry)
+    converter_registry.resolve_all()
+    for module_name in HEAVY_DEPENDENCIES:
+        importlib.import_module(module_name)
+    os.environ[NO_DAEMON_ENV] = "1"
+
+    if _connect(socket_path) is not None:
+        raise RuntimeError(f"Ja existe um daemon ativo em {socket_path}.")
+    _prepare_socket_directory(socket_path.parent)
+    socket_path.unlink(missing_ok=True)
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    # O socket ja nasce com permissao 0600; um chmod depois do bind deixaria
+    # uma janela em que outros usuarios poderiam se conectar.
+    previous_umask = os.umask(0o177)
+    try:
+        server.bind(str(socket_path))
+    finally:
+        os.umask(previous_umask)
+    server.listen(128)
+
+    def request_stop(signum, frame) -> None:
+        del signum, frame
+        raise _DaemonStop
+
+    children = {_spawn_worker(server) for _ in range(workers)}
+    signal.signal(signal.SIGTERM, request_stop)
+    signal.signal(signal.SIGINT, request_stop)
+    print(f"Daemon ativo em {socket_path} com {workers} worker(s).", flush=True)
+    try:
+        while True:
+            pid, _ = os.wait()
+            # Um worker que morre (por exemplo, OOM) e substituido por outro ja aquecido.
+            children.discard(pid)
+            children.add(_spawn_worker(server))
+    except _DaemonStop:
+        pass
+    finally:
+        for pid in children:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+        for pid in children:
+            try:
+                os.waitpid(pid, 0)
+            except ChildProcessError:
+                pass
+        server.close()
+        socket_path.unlink(missing_ok=True)
+        print("Daemon encerrado.", flush=True)
+
+
+def ping(socket_path: Path) -> int | None:
+    client = _connect(socket_path)
+    if client is None:
+        return None
+    with client, client.makefile("rb") as reader, client.makefile("wb") as writer:
+        _send(writer, {"command": "ping"})
+        response = json.loads(reader.readline() or b"{}")
+    return response.get("pid")
+
+
+def build_argument_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="statement-converter daemon",
+        description=(
+            "Mantem os conversores carregados em processos pre-criados atras de um socket Unix. "
+            "Enquanto o daemon estiver ativo, o comando statement-converter encaminha as conversoes para ele."
+        ),
+    )
+    parser.add_argument("action", choices=("run", "status", "stop"))
+    parser.add_argument("--socket", type=Path, default=None, help="Caminho do socket. Padrao: $XDG_RUNTIME_DIR/statement-converter.sock.")
+    parser.add_argument("--workers", type=int, default=None, help="Processos atendendo clientes em paralelo. Padrao: quantidade de CPUs.")
+    return parser
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    parser = build_argument_parser()
+    args = parser.parse_args(argv)
+    socket_path = args.socket or default_socket_path()
+
+    if args.action == "run":
+        workers = args.workers or os.cpu_count() or 1
+        if workers < 1:
+            parser.error("--workers deve ser um numero inteiro maior ou igual a 1")
+        try:
+            serve(socket_path, workers)
+        except RuntimeError as exc:
+            print(exc, file=sys.stderr)
+            return 1
+        return 0
+
+    pid = ping(socket_path)
+    if args.action == "status":
+        if pid is None:
+            print(f"Nenhum daemon ativo em {socket_path}.")
+            return 1
+        print(f"Daemon ativo em {socket_path} (pid {pid}).")
+        return 0
+
+    if pid is None:
+        print(f"Nenhum daemon ativo em {socket_path}.")
+        return 1
+    os.kill(pid, signal.SIGTERM)
+    print(f"Sinal de encerramento enviado ao daemon (pid {pid}).")
+    return 0
@@ -0,0 +1,124 @@
+import json
+import os
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import TextIO
+
+from statement_converter._manifest import file_sha256
+
+
+JOURNAL_NAME = ".statement-converter-journal.jsonl"
+
+
+@dataclass(frozen=True)
+class JournalEntry:
+    input: str
+    size: int | None
+    mtime_ns: int | None
+    model: str | None
+    status: str
+    output: str | None = None
+    sha256: str | None = None
+
+
+def input_identity(input_file: Path, data: bytes | None) -> tuple[int | None, int | None]:
+    # Membros de arquivos compactados nao tem mtime proprio; basta o tamanho.
+    if data is not None:
+        return len(data), None
+    try:
+        stat = input_file.stat()
+    except OSError:
+        return None, None
+    return stat.st_size, stat.st_mtime_ns
+
+
+class ConversionJournal:
+    # Diario append-only de um lote gravado no diretorio de saida: uma linha por
+    # entrada concluida, com o hash da saida. Uma execucao interrompida (deploy,
+    # OOM, Ctrl+C) deixa o diario para que --resume continue de onde parou; um
+    # lote que termina sem falhas o remove.
+    def __init__(self, path: Path, entries: dict[str, JournalEntry], file: TextIO) -> None:
+        self.path = path
+        self._entries = entries
+        self._file = file
+
+    @classmethod
+    def open(cls, output_dir: Path, resume: bool, name: str = JOURNAL_NAME) -> "ConversionJournal":
+        path = output_dir / name
+        entries: dict[str, JournalEntry] = {}
+        if resume:
+            entries = cls._load(path)
+        output_dir.mkdir(parents=True, exist_ok=True)
+        file = path.open("a" if resume else "w", encoding="utf-8")
+        if file.tell() > 0:
+            # Fecha a linha incompleta deixada por uma execucao interrompida.
+            with path.open("rb") as existing:
+                existing.seek(-1, os.SEEK_END)
+                if existing.read(1) != b"\n":
+                    file.write("\n")
+        return cls(path, entries, file)
+
+    @staticmethod
+    def _load(path: Path) -> dict[str, JournalEntry]:
+        entries: dict[str, JournalEntry] = {}
+        try:
+            lines = path.read_text(encoding="utf-8").splitlines()
+        except OSError:
+            return entries
+        for line in lines:
+            # A ultima linha pode ter ficado pela metade se o processo morreu gravando.
+            try:
+                entry = JournalEntry(**json.loads(line))
+            except (ValueError, TypeError):
+                continue
+            entries[entry.input] = entry
+        return entries
+
+    def is_completed(self, key: str, input_file: Path, data: bytes | None, output_file: Path) -> bool:
+        entry = self._entries.get(key)
+        if entry is None or entry.status != "ok":
+            return False
+        if (entry.size, entry.mtime_ns) != input_identity(input_file, data):
+            return False
+        if entry.output != self._relative_output(output_file):
+            return False
+        # A saida pode ter sido truncada ou sobrescrita depois de registrada.
+        try:
+            return file_sha256(output_file) == entry.sha256
+        except OSError:
+            return False
+
+    def _relative_output(self, output_file: Path) -> str:
+        try:
+            return output_file.relative_to(self.path.parent).as_posix()
+        except ValueError:
+            return output_file.as_posix()
+
+    def record(
+        self,
+        key: str,
+        identity: tuple[int | None, int | None],
+        model: str | None,
+        output_file: Path,
+        succeeded: bool,
+    ) -> None:
+        size, mtime_ns = identity
+        output = sha256 = None
+        if succeeded:
+            output = self._relative_output(output_file)
+            try:
+                sha256 = file_sha256(output_file)
+            except OSError:
+                pass
+        entry = JournalEntry(key, size, mtime_ns, model, "ok" if succeeded else "error", output, sha256)
+        self._entries[key] = entry
+        self._file.write(json.dumps(asdict(entry), ensure_ascii=False) + "\n")
+        self._file.flush()
+
+    def close(self, completed: bool) -> None:
+        self._file.close()
+        if completed:
+            try:
+                os.remove(self.path)
+            except FileNotFoundError:
+                pass
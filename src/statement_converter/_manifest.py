@@ -0,0 +1,139 @@
+import hashlib
+import importlib.util
+import json
+import os
+import sys
+from dataclasses import asdict, dataclass
+from importlib import metadata
+from pathlib import Path
+
+from statement_converter.converter_registry import ConverterSpec
+
+
+MANIFEST_NAME = ".statement-converter-manifest.json"
+MANIFEST_VERSION = 1
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+@dataclass(frozen=True)
+class ManifestEntry:
+    size: int
+    mtime_ns: int
+    sha256: str
+    model: str
+    converter_version: str
+    output: str
+
+
+def file_sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with path.open("rb") as file:
+        while chunk := file.read(HASH_CHUNK_SIZE):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def package_version() -> str:
+    try:
+        return metadata.version("statement-converter")
+    except metadata.PackageNotFoundError:
+        return "0"
+
+
+def _module_file(module_name: str) -> str | None:
+    module = sys.modules.get(module_name)
+    if module is not None:
+        return getattr(module, "__file__", None)
+    try:
+        spec = importlib.util.find_spec(module_name)
+    except (ImportError, ValueError):
+        return None
+    return spec.origin if spec is not None else None
+
+
+def converter_fingerprint(converter: ConverterSpec) -> str:
+    # A versao do pacote cobre releases; o hash do modulo do handler cobre
+    # alteracoes locais no conversor que ainda nao mudaram a versao.
+    digest = hashlib.sha256(f"{package_version()}:{converter.model}".encode())
+    # O arquivo e localizado sem importar o modulo, que pode ainda nao ter sido
+    # carregado quando o conversor vem do catalogo.
+    module_file = _module_file(getattr(converter.handler, "__module__", ""))
+    if module_file and Path(module_file).is_file():
+        digest.update(Path(module_file).read_bytes())
+    return digest.hexdigest()[:16]
+
+
+class ConversionManifest:
+    def __init__(self, path: Path, entries: dict[str, ManifestEntry] | None = None) -> None:
+        self.path = path
+        self._entries: dict[str, ManifestEntry] = entries or {}
+
+    @classmethod
+    def load(cls, output_dir: Path, name: str = MANIFEST_NAME) -> "ConversionManifest":
+        path = output_dir / name
+        try:
+            payload = json.loads(path.read_text(encoding="utf-8"))
+            entries = {key: ManifestEntry(**value) for key, value in payload["entries"].items()}
+        except (OSError, ValueError, KeyError, TypeError):
+            entries = {}
+        return cls(path, entries)
+
+    def get(self, key: str) -> ManifestEntry | None:
+        return self._entries.get(key)
+
+    def _relative_output(self, output_file: Path) -> str:
+        return output_file.relative_to(self.path.parent).as_posix()
+
+    def unchanged_model(self, key: str, input_file: Path) -> str | None:
+        # Checagem barata (tamanho e mtime) usada para nao identificar de novo o modelo
+        # de arquivos que nao mudaram; is_up_to_date continua validando a entrada.
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        stat = input_file.stat()
+        if stat.st_size != entry.size or stat.st_mtime_ns != entry.mtime_ns:
+            return None
+        return entry.model
+
+    def is_up_to_date(self, key: str, input_file: Path, output_file: Path, model: str, converter_version: str) -> bool:
+        entry = self._entries.get(key)
+        if entry is None or entry.model != model or entry.converter_version != converter_version:
+            return False
+        if entry.output != self._relative_output(output_file) or not output_file.exists():
+            return False
+
+        stat = input_file.stat()
+        if stat.st_size != entry.size:
+            return False
+        if stat.st_mtime_ns == entry.mtime_ns:
+            return True
+
+        # O mtime mudou (copia, checkout, novo download), mas o conteudo pode ser o mesmo.
+        if file_sha256(input_file) != entry.sha256:
+            return False
+        self._entries[key] = ManifestEntry(**{**asdict(entry), "mtime_ns": stat.st_mtime_ns})
+        return True
+
+    def record(self, key: str, input_file: Path, output_file: Path, model: str, converter_version: str) -> None:
+        stat = input_file.stat()
+        self._entries[key] = ManifestEntry(
+            size=stat.st_size,
+            mtime_ns=stat.st_mtime_ns,
+            sha256=file_sha256(input_file),
+            model=model,
+            converter_version=converter_version,
+            output=self._relative_output(output_file),
+        )
+
+    def discard(self, key: str) -> None:
+        self._entries.pop(key, None)
+
+    def save(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        payload = {
+            "version": MANIFEST_VERSION,
+            "entries": {key: asdict(entry) for key, entry in sorted(self._entries.items())},
+        }
+        temporary_path = self.path.with_name(f"{self.path.name}.tmp")
+        temporary_path.write_text(json.dumps(payload, indent=2, ensure_ascii=False), encoding="utf-8")
+        os.replace(temporary_path, self.path)
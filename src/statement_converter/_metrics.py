@@ -0,0 +1,242 @@
+import contextvars
+import functools
+import importlib
+import sys
+import time
+import tracemalloc
+from collections.abc import Callable, Iterable, Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, TypeVar
+
+
+_Function = TypeVar("_Function", bound=Callable[..., Any])
+
+# Medicoes da conversao em andamento: contadores (paginas, streams, transacoes...)
+# e o tempo acumulado de cada etapa (read, decompress, extract, parse, render,
+# write). Fora de collect() count() e span() so consultam a ContextVar e
+# retornam, sem custo perceptivel nos conversores.
+STAGES = ("read", "decompress", "extract", "parse", "render", "write")
+
+
+class Collector:
+    __slots__ = ("counters", "stages")
+
+    def __init__(self) -> None:
+        self.counters: dict[str, int] = {}
+        self.stages: dict[str, float] = {}
+
+
+_collector: contextvars.ContextVar[Collector | None] = contextvars.ContextVar(
+    "statement_converter_collector",
+    default=None,
+)
+
+
+def count(name: str, value: int = 1) -> None:
+    collector = _collector.get()
+    if collector is not None:
+        collector.counters[name] = collector.counters.get(name, 0) + value
+
+
+class _Span:
+    __slots__ = ("collector", "name", "started")
+
+    def __init__(self, collector: Collector, name: str) -> None:
+        self.collector = collector
+        self.name = name
+
+    def __enter__(self) -> "_Span":
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        elapsed = time.perf_counter() - self.started
+        stages = self.collector.stages
+        stages[self.name] = stages.get(self.name, 0.0) + elapsed
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self) -> "_NullSpan":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        pass
+
+
+_NULL_SPAN = _NullSpan()
+
+
+def span(name: str) -> _Span | _NullSpan:
+    # Etapas aninhadas sao inclusivas: extract inclui o decompress dos streams.
+    collector = _collector.get()
+    if collector is None:
+        return _NULL_SPAN
+    return _Span(collector, name)
+
+
+def stage(name: str) -> Callable[[_Function], _Function]:
+    def decorator(function: _Function) -> _Function:
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            collector = _collector.get()
+            if collector is None:
+                return function(*args, **kwargs)
+            with _Span(collector, name):
+                return function(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+@contextmanager
+def collect() -> Iterator[Collector]:
+    parent = _collector.get()
+    collector = Collector()
+    token = _collector.set(collector)
+    try:
+        yield collector
+    finally:
+        _collector.reset(token)
+        # Uma coleta aninhada (convert_file dentro do worker da API) tambem soma na externa.
+        if parent is not None:
+            for name, value in collector.counters.items():
+                parent.counters[name] = parent.counters.get(name, 0) + value
+            for name, seconds in collector.stages.items():
+                parent.stages[name] = parent.stages.get(name, 0.0) + seconds
+
+
+@dataclass
+class ConversionMetrics:
+    input_bytes: int | None = None
+    output_bytes: int | None = None
+    wall_seconds: float = 0.0
+    cpu_seconds: float = 0.0
+    peak_rss_bytes: int | None = None
+    peak_traced_bytes: int | None = None
+    counters: dict[str, int] = field(default_factory=dict)
+    stages: dict[str, float] = field(default_factory=dict)
+
+
+def _reset_peak_rss() -> None:
+    # No Linux o pico (VmHWM) pode ser zerado a cada arquivo; nas demais
+    # plataformas o valor reportado e o pico do processo desde o inicio.
+    try:
+        with open("/proc/self/clear_refs", "w") as clear_refs:
+            clear_refs.write("5")
+    except OSError:
+        pass
+
+
+def _peak_rss_bytes() -> int | None:
+    try:
+        with open("/proc/self/status") as status:
+            for line in status:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) * 1024
+    except (OSError, ValueError, IndexError):
+        pass
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+@contextmanager
+def measure(track_memory: bool = False, trace_allocations: bool = False) -> Iterator[ConversionMetrics]:
+    metrics = ConversionMetrics()
+    if track_memory:
+        _reset_peak_rss()
+    # tracemalloc mostra quanto o Python alocou de fato, sem o ruido do RSS,
+    # mas deixa a conversao bem mais lenta; so e ligado com --trace-memory.
+    already_tracing = tracemalloc.is_tracing()
+    if trace_allocations:
+        if already_tracing:
+            tracemalloc.reset_peak()
+        else:
+            tracemalloc.start()
+    started_wall = time.perf_counter()
+    started_cpu = time.process_time()
+    with collect() as collector:
+        try:
+            yield metrics
+        finally:
+            metrics.wall_seconds = time.perf_counter() - started_wall
+            metrics.cpu_seconds = time.process_time() - started_cpu
+            metrics.counters = dict(collector.counters)
+            metrics.stages = dict(collector.stages)
+            if track_memory:
+                metrics.peak_rss_bytes = _peak_rss_bytes()
+            if trace_allocations:
+                metrics.peak_traced_bytes = tracemalloc.get_traced_memory()[1]
+                if not already_tracing:
+                    tracemalloc.stop()
+
+
+class MemoryLimitExceeded(MemoryError):
+    pass
+
+
+def _address_space_bytes() -> int | None:
+    try:
+        with open("/proc/self/status") as status:
+            for line in status:
+                if line.startswith("VmSize:"):
+                    return int(line.split()[1]) * 1024
+    except (OSError, ValueError, IndexError):
+        pass
+    return None
+
+
+def memory_limit_supported() -> bool:
+    # Sem o VmSize o limite seria aplicado ao espaco total, e nao ao que a conversao soma.
+    try:
+        import resource
+    except ImportError:
+        return False
+    return hasattr(resource, "RLIMIT_AS") and _address_space_bytes() is not None
+
+
+@contextmanager
+def memory_limit(max_bytes: int | None, preload: Iterable[str] = ()) -> Iterator[None]:
+    # O limite vale para o espaco de enderecamento que a conversao pode somar ao
+    # que o processo ja usa: uma alocacao acima dele falha com MemoryError no
+    # proprio conversor, que e interrompido e reportado, em vez de o worker
+    # inteiro ser morto pelo OOM killer.
+    if not max_bytes:
+        yield
+        return
+
+    import resource
+
+    # As dependencias pesadas do conversor (pandas, pypdf) mapeiam bibliotecas
+    # nativas ao serem importadas; isso acontece antes do limite, fora da conta.
+    for module_name in preload:
+        importlib.import_module(module_name)
+
+    soft, hard = resource.getrlimit(resource.RLIMIT_AS)
+    limit = (_address_space_bytes() or 0) + max_bytes
+    if hard != resource.RLIM_INFINITY:
+        limit = min(limit, hard)
+    if soft != resource.RLIM_INFINITY:
+        limit = min(limit, soft)
+    resource.setrlimit(resource.RLIMIT_AS, (limit, hard))
+    try:
+        yield
+    except (MemoryError, ImportError) as exc:
+        # O limite e desfeito antes de montar a nova excecao. Um import que falha
+        # sob o limite (extensao nativa sem memoria para ser mapeada) tambem conta
+        # como estouro; modulo inexistente continua sendo ModuleNotFoundError.
+        resource.setrlimit(resource.RLIMIT_AS, (soft, hard))
+        if isinstance(exc, MemoryLimitExceeded | ModuleNotFoundError):
+            raise
+        raise MemoryLimitExceeded(
+            f"a conversao excedeu o limite de memoria de {max_bytes // (1024 * 1024)} MB (--max-memory)"
+        ) from None
+    finally:
+        resource.setrlimit(resource.RLIMIT_AS, (soft, hard))
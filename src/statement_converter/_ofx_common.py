@@ -1,7 +1,12 @@
+import io
 import re
+from collections.abc import Iterable
 from dataclasses import dataclass
 from datetime import datetime
 from decimal import Decimal
+from typing import BinaryIO
+
+from statement_converter._metrics import count, stage
 
 
 @dataclass(frozen=True)
@@ -51,68 +56,130 @@ def fit_id(transaction: StatementTransaction, sequence: int) -> str:
     return f"{format_ofx_timestamp(transaction.posted_at)}-{sign}-{cents}-{memo_slug}-{sequence:06d}"
 
 
-def build_ofx(statement: StatementData) -> str:
-    if statement.transactions:
-        start = min(transaction.posted_at for transaction in statement.transactions)
-        end = max(transaction.posted_at for transaction in statement.transactions)
-        ledger_balance = next(
-            (transaction.balance for transaction in reversed(statement.transactions) if transaction.balance is not None),
-            Decimal("0.00"),
-        )
-    else:
+# DTSTART e DTEND tem largura fixa: o cabecalho da lista reserva o espaco e as
+# datas sao preenchidas depois que as transacoes foram gravadas.
+_PLACEHOLDER_TIMESTAMP = "0" * len("YYYYmmddHHMMSS")
+
+_STATUS_OK = ("<STATUS>", "<CODE>0", "<SEVERITY>INFO", "</STATUS>")
+
+
+def _lines(*lines: str) -> bytes:
+    return "".join(f"{line}\n" for line in lines).encode("utf-8")
+
+
+def _signon_lines(generated_at: datetime) -> bytes:
+    return _lines(
+        "OFXHEADER:100",
+        "DATA:OFXSGML",
+        "VERSION:102",
+        "SECURITY:NONE",
+        "ENCODING:USASCII",
+        "CHARSET:1252",
+        "COMPRESSION:NONE",
+        "OLDFILEUID:NONE",
+        "NEWFILEUID:NONE",
+        "",
+        "<OFX>",
+        "<SIGNONMSGSRSV1>",
+        "<SONRS>",
+        *_STATUS_OK,
+        f"<DTSERVER>{format_ofx_timestamp(generated_at)}",
+        "<LANGUAGE>POR",
+        "</SONRS>",
+        "</SIGNONMSGSRSV1>",
+    )
+
+
+def _period_lines(start: str, end: str) -> bytes:
+    return _lines(f"<DTSTART>{start}", f"<DTEND>{end}")
+
+
+def _transaction_lines(transaction: StatementTransaction, sequence: int) -> bytes:
+    return _lines(
+        "<STMTTRN>",
+        f"<TRNTYPE>{transaction_type(transaction.amount)}",
+        f"<DTPOSTED>{format_ofx_timestamp(transaction.posted_at)}",
+        f"<TRNAMT>{transaction.amount:.2f}",
+        f"<FITID>{fit_id(transaction, sequence)}",
+        f"<NAME>{transaction.name or transaction.memo}",
+        f"<MEMO>{transaction.memo}",
+        "</STMTTRN>",
+    )
+
+
+@dataclass
+class _TransactionTotals:
+    # Periodo, ultimo saldo informado e soma dos valores, acumulados transacao a transacao.
+    start: datetime | None = None
+    end: datetime | None = None
+    last_balance: Decimal | None = None
+    amount: Decimal = Decimal("0.00")
+    count: int = 0
+
+    def add(self, transaction: StatementTransaction) -> None:
+        if self.start is None or transaction.posted_at < self.start:
+            self.start = transaction.posted_at
+        if self.end is None or transaction.posted_at > self.end:
+            self.end = transaction.posted_at
+        if transaction.balance is not None:
+            self.last_balance = transaction.balance
+        self.amount += transaction.amount
+        self.count += 1
+
+    def period(self, statement: StatementData) -> tuple[datetime, datetime]:
+        if self.count:
+            return self.start, self.end
         start = statement.start_date or datetime.now()
-        end = statement.end_date or start
-        ledger_balance = Decimal("0.00")
+        return start, statement.end_date or start
 
-    transaction_blocks = []
-    for index, transaction in enumerate(statement.transactions, start=1):
-        transaction_blocks.append(
-            "\n".join(
-                [
-                    "<STMTTRN>",
-                    f"<TRNTYPE>{transaction_type(transaction.amount)}",
-                    f"<DTPOSTED>{format_ofx_timestamp(transaction.posted_at)}",
-                    f"<TRNAMT>{transaction.amount:.2f}",
-                    f"<FITID>{fit_id(transaction, index)}",
-                    f"<NAME>{transaction.name or transaction.memo}",
-                    f"<MEMO>{transaction.memo}",
-                    "</STMTTRN>",
-                ]
-            )
-        )
 
-    generated_at = statement.generated_at or datetime.now()
+def _totals(transactions: Iterable[StatementTransaction]) -> _TransactionTotals:
+    totals = _TransactionTotals()
+    for transaction in transactions:
+        totals.add(transaction)
+    return totals
+
 
-    return "\n".join(
-        [
-            "OFXHEADER:100",
-            "DATA:OFXSGML",
-            "VERSION:102",
-            "SECURITY:NONE",
-            "ENCODING:USASCII",
-            "CHARSET:1252",
-            "COMPRESSION:NONE",
-            "OLDFILEUID:NONE",
-            "NEWFILEUID:NONE",
-            "",
-            "<OFX>",
-            "<SIGNONMSGSRSV1>",
-            "<SONRS>",
-            "<STATUS>",
-            "<CODE>0",
-            "<SEVERITY>INFO",
-            "</STATUS>",
-            f"<DTSERVER>{format_ofx_timestamp(generated_at)}",
-            "<LANGUAGE>POR",
-            "</SONRS>",
-            "</SIGNONMSGSRSV1>",
+def _write_transaction_list(output: BinaryIO, statement: StatementData) -> tuple[_TransactionTotals, datetime]:
+    # Cada transacao e gravada assim que renderizada. Em saidas com seek o periodo
+    # e calculado na mesma passada e preenchido no espaco reservado; sem seek
+    # (stdout em um pipe) ele sai de uma passada previa pelas transacoes.
+    reserved_at = None
+    if output.seekable():
+        reserved_at = output.tell()
+        output.write(_period_lines(_PLACEHOLDER_TIMESTAMP, _PLACEHOLDER_TIMESTAMP))
+    else:
+        start, end = _totals(statement.transactions).period(statement)
+        output.write(_period_lines(format_ofx_timestamp(start), format_ofx_timestamp(end)))
+
+    totals = _TransactionTotals()
+    for index, transaction in enumerate(statement.transactions, start=1):
+        totals.add(transaction)
+        output.write(_transaction_lines(transaction, index))
+    count("transactions", totals.count)
+
+    start, end = totals.period(statement)
+    if reserved_at is not None:
+        period = _period_lines(format_ofx_timestamp(start), format_ofx_timestamp(end))
+        if len(period) != len(_period_lines(_PLACEHOLDER_TIMESTAMP, _PLACEHOLDER_TIMESTAMP)):
+            raise ValueError(f"periodo fora do intervalo suportado pelo OFX: {start} a {end}")
+        written_at = output.tell()
+        output.seek(reserved_at)
+        output.write(period)
+        output.seek(written_at)
+    return totals, end
+
+
+@stage("render")
+def write_ofx(statement: StatementData, output: BinaryIO) -> None:
+    generated_at = statement.generated_at or datetime.now()
+    output.write(_signon_lines(generated_at))
+    output.write(
+        _lines(
             "<BANKMSGSRSV1>",
             "<STMTTRNRS>",
             "<TRNUID>1",
-            "<STATUS>",
-            "<CODE>0",
-            "<SEVERITY>INFO",
-            "</STATUS>",
+            *_STATUS_OK,
             "<STMTRS>",
             "<CURDEF>BRL",
             "<BANKACCTFROM>",
@@ -122,9 +189,12 @@ def build_ofx(statement: StatementData) -> str:
             f"<ACCTTYPE>{statement.account_type}",
             "</BANKACCTFROM>",
             "<BANKTRANLIST>",
-            f"<DTSTART>{format_ofx_timestamp(start)}",
-            f"<DTEND>{format_ofx_timestamp(end)}",
-            *transaction_blocks,
+        )
+    )
+    totals, end = _write_transaction_list(output, statement)
+    ledger_balance = totals.last_balance if totals.last_balance is not None else Decimal("0.00")
+    output.write(
+        _lines(
             "</BANKTRANLIST>",
             "<LEDGERBAL>",
             f"<BALAMT>{ledger_balance:.2f}",
@@ -134,88 +204,51 @@ def build_ofx(statement: StatementData) -> str:
             "</STMTTRNRS>",
             "</BANKMSGSRSV1>",
             "</OFX>",
-            "",
-        ]
+        )
     )
 
 
-def build_credit_card_ofx(statement: StatementData, balance_as_of: datetime) -> str:
-    if statement.transactions:
-        start = min(transaction.posted_at for transaction in statement.transactions)
-        end = max(transaction.posted_at for transaction in statement.transactions)
-        ledger_balance = sum((transaction.amount for transaction in statement.transactions), Decimal("0.00"))
-    else:
-        start = statement.start_date or datetime.now()
-        end = statement.end_date or start
-        ledger_balance = Decimal("0.00")
-
-    transaction_blocks = []
-    for index, transaction in enumerate(statement.transactions, start=1):
-        transaction_blocks.append(
-            "\n".join(
-                [
-                    "<STMTTRN>",
-                    f"<TRNTYPE>{transaction_type(transaction.amount)}",
-                    f"<DTPOSTED>{format_ofx_timestamp(transaction.posted_at)}",
-                    f"<TRNAMT>{transaction.amount:.2f}",
-                    f"<FITID>{fit_id(transaction, index)}",
-                    f"<NAME>{transaction.name or transaction.memo}",
-                    f"<MEMO>{transaction.memo}",
-                    "</STMTTRN>",
-                ]
-            )
-        )
-
+@stage("render")
+def write_credit_card_ofx(statement: StatementData, balance_as_of: datetime, output: BinaryIO) -> None:
     generated_at = statement.generated_at or datetime.now()
-
-    return "\n".join(
-        [
-            "OFXHEADER:100",
-            "DATA:OFXSGML",
-            "VERSION:102",
-            "SECURITY:NONE",
-            "ENCODING:USASCII",
-            "CHARSET:1252",
-            "COMPRESSION:NONE",
-            "OLDFILEUID:NONE",
-            "NEWFILEUID:NONE",
-            "",
-            "<OFX>",
-            "<SIGNONMSGSRSV1>",
-            "<SONRS>",
-            "<STATUS>",
-            "<CODE>0",
-            "<SEVERITY>INFO",
-            "</STATUS>",
-            f"<DTSERVER>{format_ofx_timestamp(generated_at)}",
-            "<LANGUAGE>POR",
-            "</SONRS>",
-            "</SIGNONMSGSRSV1>",
+    output.write(_signon_lines(generated_at))
+    output.write(
+        _lines(
             "<CREDITCARDMSGSRSV1>",
             "<CCSTMTTRNRS>",
             "<TRNUID>1",
-            "<STATUS>",
-            "<CODE>0",
-            "<SEVERITY>INFO",
-            "</STATUS>",
+            *_STATUS_OK,
             "<CCSTMTRS>",
             "<CURDEF>BRL",
             "<CCACCTFROM>",
             f"<ACCTID>{statement.account_id}",
             "</CCACCTFROM>",
             "<BANKTRANLIST>",
-            f"<DTSTART>{format_ofx_timestamp(start)}",
-            f"<DTEND>{format_ofx_timestamp(end)}",
-            *transaction_blocks,
+        )
+    )
+    totals, _ = _write_transaction_list(output, statement)
+    output.write(
+        _lines(
             "</BANKTRANLIST>",
             "<LEDGERBAL>",
-            f"<BALAMT>{ledger_balance:.2f}",
+            f"<BALAMT>{totals.amount:.2f}",
             f"<DTASOF>{format_ofx_timestamp(balance_as_of)}",
             "</LEDGERBAL>",
             "</CCSTMTRS>",
             "</CCSTMTTRNRS>",
             "</CREDITCARDMSGSRSV1>",
             "</OFX>",
-            "",
-        ]
+        )
     )
+
+
+def build_ofx(statement: StatementData) -> str:
+    output = io.BytesIO()
+    write_ofx(statement, output)
+    return output.getvalue().decode("utf-8")
+
+
+def build_credit_card_ofx(statement: StatementData, balance_as_of: datetime) -> str:
+    output = io.BytesIO()
+    write_credit_card_ofx(statement, balance_as_of, output)
+    return output.getvalue().decode("utf-8")
@@ -0,0 +1,179 @@
+import functools
+import sys
+from collections import Counter, defaultdict
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from pathlib import Path, PurePath
+from typing import Any, TypeVar
+
+
+PROFILE_SUFFIX = ".prof"
+# Caminhos com menos de um microssegundo nao aparecem no flame graph.
+_MIN_STACK_SECONDS = 1e-6
+
+# Formato do cProfile: funcao -> (chamadas primitivas, chamadas, tempo proprio,
+# tempo acumulado, chamadores); funcao e a tupla (arquivo, linha, nome).
+RawStats = dict[tuple[str, int, str], tuple]
+
+_Main = TypeVar("_Main", bound=Callable[..., Any])
+
+
+def profiling_requested(args) -> bool:
+    return bool(getattr(args, "profile", None) or getattr(args, "profile_collapsed", None))
+
+
+class ProfileCapture:
+    stats: RawStats | None = None
+
+
+@contextmanager
+def profiled(enabled: bool = True) -> Iterator[ProfileCapture]:
+    capture = ProfileCapture()
+    if not enabled:
+        yield capture
+        return
+
+    import cProfile
+
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield capture
+    finally:
+        profiler.disable()
+        profiler.create_stats()
+        # Dicionario simples: atravessa o pool de processos por pickle.
+        capture.stats = profiler.stats
+
+
+class _LoadedStats:
+    # pstats.Stats aceita qualquer objeto com create_stats() e o atributo stats.
+    def __init__(self, stats: RawStats) -> None:
+        self.stats = stats
+
+    def create_stats(self) -> None:
+        pass
+
+
+def _to_pstats(stats: RawStats):
+    import pstats
+
+    return pstats.Stats(_LoadedStats(dict(stats)))
+
+
+def _frame_name(function: tuple[str, int, str]) -> str:
+    filename, line, name = function
+    label = name if filename == "~" else f"{name} ({Path(filename).name}:{line})"
+    return label.replace(";", ",")
+
+
+def collapsed_stacks(stats: RawStats) -> Counter[str]:
+    # O cProfile so guarda pares chamador -> chamado; as pilhas sao reconstruidas
+    # a partir das raizes, dividindo o tempo de cada funcao entre os chamadores
+    # na proporcao do tempo acumulado em cada chamada.
+    children: dict[tuple, list[tuple[tuple, float]]] = defaultdict(list)
+    for function, (*_, callers) in stats.items():
+        for caller, caller_stats in callers.items():
+            children[caller].append((function, caller_stats[3]))
+
+    stacks: Counter[str] = Counter()
+
+    def walk(function: tuple, path: list[tuple], seconds: float) -> None:
+        _, _, own_seconds, cumulative_seconds, _ = stats[function]
+        ratio = seconds / cumulative_seconds if cumulative_seconds > 0 else 0.0
+        microseconds = round(own_seconds * ratio * 1_000_000)
+        if microseconds > 0:
+            stacks[";".join(_frame_name(frame) for frame in path)] += microseconds
+        for child, child_seconds in children[function]:
+            share = child_seconds * ratio
+            # Recursao aparece como uma unica chamada na pilha.
+            if child in path or share < _MIN_STACK_SECONDS:
+                continue
+            walk(child, [*path, child], share)
+
+    for function, (*_, cumulative_seconds, callers) in stats.items():
+        if not callers:
+            walk(function, [function], cumulative_seconds)
+    return stacks
+
+
+def write_collapsed_stacks(stats: RawStats, path: Path) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with path.open("w", encoding="utf-8") as output:
+        for stack, microseconds in sorted(collapsed_stacks(stats).items()):
+            output.write(f"{stack} {microseconds}\n")
+
+
+class ProfileWriter:
+    # Recebe o perfil de cada entrada (vindo dos workers) e grava um .prof por
+    # entrada ou um unico .prof agregado, alem das pilhas colapsadas do total.
+    def __init__(self, path: Path | None, collapsed_path: Path | None = None, per_input: bool = False) -> None:
+        self.path = path
+        self.collapsed_path = collapsed_path
+        self.per_input = per_input and path is not None
+        self._aggregate = None
+
+    def add(self, name: PurePath, stats: RawStats) -> None:
+        profile = _to_pstats(stats)
+        if self.per_input:
+            profile_file = self.path / f"{name}{PROFILE_SUFFIX}"
+            profile_file.parent.mkdir(parents=True, exist_ok=True)
+            profile.dump_stats(profile_file)
+        if self._aggregate is None:
+            self._aggregate = profile
+        else:
+            self._aggregate.add(profile)
+
+    def close(self) -> None:
+        if self._aggregate is None:
+            return
+        if self.path is not None and not self.per_input:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._aggregate.dump_stats(self.path)
+        if self.collapsed_path is not None:
+            write_collapsed_stacks(self._aggregate.stats, self.collapsed_path)
+
+
+def _pop_option(argv: list[str], option: str) -> str | None:
+    value = None
+    index = 1
+    while index < len(argv):
+        argument = argv[index]
+        if argument == option:
+            if index + 1 >= len(argv):
+                print(f"A opcao {option} exige um caminho.", file=sys.stderr)
+                sys.exit(2)
+            value = argv[index + 1]
+            del argv[index : index + 2]
+        elif argument.startswith(f"{option}="):
+            value = argument.partition("=")[2]
+            del argv[index]
+        else:
+            index += 1
+    return value
+
+
+def profile_option(main: _Main) -> _Main:
+    # Scripts convert-* aceitam --profile ARQUIVO.prof e --profile-collapsed
+    # ARQUIVO.txt em qualquer posicao; as opcoes saem de sys.argv antes de main.
+    @functools.wraps(main)
+    def wrapper(*args, **kwargs):
+        profile_path = _pop_option(sys.argv, "--profile")
+        collapsed_path = _pop_option(sys.argv, "--profile-collapsed")
+        if profile_path is None and collapsed_path is None:
+            return main(*args, **kwargs)
+
+        writer = ProfileWriter(
+            Path(profile_path) if profile_path else None,
+            Path(collapsed_path) if collapsed_path else None,
+        )
+        capture = ProfileCapture()
+        try:
+            with profiled() as capture:
+                return main(*args, **kwargs)
+        finally:
+            if capture.stats is not None:
+                writer.add(PurePath(Path(sys.argv[0]).name), capture.stats)
+                writer.close()
+
+    return wrapper
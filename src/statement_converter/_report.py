@@ -0,0 +1,233 @@
+import argparse
+import json
+import math
+import sys
+import time
+from collections import defaultdict
+from collections.abc import Sequence
+from pathlib import Path
+from typing import TextIO
+
+from statement_converter._batch import ConversionResult
+
+
+def percentile(values: list[float], fraction: float) -> float | None:
+    # Nearest-rank: sempre devolve uma latencia que realmente ocorreu.
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(fraction * len(ordered)) - 1)]
+
+
+def _seconds(value: float | None) -> float | None:
+    return None if value is None else round(value, 6)
+
+
+def _largest(current: int | None, value: int | None) -> int | None:
+    if value is None:
+        return current
+    return value if current is None else max(current, value)
+
+
+def _rate(amount: float, elapsed: float) -> float | None:
+    return round(amount / elapsed, 3) if elapsed > 0 else None
+
+
+class RunReport:
+    # Relatorio JSONL de uma execucao: uma linha "file" por entrada, na ordem em
+    # que os resultados chegam, e uma linha "summary" ao final. Sem path so os
+    # totais sao acumulados.
+    def __init__(self, path: Path | None, shard: object | None = None) -> None:
+        self.path = path
+        self.shard = shard
+        self._file: TextIO | None = None
+        self._started = 0.0
+        self._latencies: list[float] = []
+        self._model_latencies: dict[str | None, list[float]] = defaultdict(list)
+        self._statuses: dict[str, int] = defaultdict(int)
+        self._model_failures: dict[str | None, int] = defaultdict(int)
+        self._input_bytes = 0
+        self._output_bytes = 0
+        self._stages: dict[str, float] = defaultdict(float)
+        self._counters: dict[str, int] = defaultdict(int)
+        self._peak_rss_bytes: int | None = None
+        self._peak_traced_bytes: int | None = None
+
+    def __enter__(self) -> "RunReport":
+        if self.path is not None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._file = self.path.open("w", encoding="utf-8")
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        try:
+            self._write(self.summary())
+        finally:
+            if self._file is not None:
+                self._file.close()
+
+    def _write(self, record: dict[str, object]) -> None:
+        if self._file is not None:
+            self._file.write(json.dumps(record, ensure_ascii=False) + "\n")
+            self._file.flush()
+
+    def add_result(self, result: ConversionResult) -> None:
+        record: dict[str, object] = {
+            "type": "file",
+            "input": str(result.input_file),
+            "output": str(result.output_file),
+            "model": result.model,
+            "status": "ok" if result.succeeded else "error",
+        }
+        metrics = result.metrics
+        if metrics is not None:
+            record.update(
+                input_bytes=metrics.input_bytes,
+                output_bytes=metrics.output_bytes,
+                pages=metrics.counters.get("pages"),
+                transactions=metrics.counters.get("transactions"),
+                wall_seconds=_seconds(metrics.wall_seconds),
+                cpu_seconds=_seconds(metrics.cpu_seconds),
+                peak_rss_bytes=metrics.peak_rss_bytes,
+                peak_traced_bytes=metrics.peak_traced_bytes,
+                stages={name: _seconds(seconds) for name, seconds in metrics.stages.items()},
+                counters=metrics.counters,
+            )
+        if not result.succeeded:
+            record.update(error_class=result.error_type, error=result.error)
+        self.add_record(record)
+
+    def add_ignored(self, input_file: Path, status: str) -> None:
+        # Entradas que nao chegaram a ser convertidas: "skipped" (incremental) ou "unrecognized".
+        self.add_record({"type": "file", "input": str(input_file), "model": None, "status": status})
+
+    def add_record(self, record: dict[str, object]) -> None:
+        # Os totais saem das proprias linhas gravadas, entao merge-reports chega
+        # ao mesmo resumo que uma execucao unica com todas as entradas.
+        status = record["status"]
+        model = record.get("model")
+        self._statuses[status] += 1
+        if record.get("wall_seconds") is not None:
+            self._latencies.append(record["wall_seconds"])
+            self._model_latencies[model].append(record["wall_seconds"])
+            self._input_bytes += record.get("input_bytes") or 0
+            self._output_bytes += record.get("output_bytes") or 0
+            self._peak_rss_bytes = _largest(self._peak_rss_bytes, record.get("peak_rss_bytes"))
+            self._peak_traced_bytes = _largest(self._peak_traced_bytes, record.get("peak_traced_bytes"))
+            for name, seconds in (record.get("stages") or {}).items():
+                self._stages[name] += seconds
+            for name, value in (record.get("counters") or {}).items():
+                self._counters[name] += value
+        if status == "error":
+            self._model_failures[model] += 1
+        self._write(record)
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self._started
+
+    def summary(self) -> dict[str, object]:
+        elapsed = self.elapsed()
+        converted = self._statuses["ok"] + self._statuses["error"]
+        models = {
+            str(model): {
+                "files": len(latencies),
+                "failed": self._model_failures[model],
+                "wall_seconds": _seconds(sum(latencies)),
+                "latency_p50_seconds": _seconds(percentile(latencies, 0.5)),
+                "latency_p95_seconds": _seconds(percentile(latencies, 0.95)),
+            }
+            for model, latencies in sorted(self._model_latencies.items(), key=lambda item: str(item[0]))
+        }
+        summary: dict[str, object] = {"type": "summary"}
+        if self.shard is not None:
+            summary["shard"] = str(self.shard)
+        summary.update(
+            files=sum(self._statuses.values()),
+            succeeded=self._statuses["ok"],
+            failed=self._statuses["error"],
+            skipped=self._statuses["skipped"],
+            unrecognized=self._statuses["unrecognized"],
+            input_bytes=self._input_bytes,
+            output_bytes=self._output_bytes,
+            wall_seconds=_seconds(elapsed),
+            latency_p50_seconds=_seconds(percentile(self._latencies, 0.5)),
+            latency_p95_seconds=_seconds(percentile(self._latencies, 0.95)),
+            throughput_files_per_second=_rate(converted, elapsed),
+            throughput_bytes_per_second=_rate(self._input_bytes, elapsed),
+            peak_rss_bytes=self._peak_rss_bytes,
+            peak_traced_bytes=self._peak_traced_bytes,
+            stages={name: _seconds(seconds) for name, seconds in sorted(self._stages.items())},
+            counters=dict(sorted(self._counters.items())),
+            models=models,
+        )
+        return summary
+
+
+class MergedReport(RunReport):
+    # Junta os relatorios das particoes (--shard) de um lote. As particoes rodam
+    # em paralelo, entao o tempo de parede do lote e o da particao mais lenta.
+    def __init__(self, path: Path | None) -> None:
+        super().__init__(path)
+        self.reports = 0
+        self.shards: list[str] = []
+        self._wall_seconds = 0.0
+
+    def add_report(self, report_path: Path) -> None:
+        with report_path.open(encoding="utf-8") as report_file:
+            for line_number, line in enumerate(report_file, start=1):
+                try:
+                    record = json.loads(line)
+                except ValueError as exc:
+                    raise ValueError(f"{report_path}:{line_number}: linha invalida ({exc})") from None
+                if record.get("type") == "file":
+                    self.add_record(record)
+                elif record.get("type") == "summary":
+                    self._wall_seconds = max(self._wall_seconds, record.get("wall_seconds") or 0.0)
+                    if record.get("shard"):
+                        self.shards.append(record["shard"])
+        self.reports += 1
+
+    def elapsed(self) -> float:
+        return self._wall_seconds
+
+    def summary(self) -> dict[str, object]:
+        summary = super().summary()
+        summary.update(reports=self.reports, shards=sorted(self.shards))
+        return summary
+
+
+def build_argument_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="statement-converter merge-reports",
+        description="Junta os relatorios --report das particoes (--shard) de um lote em um resumo unico.",
+    )
+    parser.add_argument("reports", type=Path, nargs="+", metavar="RELATORIO.jsonl")
+    parser.add_argument(
+        "--output",
+        "-o",
+        type=Path,
+        metavar="ARQUIVO.jsonl",
+        help="Grava tambem um relatorio combinado, com as linhas de todas as particoes e o resumo final.",
+    )
+    return parser
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    parser = build_argument_parser()
+    args = parser.parse_args(argv)
+    missing = [str(path) for path in args.reports if not path.is_file()]
+    if missing:
+        parser.error(f"relatorio nao encontrado: {', '.join(missing)}")
+
+    merged = MergedReport(args.output)
+    try:
+        with merged:
+            for report_path in args.reports:
+                merged.add_report(report_path)
+    except (OSError, ValueError) as exc:
+        print(f"Erro ao juntar os relatorios: {exc}", file=sys.stderr)
+        return 1
+
+    print(json.dumps(merged.summary(), ensure_ascii=False, indent=2))
+    return 0
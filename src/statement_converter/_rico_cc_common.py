@@ -1,9 +1,15 @@
+import io
+import zipfile
 from dataclasses import dataclass
 from datetime import date, datetime
 from decimal import Decimal
-from pathlib import Path
+from typing import TYPE_CHECKING
 
-import pandas as pd
+from statement_converter._metrics import count, stage
+from statement_converter._source import StatementSource, is_path_source, read_source_bytes
+
+if TYPE_CHECKING:
+    import pandas as pd
 
 
 EXPECTED_COLUMNS = ["Movimentação", "Liquidação", "Lançamento", "Valor", "Saldo"]
@@ -25,7 +31,16 @@ class RicoStatementData:
     rows: list[RicoStatementRow]
 
 
-def _find_header_position(df_raw: pd.DataFrame) -> tuple[int, int]:
+def is_rico_workbook(data: bytes) -> bool:
+    try:
+        with zipfile.ZipFile(io.BytesIO(data)) as workbook:
+            shared_strings = workbook.read("xl/sharedStrings.xml").decode("utf-8", errors="replace")
+    except (zipfile.BadZipFile, KeyError):
+        return False
+    return "Conta Rico:" in shared_strings and "Movimentação" in shared_strings
+
+
+def _find_header_position(df_raw: "pd.DataFrame") -> tuple[int, int]:
     for row_index, row in df_raw.iterrows():
         for col_index, cell in enumerate(row):
             if str(cell).strip().lower().startswith("movimenta"):
@@ -33,11 +48,26 @@ def _find_header_position(df_raw: pd.DataFrame) -> tuple[int, int]:
     raise ValueError("Header row with 'Movimentação' not found in the spreadsheet.")
 
 
-def _normalize_dataframe(input_path: str | Path) -> pd.DataFrame:
-    df_raw = pd.read_excel(input_path, header=None)
+def _excel_input(source: StatementSource) -> str | bytes:
+    # A planilha e lida mais de uma vez; buffers viram bytes para que cada leitura use seu proprio BytesIO.
+    return str(source) if is_path_source(source) else read_source_bytes(source)
+
+
+def _read_excel(excel_input: str | bytes, **kwargs) -> "pd.DataFrame":
+    # pandas (e numpy) custam mais que todo o resto do pacote para importar; so
+    # os modelos Rico xlsx pagam por isso, na primeira planilha lida.
+    import pandas as pd
+
+    return pd.read_excel(io.BytesIO(excel_input) if isinstance(excel_input, bytes) else excel_input, **kwargs)
+
+
+def _normalize_dataframe(excel_input: str | bytes) -> "pd.DataFrame":
+    import pandas as pd
+
+    df_raw = _read_excel(excel_input, header=None)
     header_row_idx, header_col_idx = _find_header_position(df_raw)
 
-    df = pd.read_excel(input_path, header=header_row_idx)
+    df = _read_excel(excel_input, header=header_row_idx)
     df = df.iloc[:, header_col_idx:]
 
     normalized_cols = {}
@@ -70,7 +100,7 @@ def _normalize_dataframe(input_path: str | Path) -> pd.DataFrame:
     return df
 
 
-def _extract_account_id(df_raw: pd.DataFrame) -> str | None:
+def _extract_account_id(df_raw: "pd.DataFrame") -> str | None:
     for row in df_raw.itertuples(index=False):
         for cell in row:
             text = str(cell).strip()
@@ -79,7 +109,7 @@ def _extract_account_id(df_raw: pd.DataFrame) -> str | None:
     return None
 
 
-def _extract_generated_at(df_raw: pd.DataFrame) -> datetime | None:
+def _extract_generated_at(df_raw: "pd.DataFrame") -> datetime | None:
     for row in df_raw.itertuples(index=False):
         for cell in row:
             text = str(cell).strip()
@@ -89,9 +119,14 @@ def _extract_generated_at(df_raw: pd.DataFrame) -> datetime | None:
     return None
 
 
-def parse_statement(input_path: str | Path) -> RicoStatementData:
-    df_raw = pd.read_excel(input_path, header=None)
-    df = _normalize_dataframe(input_path)
+@stage("parse")
+def parse_statement(source: StatementSource) -> RicoStatementData:
+    import pandas as pd
+
+    excel_input = _excel_input(source)
+    df_raw = _read_excel(excel_input, header=None)
+    df = _normalize_dataframe(excel_input)
+    count("rows", len(df))
 
     def normalize_date(value):
         return None if pd.isna(value) else value
@@ -115,8 +150,12 @@ def parse_statement(input_path: str | Path) -> RicoStatementData:
     )
 
 
-def parse_input_dataframe(input_path: str | Path) -> pd.DataFrame:
-    df = _normalize_dataframe(input_path).copy()
+@stage("parse")
+def parse_input_dataframe(source: StatementSource) -> "pd.DataFrame":
+    import pandas as pd
+
+    df = _normalize_dataframe(_excel_input(source)).copy()
+    count("rows", len(df))
 
     for column in ("Valor", "Saldo"):
         if column in df.columns:
@@ -0,0 +1,143 @@
+import signal
+from collections.abc import Iterable, Iterator, Sequence
+from dataclasses import dataclass
+from pathlib import PurePath
+from typing import TypeVar
+
+from statement_converter._batch import WorkerFailure, supervise
+from statement_converter._sniff import detect_converter
+from statement_converter._source import StatementSource
+from statement_converter.converter_registry import ConverterRegistry, ConverterSpec
+
+
+@dataclass(frozen=True)
+class FileRoute:
+    pattern: str
+    converter: ConverterSpec
+
+
+def parse_routes(values: Iterable[str], converter_registry: ConverterRegistry) -> list[FileRoute]:
+    routes: list[FileRoute] = []
+    for value in values:
+        pattern, separator, model = value.rpartition("=")
+        if not separator or not pattern.strip() or not model.strip():
+            raise ValueError(f"rota invalida: {value}; use PADRAO=MODELO, por exemplo '*.csv=c6-credit-csv'")
+        converter = converter_registry.find_by_model(model)
+        if converter is None:
+            raise ValueError(f"nenhum conversor foi encontrado para o modelo {model} da rota {value}")
+        routes.append(FileRoute(pattern.strip(), converter))
+    return routes
+
+
+class ConverterRouter:
+    # Escolhe o conversor de cada arquivo de um lote: primeiro as rotas por padrao
+    # de nome, depois o modelo gravado no manifesto, a identificacao pelo conteudo
+    # (--model auto) e, por fim, o modelo padrao para arquivos com a sua extensao.
+    def __init__(
+        self,
+        default: ConverterSpec | None = None,
+        routes: Sequence[FileRoute] = (),
+        detection_registry: ConverterRegistry | None = None,
+    ) -> None:
+        self.default = default
+        self.routes = tuple(routes)
+        self.detection_registry = detection_registry
+
+    @property
+    def single_converter(self) -> ConverterSpec | None:
+        if self.routes or self.detection_registry is not None:
+            return None
+        return self.default
+
+    def converters(self) -> list[ConverterSpec]:
+        converters = [route.converter for route in self.routes]
+        if self.default is not None:
+            converters.append(self.default)
+        return list(dict.fromkeys(converters))
+
+    def route(
+        self,
+        source: StatementSource,
+        relative_path: PurePath,
+        known_model: str | None = None,
+        deep: bool = True,
+    ) -> ConverterSpec | None:
+        for route in self.routes:
+            if relative_path.match(route.pattern):
+                return route.converter
+
+        if self.detection_registry is not None:
+            if known_model is not None:
+                converter = self.detection_registry.find_by_model(known_model)
+                if converter is not None:
+                    return converter
+            return detect_converter(source, self.detection_registry, relative_path.name, deep)
+
+        if self.default is None:
+            return None
+        if self.single_converter is not None or relative_path.suffix.casefold() == f".{self.default.input_format}":
+            return self.default
+        return None
+
+
+_Payload = TypeVar("_Payload")
+
+_worker_router: ConverterRouter | None = None
+
+
+def _init_router_worker(router: ConverterRouter) -> None:
+    global _worker_router
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    _worker_router = router
+
+
+def _route_in_worker(source: StatementSource, relative_path: PurePath) -> tuple[str | None, str | None]:
+    assert _worker_router is not None
+    try:
+        converter = _worker_router.route(source, relative_path)
+    except (OSError, ValueError) as exc:
+        return None, str(exc)
+    return (None if converter is None else converter.model), None
+
+
+@dataclass(frozen=True)
+class DeepRouting:
+    converter: ConverterSpec | None
+    reason: str | None = None
+    failure: WorkerFailure | None = None
+
+
+def route_in_workers(
+    router: ConverterRouter,
+    items: Iterable[tuple[tuple[StatementSource, PurePath] | None, _Payload]],
+    jobs: int,
+    timeout: float | None = None,
+    context=None,
+) -> Iterator[tuple[_Payload, DeepRouting | None]]:
+    # A segunda passada (leitura completa, pypdf, xlsx) dos arquivos que o inicio
+    # nao identificou roda em workers supervisionados, a medida que a listagem
+    # avanca; so o nome do modelo volta por pickle. Itens sem fonte (None) ja
+    # foram roteados e so atravessam, na mesma ordem. Uma falha ou --timeout
+    # durante a identificacao fica restrita ao arquivo.
+    supervised = supervise(
+        items,
+        jobs,
+        _init_router_worker,
+        (router,),
+        _route_in_worker,
+        timeout,
+        context,
+        "identificacao do modelo",
+    )
+    for payload, response, failure in supervised:
+        if failure is not None:
+            yield payload, DeepRouting(None, failure=failure)
+            continue
+        if response is None:
+            yield payload, None
+            continue
+        model, reason = response
+        converter = None
+        if model is not None and router.detection_registry is not None:
+            converter = router.detection_registry.find_by_model(model)
+        yield payload, DeepRouting(converter, reason)
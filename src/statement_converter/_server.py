@@ -0,0 +1,403 @@
+import argparse
+import json
+import threading
+import time
+from collections import Counter
+from collections.abc import Sequence
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, urlsplit
+
+from statement_converter._batch import default_jobs, worker_context
+from statement_converter._cache import parse_size
+from statement_converter._metrics import ConversionMetrics
+from statement_converter._sniff import is_auto_model
+from statement_converter.api import convert_in_memory_worker, create_memory_worker_pool
+from statement_converter.converter_registry import ConverterRegistry, ConverterSpec, normalize_token, registry
+from statement_converter.statement_converter import _ensure_builtin_converters_loaded, _format_suffix
+
+
+DEFAULT_MAX_UPLOAD_SIZE = 64 * 1024 * 1024
+READ_CHUNK_SIZE = 64 * 1024
+CONTENT_TYPES = {
+    "ofx": "application/x-ofx",
+    "csv": "text/csv; charset=utf-8",
+}
+
+
+class UploadTooLarge(Exception):
+    pass
+
+
+class WorkerPoolUnavailable(Exception):
+    pass
+
+
+class ServiceMetrics:
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.started_at = time.monotonic()
+        self.requests = 0
+        self.responses: Counter[int] = Counter()
+        self.in_flight = 0
+        self.rejected = 0
+        self.succeeded = 0
+        self.failed = 0
+        self.latency_total = 0.0
+        self.latency_max = 0.0
+        self.pool_restarts = 0
+        # Soma das etapas e contadores medidos pelos conversores nos workers.
+        self.stage_seconds: Counter[str] = Counter()
+        self.counters: Counter[str] = Counter()
+
+    def slot_acquired(self) -> None:
+        with self._lock:
+            self.in_flight += 1
+
+    def slot_released(self) -> None:
+        with self._lock:
+            self.in_flight -= 1
+
+    def request_rejected(self) -> None:
+        with self._lock:
+            self.rejected += 1
+
+    def request_started(self) -> None:
+        with self._lock:
+            self.requests += 1
+
+    def response_sent(self, status: int) -> None:
+        with self._lock:
+            self.responses[status] += 1
+
+    def pool_restarted(self) -> None:
+        with self._lock:
+            self.pool_restarts += 1
+
+    def conversion_finished(self, succeeded: bool, elapsed: float, metrics: ConversionMetrics | None = None) -> None:
+        with self._lock:
+            if succeeded:
+                self.succeeded += 1
+            else:
+                self.failed += 1
+            self.latency_total += elapsed
+            self.latency_max = max(self.latency_max, elapsed)
+            if metrics is not None:
+                self.stage_seconds.update(metrics.stages)
+                self.counters.update(metrics.counters)
+
+    def snapshot(self, capacity: int) -> dict:
+        with self._lock:
+            conversions = self.succeeded + self.failed
+            return {
+                "uptime_seconds": round(time.monotonic() - self.started_at, 3),
+                "requests": self.requests,
+                "responses": {str(status): count for status, count in sorted(self.responses.items())},
+                "in_flight": self.in_flight,
+                "capacity": capacity,
+                "rejected": self.rejected,
+                "pool_restarts": self.pool_restarts,
+                "conversions": {"succeeded": self.succeeded, "failed": self.failed},
+                "latency_ms": {
+                    "avg": round(self.latency_total / conversions * 1000, 3) if conversions else 0.0,
+                    "max": round(self.latency_max * 1000, 3),
+                },
+                "stages_ms": {name: round(seconds * 1000, 3) for name, seconds in sorted(self.stage_seconds.items())},
+                "counters": dict(sorted(self.counters.items())),
+            }
+
+
+class ConversionService:
+    def __init__(
+        self,
+        converter_registry: ConverterRegistry,
+        workers: int,
+        queue_size: int,
+        max_upload_size: int = DEFAULT_MAX_UPLOAD_SIZE,
+    ) -> None:
+        self.registry = converter_registry
+        self.workers = workers
+        self.capacity = workers + queue_size
+        self.max_upload_size = max_upload_size
+        self.metrics = ServiceMetrics()
+        # O semaforo limita conversoes em andamento + na fila; acima disso a
+        # requisicao e recusada com 503 em vez de acumular uploads em memoria.
+        self._slots = threading.BoundedSemaphore(self.capacity)
+        self._pool_lock = threading.Lock()
+        self._executor = self._create_pool()
+
+    def _create_pool(self) -> ProcessPoolExecutor:
+        # Os workers sao criados sob demanda a partir das threads do ThreadingHTTPServer;
+        # um fork ao lado das demais requisicoes poderia herdar um lock preso.
+        return create_memory_worker_pool(self.registry, self.workers, worker_context(threaded=True))
+
+    def try_acquire(self) -> bool:
+        if not self._slots.acquire(blocking=False):
+            self.metrics.request_rejected()
+            return False
+        self.metrics.slot_acquired()
+        return True
+
+    def release(self) -> None:
+        self.metrics.slot_released()
+        self._slots.release()
+
+    def convert(self, model: str, data: bytes, options: dict[str, str]) -> tuple[bytes | None, str | None, str]:
+        # Com auto a deteccao (inclusive a leitura completa do PDF) roda no worker,
+        # que devolve o modelo identificado junto com a saida.
+        started = time.perf_counter()
+        executor = self._executor
+        try:
+            output, error, metrics, model = executor.submit(convert_in_memory_worker, model, data, options).result()
+        except BrokenProcessPool:
+            self.metrics.conversion_finished(False, time.perf_counter() - started)
+            self._replace_pool(executor)
+            raise WorkerPoolUnavailable from None
+        self.metrics.conversion_finished(error is None, time.perf_counter() - started, metrics)
+        return output, error, model
+
+    def _replace_pool(self, broken: ProcessPoolExecutor) -> None:
+        # Um worker que morre (falha do conversor, OOM killer) quebra o pool
+        # inteiro; as requisicoes seguintes passam a usar um pool novo.
+        with self._pool_lock:
+            if self._executor is not broken:
+                return
+            self._executor = self._create_pool()
+            self.metrics.pool_restarted()
+        broken.shutdown(wait=False, cancel_futures=True)
+
+    def shutdown(self) -> None:
+        with self._pool_lock:
+            executor = self._executor
+        executor.shutdown(wait=True, cancel_futures=True)
+
+
+class ConversionRequestHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server_version = "statement-converter"
+
+    @property
+    def service(self) -> ConversionService:
+        return self.server.service
+
+    def _send_json(self, status: HTTPStatus, payload: dict, headers: dict[str, str] | None = None) -> None:
+        self._send_body(status, json.dumps(payload, ensure_ascii=False).encode(), "application/json", headers)
+
+    def _send_body(
+        self,
+        status: HTTPStatus,
+        body: bytes,
+        content_type: str,
+        headers: dict[str, str] | None = None,
+    ) -> None:
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+        self.service.metrics.response_sent(status)
+
+    def _read_chunked_body(self) -> bytes:
+        body = bytearray()
+        while True:
+            size = int(self.rfile.readline(1024).split(b";", 1)[0].strip() or b"0", 16)
+            if size == 0:
+                while self.rfile.readline(1024) not in (b"\r\n", b"\n", b""):
+                    pass
+                return bytes(body)
+            if len(body) + size > self.service.max_upload_size:
+                raise UploadTooLarge
+            remaining = size
+            while remaining:
+                chunk = self.rfile.read(min(READ_CHUNK_SIZE, remaining))
+                if not chunk:
+                    raise ConnectionError("upload interrompido")
+                body += chunk
+                remaining -= len(chunk)
+            self.rfile.readline(1024)
+
+    def _read_body(self) -> bytes:
+        if "chunked" in self.headers.get("Transfer-Encoding", "").casefold():
+            return self._read_chunked_body()
+
+        length = int(self.headers.get("Content-Length") or 0)
+        if length > self.service.max_upload_size:
+            raise UploadTooLarge
+        body = bytearray()
+        while len(body) < length:
+            chunk = self.rfile.read(min(READ_CHUNK_SIZE, length - len(body)))
+            if not chunk:
+                raise ConnectionError("upload interrompido")
+            body += chunk
+        return bytes(body)
+
+    def do_GET(self) -> None:
+        self.service.metrics.request_started()
+        path = urlsplit(self.path).path.rstrip("/")
+        if path == "/health":
+            self._send_json(HTTPStatus.OK, {"status": "ok"})
+        elif path == "/metrics":
+            self._send_json(HTTPStatus.OK, self.service.metrics.snapshot(self.service.capacity))
+        elif path == "/models":
+            self._send_json(
+                HTTPStatus.OK,
+                {
+                    "models": [
+                        {
+                            "model": spec.model,
+                            "aliases": list(spec.aliases),
+                            "input_format": spec.input_format,
+                            "output_format": spec.output_format,
+                            "required_options": list(spec.required_options),
+                        }
+                        for spec in self.service.registry.all()
+                    ]
+                },
+            )
+        else:
+            self._send_json(HTTPStatus.NOT_FOUND, {"error": "rota desconhecida"})
+
+    def _check_options(self, converter: ConverterSpec, options: dict[str, str]) -> bool:
+        missing_options = [option for option in converter.required_options if not options.get(option)]
+        if missing_options:
+            self._send_json(
+                HTTPStatus.BAD_REQUEST,
+                {"error": f"o conversor selecionado exige opcoes extras: {', '.join(missing_options)}"},
+            )
+            return False
+        return True
+
+    def do_POST(self) -> None:
+        self.service.metrics.request_started()
+        url = urlsplit(self.path)
+        prefix, _, model = url.path.strip("/").partition("/")
+        if prefix != "convert" or not model:
+            self._send_json(HTTPStatus.NOT_FOUND, {"error": "use POST /convert/<modelo>"})
+            return
+
+        # Com /convert/auto o conversor so e conhecido depois de ler o corpo.
+        converter = None if is_auto_model(model) else self.service.registry.find_by_model(model)
+        if converter is None and not is_auto_model(model):
+            self._send_json(HTTPStatus.NOT_FOUND, {"error": f"nenhum conversor foi encontrado para o modelo {model}"})
+            return
+
+        options = {normalize_token(key).replace("-", "_"): value for key, value in parse_qsl(url.query)}
+        if converter is not None and not self._check_options(converter, options):
+            return
+
+        if not self.service.try_acquire():
+            self.close_connection = True
+            self._send_json(
+                HTTPStatus.SERVICE_UNAVAILABLE,
+                {"error": "fila de conversao cheia, tente novamente"},
+                {"Retry-After": "1", "Connection": "close"},
+            )
+            return
+
+        try:
+            try:
+                data = self._read_body()
+            except UploadTooLarge:
+                self.close_connection = True
+                self._send_json(
+                    HTTPStatus.REQUEST_ENTITY_TOO_LARGE,
+                    {"error": f"o arquivo excede o limite de {self.service.max_upload_size} bytes"},
+                    {"Connection": "close"},
+                )
+                return
+            except ValueError:
+                self.close_connection = True
+                self._send_json(HTTPStatus.BAD_REQUEST, {"error": "corpo da requisicao invalido"}, {"Connection": "close"})
+                return
+
+            requested_model = model if converter is None else converter.model
+            try:
+                output, error, detected_model = self.service.convert(requested_model, data, options)
+            except WorkerPoolUnavailable:
+                self._send_json(
+                    HTTPStatus.SERVICE_UNAVAILABLE,
+                    {"error": "o processo de conversao terminou inesperadamente, tente novamente"},
+                    {"Retry-After": "1"},
+                )
+                return
+        finally:
+            self.service.release()
+
+        if converter is None:
+            converter = self.service.registry.find_by_model(detected_model)
+        if error is not None:
+            if converter is not None and not self._check_options(converter, options):
+                return
+            self._send_json(HTTPStatus.UNPROCESSABLE_ENTITY, {"error": error})
+            return
+
+        self._send_body(
+            HTTPStatus.OK,
+            output,
+            CONTENT_TYPES.get(converter.output_format, "application/octet-stream"),
+            {"Content-Disposition": f'attachment; filename="{converter.model}{_format_suffix(converter.output_format)}"'},
+        )
+
+
+class ConversionHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address: tuple[str, int], service: ConversionService) -> None:
+        self.service = service
+        super().__init__(address, ConversionRequestHandler)
+
+
+def build_argument_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="statement-converter serve",
+        description=(
+            "Servico HTTP local de conversao. Envie o arquivo no corpo de POST /convert/<modelo> "
+            "(opcoes como due-date vao na query string); GET /health, /metrics e /models para monitoramento."
+        ),
+    )
+    parser.add_argument("--host", default="127.0.0.1", help="Endereco de escuta. Padrao: 127.0.0.1.")
+    parser.add_argument("--port", type=int, default=8080, help="Porta de escuta. Padrao: 8080.")
+    parser.add_argument("--workers", type=int, default=None, help="Processos de conversao. Padrao: quantidade de CPUs.")
+    parser.add_argument(
+        "--queue-size",
+        type=int,
+        default=None,
+        help="Requisicoes aguardando um worker antes de responder 503. Padrao: 2x o numero de workers.",
+    )
+    parser.add_argument(
+        "--max-upload-size",
+        default="64M",
+        help="Tamanho maximo do arquivo enviado, por exemplo 10M. Padrao: 64M.",
+    )
+    return parser
+
+
+def main(argv: Sequence[str] | None = None, converter_registry: ConverterRegistry = registry) -> int:
+    parser = build_argument_parser()
+    args = parser.parse_args(argv)
+    workers = args.workers or default_jobs()
+    queue_size = args.queue_size if args.queue_size is not None else workers * 2
+    if workers < 1 or queue_size < 0:
+        parser.error("--workers deve ser maior ou igual a 1 e --queue-size nao pode ser negativo")
+    try:
+        max_upload_size = parse_size(args.max_upload_size)
+    except ValueError as exc:
+        parser.error(str(exc))
+
+    _ensure_builtin_converters_loaded(converter_registry)
+    service = ConversionService(converter_registry, workers, queue_size, max_upload_size)
+    server = ConversionHTTPServer((args.host, args.port), service)
+    host, port = server.server_address[:2]
+    print(f"Servico de conversao em http://{host}:{port} ({workers} worker(s), fila {queue_size}).", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("Servico encerrado.")
+    finally:
+        server.server_close()
+        service.shutdown()
+    return 0
@@ -0,0 +1,35 @@
+import hashlib
+from dataclasses import dataclass
+from pathlib import PurePath
+
+
+@dataclass(frozen=True)
+class Shard:
+    index: int
+    count: int
+
+    def __str__(self) -> str:
+        return f"{self.index}/{self.count}"
+
+    def file_name(self, name: str) -> str:
+        # Diario e manifesto ganham um nome por no, ja que os nos gravam no mesmo diretorio.
+        path = PurePath(name)
+        return f"{path.stem}.shard-{self.index}-of-{self.count}{path.suffix}"
+
+    def contains(self, relative_path: PurePath) -> bool:
+        # O hash do caminho relativo nao depende da ordem da varredura, da maquina
+        # nem de PYTHONHASHSEED: cada no chega sozinho a mesma particao.
+        digest = hashlib.sha256(relative_path.as_posix().encode("utf-8")).digest()
+        return int.from_bytes(digest[:8], "big") % self.count == self.index - 1
+
+
+def parse_shard(value: str) -> Shard:
+    index_text, separator, count_text = value.partition("/")
+    try:
+        index = int(index_text)
+        count = int(count_text)
+    except ValueError:
+        index = count = 0
+    if not separator or count < 1 or not 1 <= index <= count:
+        raise ValueError(f"particao invalida: {value}; use I/N com 1 <= I <= N, por exemplo 2/4")
+    return Shard(index, count)
@@ -0,0 +1,152 @@
+import io
+import re
+import zlib
+from collections.abc import Callable
+from functools import cached_property
+from pathlib import Path
+
+from statement_converter._source import StatementSource, is_path_source, read_source_bytes
+from statement_converter.converter_registry import ConverterRegistry, ConverterSpec, normalize_token
+
+
+AUTO_MODEL = "auto"
+SNIFF_SIZE = 256 * 1024
+PDF_STREAM_PATTERN = re.compile(rb"stream\r?\n(.*?)\r?\nendstream", re.S)
+
+
+class DeepSniffRequired(Exception):
+    # A primeira passada nao reconheceu o arquivo e a leitura completa foi adiada.
+    pass
+
+
+def is_auto_model(model: str | None) -> bool:
+    return model is not None and normalize_token(model) == AUTO_MODEL
+
+
+class ContentSample:
+    # Amostra usada pelas assinaturas dos conversores. Na primeira passada so o
+    # inicio do arquivo esta disponivel; a leitura completa (xlsx, pypdf) fica
+    # para uma segunda passada, quando nenhuma assinatura barata reconheceu o arquivo.
+    def __init__(self, head: bytes, load_all: Callable[[], bytes], name: str = "") -> None:
+        self.head = head
+        self.name = name
+        self.deep = False
+        self._load_all = load_all
+
+    @classmethod
+    def from_source(cls, source: StatementSource, name: str = "") -> "ContentSample":
+        if is_path_source(source):
+            path = Path(source)
+            with path.open("rb") as file:
+                head = file.read(SNIFF_SIZE)
+            return cls(head, path.read_bytes, name or path.name)
+        data = read_source_bytes(source)
+        return cls(data[:SNIFF_SIZE], lambda: data, name)
+
+    @property
+    def is_pdf(self) -> bool:
+        return b"%PDF-" in self.head[:1024]
+
+    @property
+    def is_zip(self) -> bool:
+        return self.head.startswith(b"PK\x03\x04")
+
+    @cached_property
+    def text(self) -> str:
+        return self.head.decode("utf-8-sig", errors="replace")
+
+    @property
+    def first_line(self) -> str:
+        return self.text.lstrip().split("\n", 1)[0].strip()
+
+    @cached_property
+    def _data(self) -> bytes:
+        return self._load_all()
+
+    def data(self) -> bytes | None:
+        return self._data if self.deep else None
+
+    @property
+    def content(self) -> bytes:
+        return self._data if self.deep else self.head
+
+    @cached_property
+    def _head_streams(self) -> list[bytes]:
+        return _decompress_streams(self.head)
+
+    @cached_property
+    def _all_streams(self) -> list[bytes]:
+        return _decompress_streams(self._data)
+
+    def pdf_streams(self) -> list[bytes]:
+        # Os streams sao descomprimidos uma vez por passada e compartilhados por
+        # todas as assinaturas de PDF, que so procuram seus marcadores no conteudo.
+        if not self.is_pdf:
+            return []
+        return self._all_streams if self.deep else self._head_streams
+
+    @cached_property
+    def _first_page_text(self) -> str:
+        from pypdf import PdfReader
+
+        reader = PdfReader(io.BytesIO(self._data))
+        if reader.is_encrypted:
+            reader.decrypt("")
+        if not reader.pages:
+            return ""
+        return reader.pages[0].extract_text() or ""
+
+    def pdf_first_page_text(self) -> str | None:
+        if not self.deep or not self.is_pdf:
+            return None
+        return self._first_page_text
+
+
+def _decompress_streams(data: bytes) -> list[bytes]:
+    streams: list[bytes] = []
+    for stream_match in PDF_STREAM_PATTERN.finditer(data):
+        try:
+            streams.append(zlib.decompress(stream_match.group(1)))
+        except zlib.error:
+            continue
+    return streams
+
+
+def _matches(converter: ConverterSpec, sample: ContentSample) -> bool:
+    try:
+        return bool(converter.signature(sample))
+    except Exception:
+        return False
+
+
+def detect_converters(
+    sample: ContentSample,
+    converter_registry: ConverterRegistry,
+    deep: bool = True,
+) -> list[ConverterSpec]:
+    candidates = [converter for converter in converter_registry.all() if converter.signature is not None]
+    for deep in (False, True) if deep else (False,):
+        sample.deep = deep
+        matches = [converter for converter in candidates if _matches(converter, sample)]
+        if matches:
+            return matches
+    return []
+
+
+def detect_converter(
+    source: StatementSource,
+    converter_registry: ConverterRegistry,
+    name: str = "",
+    deep: bool = True,
+) -> ConverterSpec:
+    sample = ContentSample.from_source(source, name)
+    label = sample.name or "conteudo recebido"
+    matches = detect_converters(sample, converter_registry, deep)
+    if not matches and not deep:
+        raise DeepSniffRequired(label)
+    if not matches:
+        raise ValueError(f"Nao foi possivel identificar automaticamente o modelo de {label}.")
+    if len(matches) > 1:
+        models = ", ".join(converter.model for converter in matches)
+        raise ValueError(f"Mais de um modelo reconhece {label} ({models}); informe --model.")
+    return matches[0]
@@ -0,0 +1,176 @@
+import argparse
+import io
+import os
+import sys
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from pathlib import Path
+from typing import BinaryIO, TextIO
+
+from statement_converter._metrics import stage
+
+
+# Caminhos (str ou Path) continuam sendo lidos do disco; bytes e objetos binarios
+# abertos sao consumidos direto da memoria, sem arquivo temporario.
+StatementSource = str | os.PathLike | bytes | bytearray | memoryview | BinaryIO
+
+# "-" como entrada ou saida le de stdin ou grava em stdout, para uso em pipelines.
+STDIO_PATH = "-"
+READ_CHUNK_SIZE = 64 * 1024
+# Codigo de saida de um filtro encerrado por SIGPIPE (128 + 13).
+BROKEN_PIPE_EXIT_CODE = 141
+
+
+def is_path_source(source: StatementSource) -> bool:
+    return isinstance(source, (str, os.PathLike))
+
+
+def is_stdio_path(path: str | os.PathLike | None) -> bool:
+    return path is not None and os.fspath(path) == STDIO_PATH
+
+
+def read_stream_bytes(stream: BinaryIO, chunk_size: int = READ_CHUNK_SIZE) -> bytes:
+    # stdin costuma ser um pipe, sem tamanho nem seek: le em blocos ate o fim.
+    data = bytearray()
+    while chunk := stream.read(chunk_size):
+        data += chunk
+    return bytes(data)
+
+
+@stage("read")
+def read_source_bytes(source: StatementSource) -> bytes:
+    if is_path_source(source):
+        return Path(source).read_bytes()
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return bytes(source)
+    return source.read()
+
+
+def seekable_source(source: StatementSource) -> str | BinaryIO:
+    # pypdf e pandas aceitam caminho ou objeto binario com seek.
+    if is_path_source(source):
+        return str(source)
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return io.BytesIO(source)
+    if source.seekable():
+        return source
+    return io.BytesIO(source.read())
+
+
+@contextmanager
+def open_text_source(source: StatementSource, encoding: str, newline: str | None = None) -> Iterator[TextIO]:
+    if is_path_source(source):
+        with open(source, encoding=encoding, newline=newline) as text_file:
+            yield text_file
+        return
+
+    stream = io.BytesIO(source) if isinstance(source, (bytes, bytearray, memoryview)) else source
+    text_file = io.TextIOWrapper(stream, encoding=encoding, newline=newline)
+    try:
+        yield text_file
+    finally:
+        # detach evita que o fechamento do wrapper feche o buffer de quem chamou.
+        text_file.detach()
+
+
+@contextmanager
+def text_output(output: BinaryIO, encoding: str = "utf-8") -> Iterator[TextIO]:
+    text_file = io.TextIOWrapper(output, encoding=encoding, newline="", write_through=True)
+    try:
+        yield text_file
+    finally:
+        text_file.flush()
+        text_file.detach()
+
+
+class _ForwardOnlyOutput(io.RawIOBase):
+    # stdout redirecionado com >> esta em modo append: o seek aparentemente
+    # funciona, mas a regravacao iria para o fim. Os escritores o tratam como pipe.
+    def __init__(self, output: BinaryIO) -> None:
+        super().__init__()
+        self._output = output
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        try:
+            return self._output.write(data)
+        except BrokenPipeError:
+            self._close_broken_pipe()
+
+    def flush(self) -> None:
+        try:
+            self._output.flush()
+        except BrokenPipeError:
+            self._close_broken_pipe()
+
+    def _close_broken_pipe(self) -> None:
+        # Quem lia o stdout fechou o pipe (por exemplo, head): como os filtros Unix,
+        # o processo encerra em silencio. O descritor passa a apontar para /dev/null
+        # para que o flush final do interpretador nao falhe de novo.
+        try:
+            fileno = self._output.fileno()
+        except (AttributeError, OSError, ValueError):
+            fileno = None
+        if fileno is not None:
+            devnull = os.open(os.devnull, os.O_WRONLY)
+            os.dup2(devnull, fileno)
+            os.close(devnull)
+        raise SystemExit(BROKEN_PIPE_EXIT_CODE)
+
+
+def stdout_output() -> BinaryIO:
+    # Mensagens ja impressas saem antes dos bytes convertidos.
+    sys.stdout.flush()
+    return _ForwardOnlyOutput(sys.stdout.buffer)
+
+
+@contextmanager
+def _atomic_file_output(path: Path) -> Iterator[BinaryIO]:
+    # Dispositivos e pipes (/dev/stdout, FIFOs) nao podem ser substituidos por rename.
+    if path.exists() and not path.is_file():
+        with open(path, "wb") as output:
+            yield output
+        return
+
+    # Grava num temporario ao lado do destino e so o renomeia no sucesso:
+    # um erro no meio da conversao nao deixa um arquivo truncado para tras.
+    temporary_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    try:
+        with open(temporary_path, "wb") as output:
+            yield output
+        os.replace(temporary_path, path)
+    except BaseException:
+        temporary_path.unlink(missing_ok=True)
+        raise
+
+
+@contextmanager
+def open_output(path: str | os.PathLike) -> Iterator[BinaryIO]:
+    if not is_stdio_path(path):
+        with _atomic_file_output(Path(path)) as output:
+            yield output
+        return
+
+    output = stdout_output()
+    try:
+        yield output
+    finally:
+        output.flush()
+
+
+def convert_stdio(
+    stream_handler: Callable[[StatementSource, argparse.Namespace, BinaryIO], None],
+    input_path: str | os.PathLike,
+    output_path: str | os.PathLike,
+    **options,
+) -> bool:
+    # Scripts convert-*: com "-" na entrada ou na saida a conversao passa pelo
+    # stream_handler, que grava na saida a medida que renderiza.
+    if not (is_stdio_path(input_path) or is_stdio_path(output_path)):
+        return False
+    source = read_stream_bytes(sys.stdin.buffer) if is_stdio_path(input_path) else input_path
+    with open_output(output_path) as output:
+        stream_handler(source, argparse.Namespace(**options), output)
+    return True
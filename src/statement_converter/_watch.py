@@ -0,0 +1,304 @@
+import argparse
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import sys
+import threading
+import time
+from collections.abc import Sequence
+from concurrent.futures import Future
+from concurrent.futures.process import BrokenProcessPool
+from functools import partial
+from pathlib import Path, PurePath
+
+from statement_converter._batch import ConversionResult, convert_file, create_worker_pool, default_jobs, submit_conversion
+from statement_converter._cache import ConversionCache
+from statement_converter._routing import ConverterRouter
+from statement_converter.converter_registry import ConverterRegistry, ConverterSpec, registry
+from statement_converter.statement_converter import (
+    _ensure_builtin_converters_loaded,
+    _format_suffix,
+    _resolve_output_file,
+    add_converter_arguments,
+    add_execution_arguments,
+    report_result,
+    route_file,
+    validate_args,
+)
+
+
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_Q_OVERFLOW = 0x00004000
+INOTIFY_EVENT = struct.Struct("iIII")
+# Tamanho minimo do registro de arquivos processados antes de uma limpeza.
+PROCESSED_PRUNE_SIZE = 1024
+
+
+def _list_files(directory: Path) -> list[Path]:
+    with os.scandir(directory) as entries:
+        return sorted(Path(entry.path) for entry in entries if entry.is_file())
+
+
+class InotifyWatcher:
+    description = "inotify"
+
+    def __init__(self, directory: Path) -> None:
+        libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        if not hasattr(libc, "inotify_init1"):
+            raise OSError("inotify nao esta disponivel nesta plataforma")
+
+        fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 falhou")
+
+        # IN_CLOSE_WRITE so chega quando o escritor fecha o arquivo e IN_MOVED_TO
+        # cobre quem grava em um temporario e renomeia, entao nao ha leitura parcial.
+        if libc.inotify_add_watch(fd, os.fsencode(directory), IN_CLOSE_WRITE | IN_MOVED_TO) < 0:
+            error_number = ctypes.get_errno()
+            os.close(fd)
+            raise OSError(error_number, f"inotify_add_watch falhou para {directory}")
+
+        self.directory = directory
+        self._fd = fd
+
+    def poll(self, timeout: float) -> list[Path]:
+        ready, _, _ = select.select([self._fd], [], [], timeout)
+        if not ready:
+            return []
+
+        try:
+            data = os.read(self._fd, 64 * 1024)
+        except BlockingIOError:
+            return []
+
+        paths: list[Path] = []
+        offset = 0
+        while offset + INOTIFY_EVENT.size <= len(data):
+            _, mask, _, name_length = INOTIFY_EVENT.unpack_from(data, offset)
+            offset += INOTIFY_EVENT.size
+            name = data[offset:offset + name_length].rstrip(b"\0")
+            offset += name_length
+
+            if mask & IN_Q_OVERFLOW:
+                paths.extend(_list_files(self.directory))
+            elif name:
+                paths.append(self.directory / os.fsdecode(name))
+
+        return paths
+
+    def close(self) -> None:
+        os.close(self._fd)
+
+
+class PollingWatcher:
+    description = "varredura periodica"
+
+    def __init__(self, directory: Path, interval: float = 1.0, settle: float = 2.0) -> None:
+        self.directory = directory
+        self.interval = interval
+        self.settle = settle
+        self._candidates: dict[Path, tuple[tuple[int, int], float]] = {}
+        self._reported: dict[Path, tuple[int, int]] = {}
+
+    def poll(self, timeout: float) -> list[Path]:
+        time.sleep(min(timeout, self.interval))
+        now = time.monotonic()
+        ready: list[Path] = []
+        seen: set[Path] = set()
+
+        for path in _list_files(self.directory):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+
+            seen.add(path)
+            signature = (stat.st_size, stat.st_mtime_ns)
+            candidate = self._candidates.get(path)
+            if candidate is None or candidate[0] != signature:
+                self._candidates[path] = (signature, now)
+                continue
+
+            # Debounce: o arquivo so e entregue depois de ficar `settle` segundos
+            # sem mudar de tamanho ou mtime, evitando ler downloads em andamento.
+            if now - candidate[1] >= self.settle and self._reported.get(path) != signature:
+                self._reported[path] = signature
+                ready.append(path)
+
+        for path in set(self._candidates) - seen:
+            self._candidates.pop(path, None)
+            self._reported.pop(path, None)
+
+        return ready
+
+    def close(self) -> None:
+        pass
+
+
+def open_watcher(directory: Path, args: argparse.Namespace) -> InotifyWatcher | PollingWatcher:
+    if not args.poll:
+        try:
+            return InotifyWatcher(directory)
+        except (OSError, AttributeError) as exc:
+            print(f"inotify indisponivel ({exc}); usando varredura periodica.", file=sys.stderr)
+    return PollingWatcher(directory, interval=args.poll_interval, settle=args.settle)
+
+
+def _accepts(path: Path, converter: ConverterSpec | None, pattern: str | None) -> bool:
+    if path.name.startswith("."):
+        return False
+    if pattern is not None:
+        return PurePath(path.name).match(pattern)
+    # Com varios modelos (rotas ou --model auto) a escolha fica para o roteador.
+    return converter is None or path.suffix.casefold() == _format_suffix(converter.input_format)
+
+
+def _is_stale(input_file: Path, output_file: Path) -> bool:
+    try:
+        return output_file.stat().st_mtime_ns < input_file.stat().st_mtime_ns
+    except FileNotFoundError:
+        return True
+
+
+def _report_future(input_file: Path, future: "Future[ConversionResult]") -> None:
+    try:
+        report_result(future.result())
+    except BrokenProcessPool:
+        print(f"Erro ao converter {input_file}: o worker de conversao terminou inesperadamente", file=sys.stderr)
+    except Exception as exc:
+        print(f"Erro no worker de conversao ({input_file}): {exc}", file=sys.stderr)
+    sys.stdout.flush()
+
+
+def _prune_processed(processed: dict[Path, tuple[int, int]], directory: Path) -> None:
+    # Arquivos apagados ou movidos para fora do inbox nao voltam a gerar eventos;
+    # sem a limpeza o registro cresceria durante toda a vida do monitoramento.
+    for path in list(processed):
+        if path.parent != directory or not path.is_file():
+            del processed[path]
+
+
+def watch_directory(
+    converter: ConverterSpec | ConverterRouter,
+    args: argparse.Namespace,
+    watcher: InotifyWatcher | PollingWatcher,
+    stop_event: threading.Event | None = None,
+    poll_timeout: float = 0.5,
+) -> None:
+    router = converter if isinstance(converter, ConverterRouter) else ConverterRouter(converter)
+    single_converter = router.single_converter
+    stop_event = stop_event or threading.Event()
+    pattern = getattr(args, "glob", None)
+    jobs = getattr(args, "jobs", None) or default_jobs()
+    executor = create_worker_pool(router.default, args, jobs) if jobs > 1 else None
+    processed: dict[Path, tuple[int, int]] = {}
+    prune_at = PROCESSED_PRUNE_SIZE
+
+    def submit(input_file: Path, output_file: Path, routed_converter: ConverterSpec | None) -> None:
+        nonlocal executor
+        try:
+            future = submit_conversion(executor, input_file, output_file, routed_converter)
+        except BrokenProcessPool:
+            # Um worker que morreu quebra o pool inteiro; o monitoramento segue com um novo.
+            print(f"Pool de workers reiniciado antes de converter {input_file}.", file=sys.stderr)
+            executor.shutdown(wait=False, cancel_futures=True)
+            executor = create_worker_pool(router.default, args, jobs)
+            future = submit_conversion(executor, input_file, output_file, routed_converter)
+        future.add_done_callback(partial(_report_future, input_file))
+
+    def dispatch(input_file: Path, only_stale: bool = False) -> None:
+        if not _accepts(input_file, single_converter, pattern):
+            return
+        try:
+            stat = input_file.stat()
+        except FileNotFoundError:
+            return
+
+        signature = (stat.st_size, stat.st_mtime_ns)
+        if processed.get(input_file) == signature:
+            return
+
+        file_converter = route_file(router, input_file, PurePath(input_file.name))
+        if file_converter is None:
+            processed[input_file] = signature
+            return
+        output_file = _resolve_output_file(input_file, args.output_path, file_converter.output_format, batch_mode=True)
+        if only_stale and not _is_stale(input_file, output_file):
+            return
+        processed[input_file] = signature
+
+        if executor is None:
+            report_result(convert_file(file_converter, args, input_file, output_file))
+            sys.stdout.flush()
+        else:
+            submit(input_file, output_file, None if file_converter is router.default else file_converter)
+
+    try:
+        for input_file in _list_files(args.input_path):
+            dispatch(input_file, only_stale=True)
+
+        while not stop_event.is_set():
+            for input_file in watcher.poll(poll_timeout):
+                dispatch(input_file)
+            if len(processed) >= prune_at:
+                _prune_processed(processed, args.input_path)
+                prune_at = max(PROCESSED_PRUNE_SIZE, 2 * len(processed))
+    finally:
+        if executor is not None:
+            executor.shutdown(wait=True)
+        watcher.close()
+
+
+def build_argument_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="statement-converter watch",
+        description="Monitora um diretorio de entrada e converte cada extrato assim que ele termina de ser gravado.",
+    )
+    parser.add_argument("input_path", type=Path, nargs="?", metavar="inbox")
+    parser.add_argument("output_path", type=Path, nargs="?", metavar="outbox")
+    add_converter_arguments(parser)
+    add_execution_arguments(parser)
+    parser.add_argument(
+        "--glob",
+        help="Padrao aplicado ao nome dos arquivos recebidos. Substitui o filtro pela extensao do modelo.",
+    )
+    parser.add_argument("--poll", action="store_true", help="Usa varredura periodica mesmo quando inotify esta disponivel.")
+    parser.add_argument(
+        "--poll-interval",
+        type=float,
+        default=1.0,
+        help="Intervalo em segundos entre varreduras no modo de varredura periodica. Padrao: 1.",
+    )
+    parser.add_argument(
+        "--settle",
+        type=float,
+        default=2.0,
+        help="Segundos sem alteracao de tamanho/mtime para considerar um arquivo completo na varredura. Padrao: 2.",
+    )
+    return parser
+
+
+def main(argv: Sequence[str] | None = None, converter_registry: ConverterRegistry = registry) -> int:
+    _ensure_builtin_converters_loaded(converter_registry)
+    parser = build_argument_parser()
+    args = parser.parse_args(argv)
+    router = validate_args(parser, args, converter_registry)
+    if not args.input_path.is_dir():
+        parser.error("o modo watch exige que inbox seja um diretorio")
+    args.output_path.mkdir(parents=True, exist_ok=True)
+
+    watcher = open_watcher(args.input_path, args)
+    print(f"Monitorando {args.input_path} ({watcher.description}); pressione Ctrl+C para encerrar.", flush=True)
+    try:
+        watch_directory(router, args, watcher)
+    except KeyboardInterrupt:
+        print("Monitoramento encerrado.")
+    finally:
+        cache = ConversionCache.from_args(args)
+        if cache is not None:
+            cache.prune()
+
+    return 0
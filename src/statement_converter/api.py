@@ -0,0 +1,238 @@
+import argparse
+import asyncio
+import io
+import itertools
+import signal
+import tempfile
+from collections.abc import AsyncIterator, Iterable
+from concurrent.futures import Executor, ProcessPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import BinaryIO
+
+from statement_converter._batch import OwnedWorkerContext, convert_file, default_jobs, worker_context
+from statement_converter._metrics import ConversionMetrics, measure
+from statement_converter._ofx_common import StatementData
+from statement_converter._sniff import detect_converter, is_auto_model
+from statement_converter._source import StatementSource, is_path_source, read_source_bytes
+from statement_converter.converter_registry import ConverterRegistry, ConverterSpec, registry
+from statement_converter.statement_converter import _ensure_builtin_converters_loaded, _format_suffix
+
+
+@dataclass(frozen=True)
+class ConversionItem:
+    index: int
+    source: StatementSource
+    output: bytes | None = None
+    error: str | None = None
+
+    @property
+    def succeeded(self) -> bool:
+        return self.error is None
+
+
+_worker_registry: ConverterRegistry | None = None
+
+
+def resolve_converter(model: str, converter_registry: ConverterRegistry = registry) -> ConverterSpec:
+    _ensure_builtin_converters_loaded(converter_registry)
+    converter = converter_registry.find_by_model(model)
+    if converter is None:
+        raise ValueError(f"Nenhum conversor foi encontrado para o modelo {model}.")
+    return converter
+
+
+def _resolve_for_source(
+    model: str,
+    data: StatementSource,
+    converter_registry: ConverterRegistry,
+) -> tuple[ConverterSpec, StatementSource]:
+    if not is_auto_model(model):
+        return resolve_converter(model, converter_registry), data
+    _ensure_builtin_converters_loaded(converter_registry)
+    # A deteccao consome o objeto binario; o conversor recebe os mesmos bytes.
+    if not is_path_source(data):
+        data = read_source_bytes(data)
+    return detect_converter(data, converter_registry), data
+
+
+def build_options(converter: ConverterSpec, options: dict[str, object]) -> argparse.Namespace:
+    missing_options = [option for option in converter.required_options if not options.get(option)]
+    if missing_options:
+        raise ValueError(f"O modelo {converter.model} exige opcoes extras: {', '.join(missing_options)}")
+    return argparse.Namespace(model=converter.model, **options)
+
+
+def convert_to_stream(
+    data: StatementSource,
+    model: str,
+    output: BinaryIO,
+    *,
+    converter_registry: ConverterRegistry = registry,
+    **options: object,
+) -> None:
+    converter, data = _resolve_for_source(model, data, converter_registry)
+    if converter.stream_handler is None:
+        raise ValueError(f"O modelo {converter.model} nao suporta conversao em memoria.")
+    converter.stream_handler(data, build_options(converter, options), output)
+
+
+def convert(
+    data: StatementSource,
+    model: str,
+    *,
+    converter_registry: ConverterRegistry = registry,
+    **options: object,
+) -> bytes:
+    output = io.BytesIO()
+    convert_to_stream(data, model, output, converter_registry=converter_registry, **options)
+    return output.getvalue()
+
+
+def parse(
+    data: StatementSource,
+    model: str,
+    *,
+    converter_registry: ConverterRegistry = registry,
+    **options: object,
+) -> StatementData:
+    converter, data = _resolve_for_source(model, data, converter_registry)
+    if converter.statement_parser is None:
+        raise ValueError(
+            f"O modelo {converter.model} gera {converter.output_format.upper()} e nao produz StatementData."
+        )
+    return converter.statement_parser(data, build_options(converter, options))
+
+
+def _init_memory_worker(converter_registry: ConverterRegistry) -> None:
+    global _worker_registry
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    _worker_registry = converter_registry
+
+
+def create_memory_worker_pool(
+    converter_registry: ConverterRegistry,
+    workers: int,
+    context=None,
+) -> ProcessPoolExecutor:
+    return ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=context or worker_context(),
+        initializer=_init_memory_worker,
+        initargs=(converter_registry,),
+    )
+
+
+def convert_in_memory_worker(
+    model: str,
+    data: bytes,
+    options: dict[str, object],
+) -> tuple[bytes | None, str | None, ConversionMetrics, str]:
+    # As etapas e contadores medidos no worker voltam junto com o resultado e,
+    # com auto, o modelo identificado no proprio worker.
+    with measure() as metrics:
+        output, error, model = _convert_in_memory(model, data, options)
+    metrics.input_bytes = len(data)
+    metrics.output_bytes = None if output is None else len(output)
+    return output, error, metrics, model
+
+
+def _convert_in_memory(model: str, data: bytes, options: dict[str, object]) -> tuple[bytes | None, str | None, str]:
+    assert _worker_registry is not None
+    if is_auto_model(model):
+        try:
+            converter = detect_converter(data, _worker_registry)
+        except ValueError as exc:
+            return None, str(exc), model
+        model = converter.model
+        try:
+            build_options(converter, options)
+        except ValueError as exc:
+            return None, str(exc), model
+    else:
+        converter = _worker_registry.find_by_model(model)
+
+    if converter.stream_handler is not None:
+        output = io.BytesIO()
+        try:
+            converter.stream_handler(data, argparse.Namespace(model=model, **options), output)
+        except Exception as exc:
+            return None, str(exc), model
+        return output.getvalue(), None, model
+
+    # Conversores de terceiros sem stream_handler ainda passam por arquivos temporarios.
+    with tempfile.TemporaryDirectory(prefix="statement-converter-") as directory:
+        input_file = Path(directory) / f"upload{_format_suffix(converter.input_format)}"
+        output_file = Path(directory) / f"converted{_format_suffix(converter.output_format)}"
+        input_file.write_bytes(data)
+        result = convert_file(converter, argparse.Namespace(model=model, **options), input_file, output_file)
+        if result.error is not None:
+            return None, result.error, model
+        return output_file.read_bytes(), None, model
+
+
+async def _convert_item(
+    index: int,
+    source: StatementSource,
+    model: str,
+    options: dict[str, object],
+    executor: Executor,
+) -> ConversionItem:
+    loop = asyncio.get_running_loop()
+    try:
+        # Leitura de arquivo em thread; o parse, que e CPU, vai para o pool de processos.
+        if isinstance(source, (bytes, bytearray, memoryview)):
+            data = bytes(source)
+        else:
+            data = await asyncio.to_thread(read_source_bytes, source)
+        output, error, _, _ = await loop.run_in_executor(executor, convert_in_memory_worker, model, data, options)
+    except Exception as exc:
+        return ConversionItem(index, source, error=str(exc))
+    return ConversionItem(index, source, output, error)
+
+
+async def convert_many(
+    sources: Iterable[StatementSource],
+    model: str,
+    *,
+    concurrency: int | None = None,
+    converter_registry: ConverterRegistry = registry,
+    **options: object,
+) -> AsyncIterator[ConversionItem]:
+    if is_auto_model(model):
+        # Com auto o modelo e identificado por item, dentro do worker.
+        _ensure_builtin_converters_loaded(converter_registry)
+        model_name = model
+    else:
+        converter = resolve_converter(model, converter_registry)
+        build_options(converter, options)
+        model_name = converter.model
+    workers = concurrency or default_jobs()
+    if workers < 1:
+        raise ValueError("concurrency deve ser um numero inteiro maior ou igual a 1")
+
+    # As leituras rodam em threads (asyncio.to_thread); um fork ao lado delas
+    # poderia herdar um lock preso, entao os workers partem de um forkserver.
+    context = OwnedWorkerContext(worker_context(threaded=True))
+    executor = create_memory_worker_pool(converter_registry, workers, context)
+    numbered_sources = enumerate(sources)
+    pending: set[asyncio.Task[ConversionItem]] = set()
+    try:
+        while True:
+            # No maximo `workers` itens em andamento: as fontes sao consumidas aos poucos
+            # e os bytes de um lote grande nunca ficam todos em memoria.
+            for index, source in itertools.islice(numbered_sources, workers - len(pending)):
+                pending.add(asyncio.create_task(_convert_item(index, source, model_name, options, executor)))
+            if not pending:
+                break
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in sorted(done, key=lambda task: task.result().index):
+                yield task.result()
+    finally:
+        # Cancelamento (ou abandono do iterador) interrompe tambem os parses em andamento.
+        for task in pending:
+            task.cancel()
+        executor.shutdown(wait=False, cancel_futures=True)
+        if pending:
+            context.terminate()
+            await asyncio.gather(*pending, return_exceptions=True)
@@ -4,20 +4,26 @@ import unicodedata
 from dataclasses import dataclass
 from decimal import Decimal
 from pathlib import Path
+from typing import TYPE_CHECKING, BinaryIO
 
-from pypdf import PdfReader
-from pypdf._page import PageObject
-from pypdf.generic import ContentStream
-
+from statement_converter._metrics import count, stage
 from statement_converter._ofx_common import (
     StatementData,
     StatementTransaction,
-    build_ofx,
+    write_ofx,
     parse_brl_amount,
     parse_datetime_br,
 )
+from statement_converter._profiling import profile_option
+from statement_converter._sniff import ContentSample
+from statement_converter._source import StatementSource, convert_stdio, open_output, seekable_source
+
+if TYPE_CHECKING:
+    from pypdf import PdfReader
+    from pypdf._page import PageObject
 
 
+DEPENDENCIES = ("pypdf",)
 DATE_PATTERN = re.compile(r"^\d{2}/\d{2}/\d{4}$")
 ACCOUNT_ID_PATTERN = re.compile(r"Conta:\s*([0-9A-Z.-]+)")
 GENERATED_AT_PATTERN = re.compile(r"(\d{2}/\d{2}/\d{4})\s*-\s*Autoatendimento BB\s*-\s*(\d{2}:\d{2}:\d{2})")
@@ -66,7 +72,9 @@ def clean_text(value: str) -> str:
     return value.replace("€", " ").strip()
 
 
-def extract_page_elements(page: PageObject, reader: PdfReader) -> list[TextElement]:
+def extract_page_elements(page: "PageObject", reader: "PdfReader") -> list[TextElement]:
+    from pypdf.generic import ContentStream
+
     content_stream = ContentStream(page.get_contents(), reader)
     elements: list[TextElement] = []
     current_color: tuple[float, float, float] | None = None
@@ -97,13 +105,18 @@ def extract_page_elements(page: PageObject, reader: PdfReader) -> list[TextEleme
             )
         )
 
+    count("text_elements", len(elements))
     return elements
 
 
-def extract_pdf_elements(input_path: str | Path) -> list[list[TextElement]]:
-    reader = PdfReader(str(input_path))
+@stage("extract")
+def extract_pdf_elements(source: StatementSource) -> list[list[TextElement]]:
+    from pypdf import PdfReader
+
+    reader = PdfReader(seekable_source(source))
     if reader.is_encrypted:
         reader.decrypt("")
+    count("pages", len(reader.pages))
     return [extract_page_elements(page, reader) for page in reader.pages]
 
 
@@ -182,6 +195,7 @@ def parse_page_transactions(elements: list[TextElement]) -> list[StatementTransa
         ],
         key=lambda element: -element.y,
     )
+    count("rows", len(date_elements))
     transactions: list[StatementTransaction] = []
 
     for index, date_element in enumerate(date_elements):
@@ -199,6 +213,7 @@ def parse_page_transactions(elements: list[TextElement]) -> list[StatementTransa
     return transactions
 
 
+@stage("parse")
 def parse_elements(pages: list[list[TextElement]]) -> StatementData:
     transactions: list[StatementTransaction] = []
     for page in pages:
@@ -216,13 +231,14 @@ def parse_elements(pages: list[list[TextElement]]) -> StatementData:
     )
 
 
-def parse_pdf(input_path: str | Path) -> StatementData:
-    return parse_elements(extract_pdf_elements(input_path))
+def parse_pdf(source: StatementSource) -> StatementData:
+    return parse_elements(extract_pdf_elements(source))
 
 
 def process_pdf(input_path: str | Path, output_path: str | Path) -> None:
     statement = parse_pdf(input_path)
-    Path(output_path).write_text(build_ofx(statement), encoding="utf-8")
+    with open_output(output_path) as output:
+        write_ofx(statement, output)
     print(f"OFX successfully generated: {output_path} ({len(statement.transactions)} transactions)")
 
 
@@ -233,15 +249,30 @@ def build_argument_parser() -> argparse.ArgumentParser:
     return parser
 
 
+@profile_option
 def main() -> None:
     args = build_argument_parser().parse_args()
-    process_pdf(args.input_path, args.output_path)
+    if not convert_stdio(_write_stream, args.input_path, args.output_path):
+        process_pdf(args.input_path, args.output_path)
+
+
+def matches_signature(sample: ContentSample) -> bool:
+    text = sample.pdf_first_page_text()
+    return text is not None and "Autoatendimento BB" in text and bool(ACCOUNT_ID_PATTERN.search(text))
 
 
 def _run(args: argparse.Namespace) -> None:
     process_pdf(args.input_path, args.output_path)
 
 
+def _write_stream(source: StatementSource, args: argparse.Namespace, output: BinaryIO) -> None:
+    write_ofx(parse_pdf(source), output)
+
+
+def _parse_statement(source: StatementSource, args: argparse.Namespace) -> StatementData:
+    return parse_pdf(source)
+
+
 def register_converters(registry) -> None:
     registry.register(
         input_format="pdf",
@@ -249,6 +280,9 @@ def register_converters(registry) -> None:
         model="bb-cc",
         description="BB conta corrente PDF para OFX",
         aliases=("bb-pdf-ofx", "bb-cc-pdf-ofx"),
+        stream_handler=_write_stream,
+        statement_parser=_parse_statement,
+        signature=matches_signature,
     )(_run)
 
 
@@ -4,9 +4,14 @@ import sys
 from pathlib import Path
 from io import StringIO
 
-def parse_csv(input_file):
-    """Parse CSV and return list of dicts (records)."""
-    with open(input_file, newline='', encoding="utf-8") as f_in:
+from statement_converter._metrics import count, stage
+from statement_converter._profiling import profile_option
+from statement_converter._source import convert_stdio, open_text_source, text_output
+
+@stage("parse")
+def parse_csv(source):
+    """Parse CSV (path, bytes or binary file) and return list of dicts (records)."""
+    with open_text_source(source, encoding="utf-8", newline='') as f_in:
         reader = csv.DictReader(f_in)
 
         # Define new fieldnames: insert "Type" right after "Valor"
@@ -33,17 +38,24 @@ def parse_csv(input_file):
 
             records.append(cleaned_row)
 
+    count("rows", len(records))
     return fieldnames, records
 
+@stage("render")
+def write_csv(fieldnames, records, f_out):
+    writer = csv.DictWriter(f_out, fieldnames=fieldnames, quoting=csv.QUOTE_ALL)
+    writer.writeheader()
+    writer.writerows(records)
+    count("transactions", len(records))
+
 def process_csv(input_file, output_file):
     """Parse and write output CSV."""
     fieldnames, records = parse_csv(input_file)
 
     with open(output_file, "w", newline='', encoding="utf-8") as f_out:
-        writer = csv.DictWriter(f_out, fieldnames=fieldnames, quoting=csv.QUOTE_ALL)
-        writer.writeheader()
-        writer.writerows(records)
+        write_csv(fieldnames, records, f_out)
 
+@profile_option
 def main():
     """Main function to handle command-line arguments."""
     if len(sys.argv) < 3:
@@ -53,12 +65,22 @@ def main():
     else:
         input_file = Path(sys.argv[1])
         output_file = Path(sys.argv[2])
-        process_csv(input_file, output_file)
+        if not convert_stdio(_write_stream, input_file, output_file):
+            process_csv(input_file, output_file)
+
+def matches_signature(sample):
+    return sample.first_line.replace('"', '').startswith("Data,Histórico,Valor")
 
 def _run(args):
     process_csv(args.input_path, args.output_path)
 
 
+def _write_stream(source, args, output):
+    fieldnames, records = parse_csv(source)
+    with text_output(output) as f_out:
+        write_csv(fieldnames, records, f_out)
+
+
 def register_converters(registry):
     registry.register(
         input_format="csv",
@@ -66,6 +88,8 @@ def register_converters(registry):
         model="bb-cp",
         description="Banco do Brasil conta corrente",
         aliases=("bb",),
+        stream_handler=_write_stream,
+        signature=matches_signature,
     )(_run)
 
 
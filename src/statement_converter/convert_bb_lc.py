@@ -3,6 +3,10 @@ import csv
 import sys
 from pathlib import Path
 
+from statement_converter._metrics import count, stage
+from statement_converter._profiling import profile_option
+from statement_converter._source import StatementSource, convert_stdio, open_text_source, text_output
+
 # Regex for the main data table (supports negative numbers)
 table_row_pattern = re.compile(
     r"^ *(?P<date>\d{2}/\d{2}/\d{4})\s+"
@@ -34,7 +38,8 @@ def normalize_number(raw_value: str) -> str:
     formatted = f"{value[:-2]},{value[-2:]}"
     return f"-{formatted}" if negative else formatted
 
-def parse_input(input_path: str | Path) -> tuple[list[str], list[list[str]]]:
+@stage("parse")
+def parse_input(source: StatementSource) -> tuple[list[str], list[list[str]]]:
     """
     Extracts the relevant data from the BB statement text file and writes it to CSV.
     """
@@ -42,8 +47,9 @@ def parse_input(input_path: str | Path) -> tuple[list[str], list[list[str]]]:
     saldo_atual_date = None
     summary_items = {}
 
-    with open(input_path, "r", encoding="utf-8") as infile:
+    with open_text_source(source, encoding="utf-8") as infile:
         for raw_line in infile:
+            count("rows")
             line = raw_line.rstrip("\n")
 
             # Parse table section
@@ -89,18 +95,24 @@ def parse_input(input_path: str | Path) -> tuple[list[str], list[list[str]]]:
 
     return fieldnames, rows
 
+@stage("render")
+def write_csv(fieldnames, rows, csvfile):
+    writer = csv.writer(csvfile, delimiter=";", quoting=csv.QUOTE_ALL)
+    writer.writerow(fieldnames)
+    writer.writerows(rows)
+    count("transactions", len(rows))
+
 def process_csv(input_file, output_file):
     """Parse and write output CSV."""
     fieldnames, rows = parse_input(input_file)
 
     with open(output_file, "w", newline="", encoding="utf-8") as csvfile:
-        writer = csv.writer(csvfile, delimiter=";", quoting=csv.QUOTE_ALL)
-        writer.writerow(fieldnames)
-        writer.writerows(rows)
+        write_csv(fieldnames, rows, csvfile)
 
     print(f"CSV successfully generated: {output_file} ({len(rows)} rows)")
 
 
+@profile_option
 def main():
     """Main function to handle command-line arguments."""
     if len(sys.argv) < 3:
@@ -110,13 +122,24 @@ def main():
     else:
         input_file = Path(sys.argv[1])
         output_file = Path(sys.argv[2])
-        process_csv(input_file, output_file)
+        if not convert_stdio(_write_stream, input_file, output_file):
+            process_csv(input_file, output_file)
+
+
+def matches_signature(sample):
+    return "Autoatendimento BB" in sample.text and re.search(r"\bLC[AI]? SELECIONADA\b", sample.text) is not None
 
 
 def _run(args):
     process_csv(args.input_path, args.output_path)
 
 
+def _write_stream(source, args, output):
+    fieldnames, rows = parse_input(source)
+    with text_output(output) as csvfile:
+        write_csv(fieldnames, rows, csvfile)
+
+
 def register_converters(registry):
     registry.register(
         input_format="txt",
@@ -124,6 +147,8 @@ def register_converters(registry):
         model="bb-lc",
         description="Banco do Brasil LC/LCI/LCA",
         aliases=("bb-lci-lca", "bb-lcilca"),
+        stream_handler=_write_stream,
+        signature=matches_signature,
     )(_run)
 
 if __name__ == "__main__":
@@ -3,12 +3,17 @@ import csv
 from datetime import datetime
 from decimal import Decimal
 from pathlib import Path
+from typing import BinaryIO
 
+from statement_converter._metrics import count, stage
 from statement_converter._ofx_common import (
     StatementData,
     StatementTransaction,
-    build_credit_card_ofx,
+    write_credit_card_ofx,
 )
+from statement_converter._profiling import profile_option
+from statement_converter._sniff import ContentSample
+from statement_converter._source import StatementSource, convert_stdio, open_output, open_text_source
 
 
 DATE_FORMATS = ("%Y-%m-%d", "%d/%m/%Y")
@@ -51,13 +56,15 @@ def transaction_amount(description: str, amount: Decimal) -> Decimal:
     return -abs(amount)
 
 
-def parse_csv(input_path: str | Path) -> StatementData:
+@stage("parse")
+def parse_csv(source: StatementSource) -> StatementData:
     transactions: list[StatementTransaction] = []
     card_suffixes: set[str] = set()
 
-    with Path(input_path).open(encoding="utf-8-sig", newline="") as csv_file:
+    with open_text_source(source, encoding="utf-8-sig", newline="") as csv_file:
         reader = csv.DictReader(csv_file, delimiter=";")
         for row in reader:
+            count("rows")
             description = normalize_description(row["Descrição"])
             amount = parse_amount(row["Valor (em R$)"])
             posted_at = datetime.strptime(row["Data de Compra"].strip(), "%d/%m/%Y")
@@ -96,7 +103,8 @@ def parse_csv(input_path: str | Path) -> StatementData:
 def process_csv(input_path: str | Path, output_path: str | Path, due_date: str | datetime) -> None:
     statement = parse_csv(input_path)
     parsed_due_date = parse_due_date(due_date) if isinstance(due_date, str) else due_date
-    Path(output_path).write_text(build_credit_card_ofx(statement, parsed_due_date), encoding="utf-8")
+    with open_output(output_path) as output:
+        write_credit_card_ofx(statement, parsed_due_date, output)
     print(f"OFX successfully generated: {output_path} ({len(statement.transactions)} transactions)")
 
 
@@ -110,15 +118,30 @@ def build_argument_parser() -> argparse.ArgumentParser:
     return parser
 
 
+@profile_option
 def main() -> None:
     args = build_argument_parser().parse_args()
-    process_csv(args.input_path, args.output_path, args.due_date)
+    if not convert_stdio(_write_stream, args.input_path, args.output_path, due_date=args.due_date):
+        process_csv(args.input_path, args.output_path, args.due_date)
+
+
+def matches_signature(sample: ContentSample) -> bool:
+    return sample.first_line.startswith("Data de Compra;Nome no Cartão;Final do Cartão")
 
 
 def _run(args: argparse.Namespace) -> None:
     process_csv(args.input_path, args.output_path, args.due_date)
 
 
+def _write_stream(source: StatementSource, args: argparse.Namespace, output: BinaryIO) -> None:
+    statement = parse_csv(source)
+    write_credit_card_ofx(statement, parse_due_date(args.due_date), output)
+
+
+def _parse_statement(source: StatementSource, args: argparse.Namespace) -> StatementData:
+    return parse_csv(source)
+
+
 def register_converters(registry) -> None:
     registry.register(
         input_format="csv",
@@ -127,6 +150,9 @@ def register_converters(registry) -> None:
         description="C6 cartao de credito CSV para OFX",
         aliases=("c6-csv",),
         required_options=("due_date",),
+        stream_handler=_write_stream,
+        statement_parser=_parse_statement,
+        signature=matches_signature,
     )(_run)
 
 
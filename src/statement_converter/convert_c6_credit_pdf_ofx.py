@@ -5,12 +5,17 @@ from dataclasses import dataclass
 from datetime import datetime
 from decimal import Decimal
 from pathlib import Path
+from typing import BinaryIO
 
+from statement_converter._metrics import count, span, stage
 from statement_converter._ofx_common import (
     StatementData,
     StatementTransaction,
-    build_credit_card_ofx,
+    write_credit_card_ofx,
 )
+from statement_converter._profiling import profile_option
+from statement_converter._sniff import ContentSample
+from statement_converter._source import StatementSource, convert_stdio, open_output, read_source_bytes
 
 
 DATE_PATTERN = re.compile(r"^\s*(\d{1,2}) ([a-z]{3})\s*$", re.IGNORECASE)
@@ -23,6 +28,7 @@ PARCEL_PATTERN = re.compile(r"\bparcela\s+(\d+)/(\d+)\b", re.IGNORECASE)
 PAYMENT_PATTERN = re.compile(r"inclus[aã]o de pagamento", re.IGNORECASE)
 ESTORNO_PATTERN = re.compile(r"\bestorno\b", re.IGNORECASE)
 CARD_SUFFIX_PATTERN = re.compile(r"Final (\d{4})")
+SIGNATURE_MARKER = b"Lembrando: nesta fatura"
 
 
 SHORT_MONTHS = {
@@ -105,15 +111,18 @@ def parse_fill_color(block: bytes) -> tuple[float, float, float] | None:
     return (float(red), float(green), float(blue))
 
 
+@stage("extract")
 def extract_text_elements(pdf_bytes: bytes) -> list[list[PdfTextElement]]:
     pages: list[list[PdfTextElement]] = []
 
     for stream_match in re.finditer(rb"stream\r?\n(.*?)\r?\nendstream", pdf_bytes, re.S):
         raw_stream = stream_match.group(1)
         try:
-            stream = zlib.decompress(raw_stream)
+            with span("decompress"):
+                stream = zlib.decompress(raw_stream)
         except zlib.error:
             continue
+        count("streams")
 
         page_elements: list[PdfTextElement] = []
         for block_match in re.finditer(rb"BT\s*(.*?)\s*ET", stream, re.S):
@@ -135,6 +144,7 @@ def extract_text_elements(pdf_bytes: bytes) -> list[list[PdfTextElement]]:
                 )
             )
 
+        count("text_elements", len(page_elements))
         if any("Lembrando: nesta fatura" in element.text for element in page_elements):
             pages.append(page_elements)
 
@@ -270,6 +280,7 @@ def extract_reference_and_due_date(pages: list[list[PdfTextElement]]) -> tuple[d
     return reference_date, due_date
 
 
+@stage("parse")
 def parse_transactions(pages: list[list[PdfTextElement]], reference_date: datetime) -> tuple[list[StatementTransaction], set[str]]:
     transactions: list[StatementTransaction] = []
     card_suffixes: set[str] = set()
@@ -278,6 +289,7 @@ def parse_transactions(pages: list[list[PdfTextElement]], reference_date: dateti
         rows: dict[float, list[PdfTextElement]] = {}
         for element in page:
             rows.setdefault(round(element.y, 1), []).append(element)
+        count("rows", len(rows))
 
         current_card_suffix: str | None = None
         for y in sorted(rows.keys(), reverse=True):
@@ -321,9 +333,10 @@ def parse_transactions(pages: list[list[PdfTextElement]], reference_date: dateti
     return sorted(transactions, key=lambda transaction: transaction.posted_at), card_suffixes
 
 
-def parse_pdf_document(input_path: str | Path) -> tuple[StatementData, datetime]:
-    pdf_bytes = Path(input_path).read_bytes()
+def parse_pdf_document(source: StatementSource) -> tuple[StatementData, datetime]:
+    pdf_bytes = read_source_bytes(source)
     pages = extract_text_elements(pdf_bytes)
+    count("pages", len(pages))
     if not pages:
         raise ValueError("Nenhuma página de fatura C6 foi identificada no PDF.")
 
@@ -346,14 +359,15 @@ def parse_pdf_document(input_path: str | Path) -> tuple[StatementData, datetime]
     return statement, due_date
 
 
-def parse_pdf(input_path: str | Path) -> StatementData:
-    statement, _ = parse_pdf_document(input_path)
+def parse_pdf(source: StatementSource) -> StatementData:
+    statement, _ = parse_pdf_document(source)
     return statement
 
 
 def process_pdf(input_path: str | Path, output_path: str | Path) -> None:
     statement, due_date = parse_pdf_document(input_path)
-    Path(output_path).write_text(build_credit_card_ofx(statement, due_date), encoding="utf-8")
+    with open_output(output_path) as output:
+        write_credit_card_ofx(statement, due_date, output)
     print(f"OFX successfully generated: {output_path} ({len(statement.transactions)} transactions)")
 
 
@@ -366,15 +380,30 @@ def build_argument_parser() -> argparse.ArgumentParser:
     return parser
 
 
+@profile_option
 def main() -> None:
     args = build_argument_parser().parse_args()
-    process_pdf(args.input_path, args.output_path)
+    if not convert_stdio(_write_stream, args.input_path, args.output_path):
+        process_pdf(args.input_path, args.output_path)
+
+
+def matches_signature(sample: ContentSample) -> bool:
+    return any(SIGNATURE_MARKER in stream for stream in sample.pdf_streams())
 
 
 def _run(args: argparse.Namespace) -> None:
     process_pdf(args.input_path, args.output_path)
 
 
+def _write_stream(source: StatementSource, args: argparse.Namespace, output: BinaryIO) -> None:
+    statement, due_date = parse_pdf_document(source)
+    write_credit_card_ofx(statement, due_date, output)
+
+
+def _parse_statement(source: StatementSource, args: argparse.Namespace) -> StatementData:
+    return parse_pdf(source)
+
+
 def register_converters(registry) -> None:
     registry.register(
         input_format="pdf",
@@ -382,6 +411,9 @@ def register_converters(registry) -> None:
         model="c6-credit-pdf",
         description="C6 cartao de credito PDF para OFX",
         aliases=("c6-pdf",),
+        stream_handler=_write_stream,
+        statement_parser=_parse_statement,
+        signature=matches_signature,
     )(_run)
 
 
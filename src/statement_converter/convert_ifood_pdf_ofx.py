@@ -4,8 +4,13 @@ import sys
 from datetime import datetime
 from decimal import Decimal
 from pathlib import Path
+from typing import BinaryIO
 
-from statement_converter._ofx_common import StatementData, StatementTransaction, build_ofx
+from statement_converter._metrics import count, stage
+from statement_converter._ofx_common import StatementData, StatementTransaction, write_ofx
+from statement_converter._profiling import profile_option
+from statement_converter._sniff import ContentSample
+from statement_converter._source import StatementSource, convert_stdio, open_output, open_text_source
 
 
 DATETIME_PATTERN = re.compile(r"^\d{2}/\d{2}/\d{4} \d{2}:\d{2}:\d{2}$")
@@ -17,6 +22,7 @@ def unescape_pdf_string(raw: str) -> str:
     return raw.replace(r"\(", "(").replace(r"\)", ")").replace(r"\\", "\\")
 
 
+@stage("extract")
 def extract_pages(pdf_text: str) -> list[list[tuple[float, float, str]]]:
     pages: list[list[tuple[float, float, str]]] = []
 
@@ -35,6 +41,7 @@ def extract_pages(pdf_text: str) -> list[list[tuple[float, float, str]]]:
             if text:
                 page_elements.append((float(position_match.group(2)), float(position_match.group(1)), text))
 
+        count("text_elements", len(page_elements))
         if any(text == "Data da Operação" for _, _, text in page_elements):
             pages.append(page_elements)
 
@@ -49,6 +56,7 @@ def parse_ifood_amount(value_text: str) -> Decimal:
     return Decimal(cleaned)
 
 
+@stage("parse")
 def parse_transactions(pages: list[list[tuple[float, float, str]]]) -> list[StatementTransaction]:
     transactions: list[StatementTransaction] = []
     for elements in pages:
@@ -56,6 +64,7 @@ def parse_transactions(pages: list[list[tuple[float, float, str]]]) -> list[Stat
 
         for y, x, text in elements:
             rows.setdefault(y, []).append((x, text))
+        count("rows", len(rows))
 
         for y in sorted(rows.keys(), reverse=True):
             cells = sorted(rows[y], key=lambda item: item[0])
@@ -83,9 +92,11 @@ def parse_transactions(pages: list[list[tuple[float, float, str]]]) -> list[Stat
     return sorted(transactions, key=lambda transaction: transaction.posted_at)
 
 
-def parse_pdf(input_path: str | Path) -> StatementData:
-    pdf_text = Path(input_path).read_text(encoding="latin1")
+def parse_pdf(source: StatementSource) -> StatementData:
+    with open_text_source(source, encoding="latin1") as pdf_file:
+        pdf_text = pdf_file.read()
     pages = extract_pages(pdf_text)
+    count("pages", len(pages))
     transactions = parse_transactions(pages)
 
     return StatementData(
@@ -102,29 +113,51 @@ def parse_pdf(input_path: str | Path) -> StatementData:
 
 def process_pdf(input_path: str | Path, output_path: str | Path) -> None:
     statement = parse_pdf(input_path)
-    Path(output_path).write_text(build_ofx(statement), encoding="utf-8")
+    with open_output(output_path) as output:
+        write_ofx(statement, output)
     print(f"OFX successfully generated: {output_path} ({len(statement.transactions)} transactions)")
 
 
+@profile_option
 def main() -> None:
     if len(sys.argv) < 3:
         script_name = Path(sys.argv[0]).name
         print(f"Usage: {script_name} <input.pdf> <output.ofx>")
         sys.exit(1)
 
-    process_pdf(Path(sys.argv[1]), Path(sys.argv[2]))
+    input_path, output_path = Path(sys.argv[1]), Path(sys.argv[2])
+    if not convert_stdio(_write_stream, input_path, output_path):
+        process_pdf(input_path, output_path)
+
+
+def matches_signature(sample: ContentSample) -> bool:
+    if not sample.is_pdf:
+        return False
+    pdf_text = sample.content.decode("latin1").replace("\r\n", "\n").replace("\r", "\n")
+    return bool(extract_pages(pdf_text))
 
 
 def _run(args: argparse.Namespace) -> None:
     process_pdf(args.input_path, args.output_path)
 
 
+def _write_stream(source: StatementSource, args: argparse.Namespace, output: BinaryIO) -> None:
+    write_ofx(parse_pdf(source), output)
+
+
+def _parse_statement(source: StatementSource, args: argparse.Namespace) -> StatementData:
+    return parse_pdf(source)
+
+
 def register_converters(registry) -> None:
     registry.register(
         input_format="pdf",
         output_format="ofx",
         model="ifood",
         description="iFood PDF para OFX",
+        stream_handler=_write_stream,
+        statement_parser=_parse_statement,
+        signature=matches_signature,
     )(_run)
 
 
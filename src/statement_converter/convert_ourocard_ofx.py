@@ -1,14 +1,24 @@
 import sys
 import csv
-from ofxparse import OfxParser
 from pathlib import Path
 
-def parse_input(input_path: str | Path) -> list[dict]:
+from statement_converter._metrics import count, stage
+from statement_converter._profiling import profile_option
+from statement_converter._source import StatementSource, convert_stdio, open_text_source, text_output
+
+DEPENDENCIES = ("ofxparse",)
+FIELDNAMES = ["Type", "Date", "Amount", "Id", "Memo"]
+
+
+@stage("parse")
+def parse_input(source: StatementSource) -> list[dict]:
     """
-    Parse the OFX input file and return a list of transaction dictionaries.
+    Parse the OFX input (path, bytes or binary file) and return a list of transaction dictionaries.
     Each transaction contains: Date, Payee, Memo, and Amount.
     """
-    with open(input_path, "r", encoding="utf-8") as f:
+    from ofxparse import OfxParser
+
+    with open_text_source(source, encoding="utf-8") as f:
         ofx = OfxParser.parse(f)
 
     transactions = []
@@ -20,6 +30,7 @@ def parse_input(input_path: str | Path) -> list[dict]:
     if not transactions_list:
         return transactions
 
+    count("rows", len(transactions_list))
     for t in transactions_list:
         transactions.append({
             "Type": t.type or "",
@@ -32,6 +43,18 @@ def parse_input(input_path: str | Path) -> list[dict]:
     return transactions
 
 
+@stage("render")
+def write_csv(transactions: list[dict], csvfile) -> None:
+    # build fieldnames preserving first-seen order using dict.fromkeys
+    # fieldnames = list(dict.fromkeys(k for txn in transactions for k in txn.keys()))
+
+    # fieldnames = ["Date", "Payee", "Memo", "Amount"]
+    writer = csv.DictWriter(csvfile, fieldnames=FIELDNAMES, delimiter=";")
+    writer.writeheader()
+    writer.writerows(transactions)
+    count("transactions", len(transactions))
+
+
 def process_csv(input_path: str | Path, output_path: str | Path):
     """
     Process the OFX file and generate the corresponding CSV output.
@@ -39,18 +62,12 @@ def process_csv(input_path: str | Path, output_path: str | Path):
     transactions = parse_input(input_path)
 
     with open(output_path, "w", newline="", encoding="utf-8") as csvfile:
-        fieldnames = ["Type", "Date", "Amount", "Id", "Memo"]
-        # build fieldnames preserving first-seen order using dict.fromkeys
-        # fieldnames = list(dict.fromkeys(k for txn in transactions for k in txn.keys()))
-
-        # fieldnames = ["Date", "Payee", "Memo", "Amount"]
-        writer = csv.DictWriter(csvfile, fieldnames=fieldnames, delimiter=";")
-        writer.writeheader()
-        writer.writerows(transactions)
+        write_csv(transactions, csvfile)
 
     print(f"CSV file successfully generated: {output_path}")
 
 
+@profile_option
 def main():
     """Main function to handle command-line arguments."""
     if len(sys.argv) < 3:
@@ -61,19 +78,33 @@ def main():
         input_file = Path(sys.argv[1])
         output_file = Path(sys.argv[2])
 
-        process_csv(input_file, output_file)
+        if not convert_stdio(_write_stream, input_file, output_file):
+            process_csv(input_file, output_file)
+
+
+def matches_signature(sample):
+    header = sample.text.upper()
+    return "<OFX>" in header and "<CREDITCARDMSGSRSV1>" in header
 
 
 def _run(args):
     process_csv(args.input_path, args.output_path)
 
 
+def _write_stream(source, args, output):
+    transactions = parse_input(source)
+    with text_output(output) as csvfile:
+        write_csv(transactions, csvfile)
+
+
 def register_converters(registry):
     registry.register(
         input_format="ofx",
         output_format="csv",
         model="ourocard",
         description="Ourocard OFX para CSV",
+        stream_handler=_write_stream,
+        signature=matches_signature,
     )(_run)
 
 
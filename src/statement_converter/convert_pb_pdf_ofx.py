@@ -3,18 +3,22 @@ import re
 from dataclasses import dataclass
 from decimal import Decimal
 from pathlib import Path
+from typing import BinaryIO
 
-from pypdf import PdfReader
-
+from statement_converter._metrics import count, stage
 from statement_converter._ofx_common import (
     StatementData,
     StatementTransaction,
-    build_ofx,
+    write_ofx,
     parse_brl_amount,
     parse_datetime_br,
 )
+from statement_converter._profiling import profile_option
+from statement_converter._sniff import ContentSample
+from statement_converter._source import StatementSource, convert_stdio, open_output, seekable_source
 
 
+DEPENDENCIES = ("pypdf",)
 DATE_PATTERN = re.compile(r"(\d{2}/\d{2}/\d{4})\s+Disponível\b")
 ACCOUNT_ID_PATTERN = re.compile(r"(\d+)\s+Matrícula\b")
 NET_DEPOSIT_PATTERN = re.compile(r"R\$\s*([\d.]+,\d{2})\s+Valor Líquido Depositado\b", re.IGNORECASE)
@@ -34,10 +38,14 @@ def normalize_lines(text: str) -> list[str]:
     return [line.strip() for line in text.splitlines() if line.strip()]
 
 
-def extract_pdf_text(input_path: str | Path) -> str:
-    reader = PdfReader(str(input_path))
+@stage("extract")
+def extract_pdf_text(source: StatementSource) -> str:
+    from pypdf import PdfReader
+
+    reader = PdfReader(seekable_source(source))
     if reader.is_encrypted:
         reader.decrypt("")
+    count("pages", len(reader.pages))
     return "\n".join((page.extract_text() or "") for page in reader.pages)
 
 
@@ -136,9 +144,11 @@ def parse_table_transactions(lines: list[str], posted_at) -> list[StatementTrans
     return transactions
 
 
+@stage("parse")
 def parse_statement_text(text: str) -> StatementData:
     posted_at = parse_posted_at(text)
     lines = normalize_lines(text)
+    count("rows", len(lines))
     transactions = parse_table_transactions(lines, posted_at)
     transactions.append(
         StatementTransaction(
@@ -162,13 +172,14 @@ def parse_statement_text(text: str) -> StatementData:
     )
 
 
-def parse_pdf(input_path: str | Path) -> StatementData:
-    return parse_statement_text(extract_pdf_text(input_path))
+def parse_pdf(source: StatementSource) -> StatementData:
+    return parse_statement_text(extract_pdf_text(source))
 
 
 def process_pdf(input_path: str | Path, output_path: str | Path) -> None:
     statement = parse_pdf(input_path)
-    Path(output_path).write_text(build_ofx(statement), encoding="utf-8")
+    with open_output(output_path) as output:
+        write_ofx(statement, output)
     print(f"OFX successfully generated: {output_path} ({len(statement.transactions)} transactions)")
 
 
@@ -179,21 +190,39 @@ def build_argument_parser() -> argparse.ArgumentParser:
     return parser
 
 
+@profile_option
 def main() -> None:
     args = build_argument_parser().parse_args()
-    process_pdf(args.input_path, args.output_path)
+    if not convert_stdio(_write_stream, args.input_path, args.output_path):
+        process_pdf(args.input_path, args.output_path)
+
+
+def matches_signature(sample: ContentSample) -> bool:
+    text = sample.pdf_first_page_text()
+    return text is not None and "Matrícula" in text and bool(NET_DEPOSIT_PATTERN.search(text))
 
 
 def _run(args: argparse.Namespace) -> None:
     process_pdf(args.input_path, args.output_path)
 
 
+def _write_stream(source: StatementSource, args: argparse.Namespace, output: BinaryIO) -> None:
+    write_ofx(parse_pdf(source), output)
+
+
+def _parse_statement(source: StatementSource, args: argparse.Namespace) -> StatementData:
+    return parse_pdf(source)
+
+
 def register_converters(registry) -> None:
     registry.register(
         input_format="pdf",
         output_format="ofx",
         model="pb",
         description="PB contracheque PDF para OFX",
+        stream_handler=_write_stream,
+        statement_parser=_parse_statement,
+        signature=matches_signature,
     )(_run)
 
 
@@ -1,42 +1,91 @@
 import argparse
+from collections.abc import Callable
+from types import ModuleType
+from typing import BinaryIO, TypeVar
 
-from statement_converter.convert_picpay_pdf_ofx_2024 import process_pdf as process_picpay_pdf_ofx_2024
-from statement_converter.convert_picpay_pdf_ofx_2025 import process_pdf as process_picpay_pdf_ofx_2025
+from statement_converter import convert_picpay_pdf_ofx_2024, convert_picpay_pdf_ofx_2025
+from statement_converter._ofx_common import StatementData, write_ofx
+from statement_converter._profiling import profile_option
+from statement_converter._sniff import ContentSample
+from statement_converter._source import StatementSource, convert_stdio, is_path_source, read_source_bytes
 
 
-def process_pdf(input_path, output_path) -> None:
-    errors: list[str] = []
+_Result = TypeVar("_Result")
+
+LAYOUTS = (convert_picpay_pdf_ofx_2025, convert_picpay_pdf_ofx_2024)
+LAYOUT_LABELS = {convert_picpay_pdf_ofx_2025: "picpay-2025", convert_picpay_pdf_ofx_2024: "picpay-2024"}
+
 
-    for processor, label in (
-        (process_picpay_pdf_ofx_2025, "picpay-2025"),
-        (process_picpay_pdf_ofx_2024, "picpay-2024"),
-    ):
+def detect_layout(source: StatementSource) -> ModuleType | None:
+    # A assinatura de cada layout olha apenas o inicio do PDF; o arquivo inteiro
+    # so e lido se nenhuma delas reconhecer a amostra.
+    sample = ContentSample.from_source(source)
+    for deep in (False, True):
+        sample.deep = deep
+        for layout in LAYOUTS:
+            if layout.matches_signature(sample):
+                return layout
+    return None
+
+
+def _try_layouts(attempt: Callable[[ModuleType], _Result]) -> _Result:
+    # Sem assinatura reconhecida (texto codificado de outra forma, em arrays TJ
+    # ou com escapes) cada layout ainda e tentado pelo parse, como antes.
+    errors: list[str] = []
+    for layout in LAYOUTS:
         try:
-            processor(input_path, output_path)
-            return
+            return attempt(layout)
         except ValueError as exc:
-            errors.append(f"{label}: {exc}")
+            errors.append(f"{LAYOUT_LABELS[layout]}: {exc}")
 
-    joined_errors = "; ".join(errors) if errors else "nenhum layout compatível foi reconhecido"
     raise ValueError(
         "Nao foi possivel identificar automaticamente o layout do PDF do PicPay. "
-        f"Tentativas: {joined_errors}"
+        f"Tentativas: {'; '.join(errors)}"
     )
 
 
+def parse_pdf(source: StatementSource) -> StatementData:
+    # Um objeto binario so pode ser lido uma vez; deteccao e parse recebem os mesmos bytes.
+    if not is_path_source(source):
+        source = read_source_bytes(source)
+    layout = detect_layout(source)
+    if layout is not None:
+        return layout.parse_pdf(source)
+    return _try_layouts(lambda layout: layout.parse_pdf(source))
+
+
+def process_pdf(input_path, output_path) -> None:
+    layout = detect_layout(input_path)
+    if layout is not None:
+        layout.process_pdf(input_path, output_path)
+        return
+    _try_layouts(lambda layout: layout.process_pdf(input_path, output_path))
+
+
 def _run(args: argparse.Namespace) -> None:
     process_pdf(args.input_path, args.output_path)
 
 
+def _write_stream(source: StatementSource, args: argparse.Namespace, output: BinaryIO) -> None:
+    write_ofx(parse_pdf(source), output)
+
+
+def _parse_statement(source: StatementSource, args: argparse.Namespace) -> StatementData:
+    return parse_pdf(source)
+
+
 def register_converters(registry) -> None:
     registry.register(
         input_format="pdf",
         output_format="ofx",
         model="picpay",
         description="PicPay PDF para OFX com autodeteccao de layout",
+        stream_handler=_write_stream,
+        statement_parser=_parse_statement,
     )(_run)
 
 
+@profile_option
 def main() -> None:
     import sys
     from pathlib import Path
@@ -46,7 +95,9 @@ def main() -> None:
         print(f"Usage: {script_name} <input.pdf> <output.ofx>")
         sys.exit(1)
 
-    process_pdf(Path(sys.argv[1]), Path(sys.argv[2]))
+    input_path, output_path = Path(sys.argv[1]), Path(sys.argv[2])
+    if not convert_stdio(_write_stream, input_path, output_path):
+        process_pdf(input_path, output_path)
 
 
 if __name__ == "__main__":
@@ -5,14 +5,19 @@ import zlib
 from dataclasses import dataclass
 from datetime import datetime
 from pathlib import Path
+from typing import BinaryIO
 
+from statement_converter._metrics import count, span, stage
 from statement_converter._ofx_common import (
     StatementData,
     StatementTransaction,
-    build_ofx,
+    write_ofx,
     parse_brl_amount,
     parse_datetime_br,
 )
+from statement_converter._profiling import profile_option
+from statement_converter._sniff import ContentSample
+from statement_converter._source import StatementSource, convert_stdio, open_output, read_source_bytes
 
 
 DATE_PATTERN = re.compile(r"^\d{2}/\d{2}/\d{4}$")
@@ -23,6 +28,8 @@ TEXT_PATTERN = re.compile(
     rb"([\-0-9.]+)\s+([\-0-9.]+)\s+Td\s+\((.*?)\)\s+Tj",
     re.S,
 )
+# O titulo da secao aparece em UTF-16 ou latin1, conforme a versao do gerador do PDF.
+SIGNATURE_MARKERS = tuple(b"(" + "MOVIMENTAÇÕES".encode(encoding) + b")" for encoding in ("utf-16-be", "latin1"))
 
 
 @dataclass(frozen=True)
@@ -41,15 +48,18 @@ def decode_pdf_string(raw: bytes) -> str:
     return text.replace("\x0b", " ").replace("\u200b", "").strip()
 
 
+@stage("extract")
 def extract_text_elements(pdf_bytes: bytes) -> list[list[PdfTextElement]]:
     pages: list[list[PdfTextElement]] = []
 
     for stream_match in STREAM_PATTERN.finditer(pdf_bytes):
         raw_stream = stream_match.group(1)
         try:
-            stream = zlib.decompress(raw_stream)
+            with span("decompress"):
+                stream = zlib.decompress(raw_stream)
         except zlib.error:
             continue
+        count("streams")
 
         page_elements: list[PdfTextElement] = []
         for text_match in TEXT_PATTERN.finditer(stream):
@@ -59,6 +69,7 @@ def extract_text_elements(pdf_bytes: bytes) -> list[list[PdfTextElement]]:
             if text:
                 page_elements.append(PdfTextElement(x=x, y=y, text=text))
 
+        count("text_elements", len(page_elements))
         if any(element.text == "MOVIMENTAÇÕES" for element in page_elements):
             pages.append(page_elements)
 
@@ -140,6 +151,7 @@ def extract_statement_metadata(pages: list[list[PdfTextElement]]) -> StatementDa
     )
 
 
+@stage("parse")
 def parse_transactions_from_page(page_elements: list[PdfTextElement]) -> list[StatementTransaction]:
     transactions: list[StatementTransaction] = []
     index = 0
@@ -150,6 +162,7 @@ def parse_transactions_from_page(page_elements: list[PdfTextElement]) -> list[St
         if not DATE_PATTERN.match(element.text):
             index += 1
             continue
+        count("rows")
 
         if index + 3 >= len(page_elements):
             break
@@ -195,9 +208,10 @@ def parse_transactions_from_page(page_elements: list[PdfTextElement]) -> list[St
     return transactions
 
 
-def parse_pdf(input_path: str | Path) -> StatementData:
-    pdf_bytes = Path(input_path).read_bytes()
+def parse_pdf(source: StatementSource) -> StatementData:
+    pdf_bytes = read_source_bytes(source)
     pages = extract_text_elements(pdf_bytes)
+    count("pages", len(pages))
     statement = extract_statement_metadata(pages)
 
     transactions: list[StatementTransaction] = []
@@ -218,11 +232,12 @@ def parse_pdf(input_path: str | Path) -> StatementData:
 
 def process_pdf(input_path: str | Path, output_path: str | Path) -> None:
     statement = parse_pdf(input_path)
-    ofx_content = build_ofx(statement)
-    Path(output_path).write_text(ofx_content, encoding="utf-8")
+    with open_output(output_path) as output:
+        write_ofx(statement, output)
     print(f"OFX successfully generated: {output_path} ({len(statement.transactions)} transactions)")
 
 
+@profile_option
 def main() -> None:
     if len(sys.argv) < 3:
         script_name = Path(sys.argv[0]).name
@@ -231,19 +246,35 @@ def main() -> None:
 
     input_file = Path(sys.argv[1])
     output_file = Path(sys.argv[2])
-    process_pdf(input_file, output_file)
+    if not convert_stdio(_write_stream, input_file, output_file):
+        process_pdf(input_file, output_file)
+
+
+def matches_signature(sample: ContentSample) -> bool:
+    return any(marker in stream for stream in sample.pdf_streams() for marker in SIGNATURE_MARKERS)
 
 
 def _run(args: argparse.Namespace) -> None:
     process_pdf(args.input_path, args.output_path)
 
 
+def _write_stream(source: StatementSource, args: argparse.Namespace, output: BinaryIO) -> None:
+    write_ofx(parse_pdf(source), output)
+
+
+def _parse_statement(source: StatementSource, args: argparse.Namespace) -> StatementData:
+    return parse_pdf(source)
+
+
 def register_converters(registry) -> None:
     registry.register(
         input_format="pdf",
         output_format="ofx",
         model="picpay-2024",
         description="PicPay layout 2022-2024 PDF para OFX",
+        stream_handler=_write_stream,
+        statement_parser=_parse_statement,
+        signature=matches_signature,
     )(_run)
 
 
@@ -2,17 +2,23 @@ import argparse
 import re
 import sys
 import zlib
+from collections.abc import Iterable
 from dataclasses import dataclass
 from datetime import datetime
 from pathlib import Path
+from typing import BinaryIO
 
+from statement_converter._metrics import count, span, stage
 from statement_converter._ofx_common import (
     StatementData,
     StatementTransaction,
-    build_ofx,
+    write_ofx,
     parse_brl_amount,
     parse_datetime_br,
 )
+from statement_converter._profiling import profile_option
+from statement_converter._sniff import ContentSample
+from statement_converter._source import StatementSource, convert_stdio, open_output, read_source_bytes
 
 
 TEXT_BLOCK_PATTERN = re.compile(rb"BT\s*(.*?)\s*ET", re.S)
@@ -20,6 +26,7 @@ DATE_HEADER_PATTERN = re.compile(r"^\d{1,2} de [a-zç]+(?: de)? \d{4}$")
 TIME_PATTERN = re.compile(r"^\d{2}:\d{2}$")
 AMOUNT_PATTERN = re.compile(r"^[+\-−]R\$ \d[\d.,]*$")
 GENERATED_AT_PATTERN = re.compile(r"(\d{2}/\d{2}/\d{4}) às (\d{2}:\d{2})")
+SIGNATURE_MARKERS = ("Extrato de conta", "Hora")
 
 
 @dataclass(frozen=True)
@@ -63,20 +70,29 @@ def unescape_pdf_string(raw: bytes) -> bytes:
 
 
 def build_font_maps(pdf_bytes: bytes) -> dict[str, dict[int, str]]:
-    cmap_streams: list[dict[int, str]] = []
+    streams: list[bytes] = []
 
     for stream_match in re.finditer(rb"stream\r?\n(.*?)\r?\nendstream", pdf_bytes, re.S):
         raw_stream = stream_match.group(1)
         try:
-            stream = zlib.decompress(raw_stream).decode("latin1")
+            with span("decompress"):
+                streams.append(zlib.decompress(raw_stream))
         except Exception:
             continue
+        count("streams")
+
+    return build_font_maps_from_streams(streams)
 
-        if "begincmap" not in stream:
+
+def build_font_maps_from_streams(streams: Iterable[bytes]) -> dict[str, dict[int, str]]:
+    cmap_streams: list[dict[int, str]] = []
+
+    for raw_stream in streams:
+        if b"begincmap" not in raw_stream:
             continue
 
         mapping: dict[int, str] = {}
-        for line in stream.splitlines():
+        for line in raw_stream.decode("latin1").splitlines():
             match = re.match(r"<([0-9A-Fa-f]+)><([0-9A-Fa-f]+)><([0-9A-Fa-f]+)>", line.strip())
             if not match:
                 continue
@@ -109,6 +125,7 @@ def decode_pdf_text(raw: bytes, font: str, font_maps: dict[str, dict[int, str]])
     return "".join(chars).strip()
 
 
+@stage("extract")
 def extract_text_elements(pdf_bytes: bytes) -> list[list[PdfTextElement]]:
     font_maps = build_font_maps(pdf_bytes)
     pages: list[list[PdfTextElement]] = []
@@ -116,9 +133,11 @@ def extract_text_elements(pdf_bytes: bytes) -> list[list[PdfTextElement]]:
     for stream_match in re.finditer(rb"stream\r?\n(.*?)\r?\nendstream", pdf_bytes, re.S):
         raw_stream = stream_match.group(1)
         try:
-            stream = zlib.decompress(raw_stream)
+            with span("decompress"):
+                stream = zlib.decompress(raw_stream)
         except zlib.error:
             continue
+        count("streams")
 
         page_elements: list[PdfTextElement] = []
 
@@ -152,6 +171,7 @@ def extract_text_elements(pdf_bytes: bytes) -> list[list[PdfTextElement]]:
                 )
             )
 
+        count("text_elements", len(page_elements))
         has_2025_layout_markers = any(
             element.text == "Extrato de conta"
             or element.text == "Hora"
@@ -245,6 +265,7 @@ def find_nearby_text(
     return candidates[0].text
 
 
+@stage("parse")
 def parse_transactions_from_page(page_elements: list[PdfTextElement]) -> list[StatementTransaction]:
     transactions: list[StatementTransaction] = []
     current_date: datetime | None = None
@@ -256,6 +277,7 @@ def parse_transactions_from_page(page_elements: list[PdfTextElement]) -> list[St
 
         if not TIME_PATTERN.match(element.text) or current_date is None:
             continue
+        count("rows")
 
         txn_type = find_nearby_text(page_elements, x_min=100, x_max=180, y_center=element.y)
         amount_text = find_nearby_text(page_elements, x_min=490, x_max=540, y_center=element.y)
@@ -280,9 +302,10 @@ def parse_transactions_from_page(page_elements: list[PdfTextElement]) -> list[St
     return transactions
 
 
-def parse_pdf(input_path: str | Path) -> StatementData:
-    pdf_bytes = Path(input_path).read_bytes()
+def parse_pdf(source: StatementSource) -> StatementData:
+    pdf_bytes = read_source_bytes(source)
     pages = extract_text_elements(pdf_bytes)
+    count("pages", len(pages))
     metadata = extract_statement_metadata(pages)
 
     transactions: list[StatementTransaction] = []
@@ -303,29 +326,70 @@ def parse_pdf(input_path: str | Path) -> StatementData:
 
 def process_pdf(input_path: str | Path, output_path: str | Path) -> None:
     statement = parse_pdf(input_path)
-    Path(output_path).write_text(build_ofx(statement), encoding="utf-8")
+    with open_output(output_path) as output:
+        write_ofx(statement, output)
     print(f"OFX successfully generated: {output_path} ({len(statement.transactions)} transactions)")
 
 
+@profile_option
 def main() -> None:
     if len(sys.argv) < 3:
         script_name = Path(sys.argv[0]).name
         print(f"Usage: {script_name} <input.pdf> <output.ofx>")
         sys.exit(1)
 
-    process_pdf(Path(sys.argv[1]), Path(sys.argv[2]))
+    input_path, output_path = Path(sys.argv[1]), Path(sys.argv[2])
+    if not convert_stdio(_write_stream, input_path, output_path):
+        process_pdf(input_path, output_path)
+
+
+def encode_pdf_text(text: str, font_map: dict[int, str]) -> bytes | None:
+    codes = {char: code for code, char in font_map.items()}
+    if any(char not in codes for char in text):
+        return None
+    data = b"".join(codes[char].to_bytes(2, "big") for char in text)
+    return data.replace(b"\\", b"\\\\").replace(b"(", rb"\(").replace(b")", rb"\)")
+
+
+def matches_signature(sample: ContentSample) -> bool:
+    streams = sample.pdf_streams()
+    try:
+        font_maps = build_font_maps_from_streams(streams)
+    except ValueError:
+        return False
+
+    # Os textos passam pelos mapas de fonte; os marcadores sao codificados com
+    # eles e procurados direto nos streams, sem montar os elementos da pagina.
+    markers = [
+        b"(" + encoded + b")Tj"
+        for font_map in font_maps.values()
+        for marker in SIGNATURE_MARKERS
+        if (encoded := encode_pdf_text(marker, font_map)) is not None
+    ]
+    return any(marker in stream for stream in streams for marker in markers)
 
 
 def _run(args: argparse.Namespace) -> None:
     process_pdf(args.input_path, args.output_path)
 
 
+def _write_stream(source: StatementSource, args: argparse.Namespace, output: BinaryIO) -> None:
+    write_ofx(parse_pdf(source), output)
+
+
+def _parse_statement(source: StatementSource, args: argparse.Namespace) -> StatementData:
+    return parse_pdf(source)
+
+
 def register_converters(registry) -> None:
     registry.register(
         input_format="pdf",
         output_format="ofx",
         model="picpay-2025",
         description="PicPay layout 2025 PDF para OFX",
+        stream_handler=_write_stream,
+        statement_parser=_parse_statement,
+        signature=matches_signature,
     )(_run)
 
 
@@ -1,20 +1,30 @@
 import sys
 from pathlib import Path
 
+from statement_converter._metrics import count, span
+from statement_converter._profiling import profile_option
 from statement_converter._rico_cc_common import parse_input_dataframe
+from statement_converter._source import StatementSource, convert_stdio
 
 
-def parse_input(input_path: str | Path):
-    return parse_input_dataframe(input_path)
+DEPENDENCIES = ("pandas",)
+
+
+def parse_input(source: StatementSource):
+    df = parse_input_dataframe(source)
+    count("transactions", len(df))
+    return df
 
 def process_csv(input_file, output_file):
     """Parse and write output CSV."""
 
     df = parse_input(input_file)
     # Save the cleaned data to CSV with semicolon separator
-    df.to_csv(output_file, index=False, sep=";", encoding="utf-8-sig")
+    with span("render"):
+        df.to_csv(output_file, index=False, sep=";", encoding="utf-8-sig")
     print(f"Conversion completed successfully. Output file: {output_file}")
 
+@profile_option
 def main():
     """Main function to handle command-line arguments."""
     if len(sys.argv) < 3:
@@ -25,13 +35,20 @@ def main():
         input_file = Path(sys.argv[1])
         output_file = Path(sys.argv[2])
 
-        process_csv(input_file, output_file)
+        if not convert_stdio(_write_stream, input_file, output_file):
+            process_csv(input_file, output_file)
 
 
 def _run(args):
     process_csv(args.input_path, args.output_path)
 
 
+def _write_stream(source, args, output):
+    df = parse_input(source)
+    with span("render"):
+        output.write(df.to_csv(index=False, sep=";").encode("utf-8-sig"))
+
+
 def register_converters(registry):
     registry.register(
         input_format="xlsx",
@@ -39,6 +56,7 @@ def register_converters(registry):
         model="rico-csv",
         description="Rico XLSX para CSV",
         aliases=("rico-xlsx-csv",),
+        stream_handler=_write_stream,
     )(_run)
 
 if __name__ == "__main__":
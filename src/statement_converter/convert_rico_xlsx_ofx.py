@@ -2,9 +2,16 @@ import argparse
 import sys
 from datetime import datetime
 from pathlib import Path
+from typing import BinaryIO
 
-from statement_converter._ofx_common import StatementData, StatementTransaction, build_ofx
-from statement_converter._rico_cc_common import RicoStatementRow, parse_statement
+from statement_converter._ofx_common import StatementData, StatementTransaction, write_ofx
+from statement_converter._profiling import profile_option
+from statement_converter._rico_cc_common import RicoStatementRow, is_rico_workbook, parse_statement
+from statement_converter._sniff import ContentSample
+from statement_converter._source import StatementSource, convert_stdio, open_output
+
+
+DEPENDENCIES = ("pandas",)
 
 
 def _posted_at(row: RicoStatementRow) -> datetime:
@@ -14,8 +21,8 @@ def _posted_at(row: RicoStatementRow) -> datetime:
     return datetime.combine(base_date, datetime.min.time())
 
 
-def parse_input(input_path: str | Path) -> StatementData:
-    statement = parse_statement(input_path)
+def parse_input(source: StatementSource) -> StatementData:
+    statement = parse_statement(source)
 
     transactions = [
         StatementTransaction(
@@ -45,23 +52,40 @@ def parse_input(input_path: str | Path) -> StatementData:
 
 def process_ofx(input_path: str | Path, output_path: str | Path) -> None:
     statement = parse_input(input_path)
-    Path(output_path).write_text(build_ofx(statement), encoding="utf-8")
+    with open_output(output_path) as output:
+        write_ofx(statement, output)
     print(f"OFX successfully generated: {output_path} ({len(statement.transactions)} transactions)")
 
 
+@profile_option
 def main() -> None:
     if len(sys.argv) < 3:
         script_name = Path(sys.argv[0]).name
         print(f"Usage: {script_name} <input.xlsx> <output.ofx>")
         sys.exit(1)
 
-    process_ofx(Path(sys.argv[1]), Path(sys.argv[2]))
+    input_path, output_path = Path(sys.argv[1]), Path(sys.argv[2])
+    if not convert_stdio(_write_stream, input_path, output_path):
+        process_ofx(input_path, output_path)
+
+
+def matches_signature(sample: ContentSample) -> bool:
+    data = sample.data()
+    return sample.is_zip and data is not None and is_rico_workbook(data)
 
 
 def _run(args: argparse.Namespace) -> None:
     process_ofx(args.input_path, args.output_path)
 
 
+def _write_stream(source: StatementSource, args: argparse.Namespace, output: BinaryIO) -> None:
+    write_ofx(parse_input(source), output)
+
+
+def _parse_statement(source: StatementSource, args: argparse.Namespace) -> StatementData:
+    return parse_input(source)
+
+
 def register_converters(registry) -> None:
     registry.register(
         input_format="xlsx",
@@ -69,6 +93,9 @@ def register_converters(registry) -> None:
         model="rico-ofx",
         description="Rico XLSX para OFX",
         aliases=("rico-xlsx-ofx",),
+        stream_handler=_write_stream,
+        statement_parser=_parse_statement,
+        signature=matches_signature,
     )(_run)
 
 
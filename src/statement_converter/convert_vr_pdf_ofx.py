@@ -5,12 +5,19 @@ import zlib
 from datetime import datetime
 from decimal import Decimal
 from pathlib import Path
+from typing import BinaryIO
 
-from statement_converter._ofx_common import StatementData, StatementTransaction, build_ofx
+from statement_converter._metrics import count, span, stage
+from statement_converter._ofx_common import StatementData, StatementTransaction, write_ofx
+from statement_converter._profiling import profile_option
+from statement_converter._sniff import ContentSample
+from statement_converter._source import StatementSource, convert_stdio, open_output, read_source_bytes
 
 
 DATETIME_PATTERN = re.compile(r"^\d{2}/\d{2}/\d{4} \d{2}:\d{2}:\d{2}$")
 DATE_ONLY_PATTERN = re.compile(r"^\d{2}/\d{2}/\d{2}$")
+SIGNATURE_DATE_PATTERN = re.compile(rb"\(\s*\d{2}/\d{2}/(?:\d{4} \d{2}:\d{2}:\d{2}|\d{2})\s*\)")
+SIGNATURE_MARKERS = (b"DATA_HORA", b"OPERACAO", b"Consumo Confirmado", "Disponibilização".encode("latin1"))
 
 
 def unescape_pdf_string(raw: bytes) -> bytes:
@@ -44,15 +51,18 @@ def decode_text_block(block: bytes) -> str:
     return ""
 
 
+@stage("extract")
 def extract_text_elements(pdf_bytes: bytes) -> list[list[tuple[float, float, str]]]:
     pages: list[list[tuple[float, float, str]]] = []
 
     for stream_match in re.finditer(rb"stream\r?\n(.*?)\r?\nendstream", pdf_bytes, re.S):
         raw_stream = stream_match.group(1)
         try:
-            stream = zlib.decompress(raw_stream)
+            with span("decompress"):
+                stream = zlib.decompress(raw_stream)
         except zlib.error:
             continue
+        count("streams")
 
         page_elements: list[tuple[float, float, str]] = []
         for block_match in re.finditer(rb"BT\s*(.*?)\s*ET", stream, re.S):
@@ -71,6 +81,7 @@ def extract_text_elements(pdf_bytes: bytes) -> list[list[tuple[float, float, str
                     )
                 )
 
+        count("text_elements", len(page_elements))
         has_transaction_rows = any(
             DATETIME_PATTERN.match(text) or DATE_ONLY_PATTERN.match(text) for _, _, text in page_elements
         )
@@ -115,6 +126,7 @@ def extract_metadata(first_page: list[tuple[float, float, str]]) -> tuple[str, s
     return account_id, generated_at
 
 
+@stage("parse")
 def parse_transactions(pages: list[list[tuple[float, float, str]]]) -> list[StatementTransaction]:
     transactions: list[StatementTransaction] = []
 
@@ -122,6 +134,7 @@ def parse_transactions(pages: list[list[tuple[float, float, str]]]) -> list[Stat
         rows: dict[float, list[tuple[float, str]]] = {}
         for y, x, text in page:
             rows.setdefault(y, []).append((x, text))
+        count("rows", len(rows))
 
         for y in sorted(rows.keys(), reverse=True):
             cells = sorted(rows[y], key=lambda item: item[0])
@@ -166,9 +179,10 @@ def parse_transactions(pages: list[list[tuple[float, float, str]]]) -> list[Stat
     return transactions
 
 
-def parse_pdf(input_path: str | Path) -> StatementData:
-    pdf_bytes = Path(input_path).read_bytes()
+def parse_pdf(source: StatementSource) -> StatementData:
+    pdf_bytes = read_source_bytes(source)
     pages = extract_text_elements(pdf_bytes)
+    count("pages", len(pages))
     if not pages:
         raise ValueError("Nenhuma página do extrato VR foi identificada no PDF.")
 
@@ -193,29 +207,51 @@ def parse_pdf(input_path: str | Path) -> StatementData:
 
 def process_pdf(input_path: str | Path, output_path: str | Path) -> None:
     statement = parse_pdf(input_path)
-    Path(output_path).write_text(build_ofx(statement), encoding="utf-8")
+    with open_output(output_path) as output:
+        write_ofx(statement, output)
     print(f"OFX successfully generated: {output_path} ({len(statement.transactions)} transactions)")
 
 
+@profile_option
 def main() -> None:
     if len(sys.argv) < 3:
         script_name = Path(sys.argv[0]).name
         print(f"Usage: {script_name} <input.pdf> <output.ofx>")
         sys.exit(1)
 
-    process_pdf(Path(sys.argv[1]), Path(sys.argv[2]))
+    input_path, output_path = Path(sys.argv[1]), Path(sys.argv[2])
+    if not convert_stdio(_write_stream, input_path, output_path):
+        process_pdf(input_path, output_path)
+
+
+def matches_signature(sample: ContentSample) -> bool:
+    return any(
+        any(marker in stream for marker in SIGNATURE_MARKERS) and SIGNATURE_DATE_PATTERN.search(stream)
+        for stream in sample.pdf_streams()
+    )
 
 
 def _run(args: argparse.Namespace) -> None:
     process_pdf(args.input_path, args.output_path)
 
 
+def _write_stream(source: StatementSource, args: argparse.Namespace, output: BinaryIO) -> None:
+    write_ofx(parse_pdf(source), output)
+
+
+def _parse_statement(source: StatementSource, args: argparse.Namespace) -> StatementData:
+    return parse_pdf(source)
+
+
 def register_converters(registry) -> None:
     registry.register(
         input_format="pdf",
         output_format="ofx",
         model="vr",
         description="VR PDF para OFX",
+        stream_handler=_write_stream,
+        statement_parser=_parse_statement,
+        signature=matches_signature,
     )(_run)
 
 
@@ -3,15 +3,77 @@ import importlib
 import pkgutil
 from collections.abc import Callable
 from dataclasses import dataclass
+from typing import Any, BinaryIO
+
+from statement_converter._converter_manifest import manifest_path, package_key, read_manifest, write_manifest
 
 
 ConverterHandler = Callable[[argparse.Namespace], None]
+# Recebem a origem (caminho, bytes ou objeto binario) e as opcoes do conversor.
+StreamHandler = Callable[[Any, argparse.Namespace, BinaryIO], None]
+StatementParser = Callable[[Any, argparse.Namespace], Any]
+# Verificacao barata do conteudo (ContentSample) usada por --model auto.
+ContentSignature = Callable[[Any], bool]
+# Dependencias pesadas que os conversores embutidos importam sob demanda.
+HEAVY_DEPENDENCIES = ("pandas", "pypdf", "ofxparse")
 
 
 def normalize_token(value: str) -> str:
     return value.strip().casefold().replace("_", "-")
 
 
+class LazyCallable:
+    # Handler lido do catalogo de conversores: o modulo so e importado na
+    # primeira chamada. __module__ continua apontando para o modulo do handler.
+    def __init__(self, module: str, qualname: str) -> None:
+        self.__module__ = module
+        self.qualname = qualname
+        self._target: Callable[..., Any] | None = None
+
+    def resolve(self) -> Callable[..., Any]:
+        if self._target is None:
+            target: Any = importlib.import_module(self.__module__)
+            for name in self.qualname.split("."):
+                target = getattr(target, name)
+            self._target = target
+        return self._target
+
+    def __call__(self, *args, **kwargs):
+        return self.resolve()(*args, **kwargs)
+
+    def __getstate__(self) -> dict[str, str]:
+        return {"module": self.__module__, "qualname": self.qualname}
+
+    def __setstate__(self, state: dict[str, str]) -> None:
+        self.__init__(state["module"], state["qualname"])
+
+
+def converter_dependencies(converter: "ConverterSpec") -> tuple[str, ...]:
+    # Cada modulo de conversor declara em DEPENDENCIES o que importa sob demanda.
+    handler = converter.stream_handler or converter.handler
+    module = importlib.import_module(handler.__module__)
+    return tuple(getattr(module, "DEPENDENCIES", ()))
+
+
+def _callable_reference(function: Callable[..., Any] | None) -> str | None:
+    if function is None:
+        return None
+    if isinstance(function, LazyCallable):
+        return f"{function.__module__}:{function.qualname}"
+    qualname = getattr(function, "__qualname__", "")
+    module = getattr(function, "__module__", None)
+    if not module or not qualname or "<" in qualname:
+        raise ValueError(f"handler sem referencia importavel: {function!r}")
+    return f"{module}:{qualname}"
+
+
+def _lazy_callable(reference: str | None) -> LazyCallable | None:
+    if reference is None:
+        return None
+    module, _, qualname = reference.partition(":")
+    return LazyCallable(module, qualname)
+
+
 @dataclass(frozen=True)
 class ConverterSpec:
     input_format: str
@@ -21,11 +83,48 @@ class ConverterSpec:
     description: str
     aliases: tuple[str, ...] = ()
     required_options: tuple[str, ...] = ()
+    stream_handler: StreamHandler | None = None
+    statement_parser: StatementParser | None = None
+    signature: ContentSignature | None = None
 
     def matches_model(self, model: str) -> bool:
         accepted_models = {self.model, *self.aliases}
         return normalize_token(model) in accepted_models
 
+    def to_manifest(self) -> dict[str, Any]:
+        return {
+            "input_format": self.input_format,
+            "output_format": self.output_format,
+            "model": self.model,
+            "description": self.description,
+            "aliases": list(self.aliases),
+            "required_options": list(self.required_options),
+            "handler": _callable_reference(self.handler),
+            "stream_handler": _callable_reference(self.stream_handler),
+            "statement_parser": _callable_reference(self.statement_parser),
+            "signature": _callable_reference(self.signature),
+        }
+
+    @classmethod
+    def from_manifest(cls, entry: dict[str, Any]) -> "ConverterSpec":
+        return cls(
+            input_format=entry["input_format"],
+            output_format=entry["output_format"],
+            model=entry["model"],
+            handler=_lazy_callable(entry["handler"]),
+            description=entry["description"],
+            aliases=tuple(entry["aliases"]),
+            required_options=tuple(entry["required_options"]),
+            stream_handler=_lazy_callable(entry["stream_handler"]),
+            statement_parser=_lazy_callable(entry["statement_parser"]),
+            signature=_lazy_callable(entry["signature"]),
+        )
+
+    def resolve(self) -> None:
+        for function in (self.handler, self.stream_handler, self.statement_parser, self.signature):
+            if isinstance(function, LazyCallable):
+                function.resolve()
+
 
 class ConverterRegistry:
     def __init__(self) -> None:
@@ -41,6 +140,9 @@ class ConverterRegistry:
         description: str,
         aliases: tuple[str, ...] = (),
         required_options: tuple[str, ...] = (),
+        stream_handler: StreamHandler | None = None,
+        statement_parser: StatementParser | None = None,
+        signature: ContentSignature | None = None,
     ) -> Callable[[ConverterHandler], ConverterHandler]:
         def decorator(handler: ConverterHandler) -> ConverterHandler:
             spec = ConverterSpec(
@@ -51,6 +153,9 @@ class ConverterRegistry:
                 description=description,
                 aliases=tuple(normalize_token(alias) for alias in aliases),
                 required_options=required_options,
+                stream_handler=stream_handler,
+                statement_parser=statement_parser,
+                signature=signature,
             )
             self._ensure_unique_models(spec)
             self._converters.append(spec)
@@ -76,23 +181,56 @@ class ConverterRegistry:
                 return spec
         return None
 
-    def load_package_converters(self, package_name: str) -> None:
+    def load_package_converters(self, package_name: str, use_manifest: bool = True) -> None:
         package = importlib.import_module(package_name)
-
-        for module_info in pkgutil.iter_modules(package.__path__):
-            if not module_info.name.startswith("convert_"):
-                continue
-
-            module_name = f"{package_name}.{module_info.name}"
+        module_names = [
+            f"{package_name}.{module_info.name}"
+            for module_info in pkgutil.iter_modules(package.__path__)
+            if module_info.name.startswith("convert_")
+        ]
+
+        path = manifest_path()
+        key = package_key(list(package.__path__), module_names)
+        manifest = read_manifest(path, key) if use_manifest else None
+        stale = use_manifest and (manifest is None or set(manifest) != set(module_names))
+        entries_by_module: dict[str, list[dict] | None] = {}
+
+        for module_name in module_names:
             if module_name in self._loaded_modules:
                 continue
 
-            module = importlib.import_module(module_name)
-            register_converters = getattr(module, "register_converters", None)
-            if callable(register_converters):
-                register_converters(self)
+            entries = manifest.get(module_name) if manifest is not None and not stale else None
+            if entries is not None:
+                # Specs do catalogo: os handlers sao LazyCallable e o modulo so e
+                # importado quando um deles for chamado.
+                for entry in entries:
+                    spec = ConverterSpec.from_manifest(entry)
+                    self._ensure_unique_models(spec)
+                    self._converters.append(spec)
+            else:
+                entries_by_module[module_name] = self._import_converters(module_name)
 
             self._loaded_modules.add(module_name)
 
+        if stale and len(entries_by_module) == len(module_names):
+            write_manifest(path, key, entries_by_module)
+
+    def _import_converters(self, module_name: str) -> list[dict] | None:
+        first_new = len(self._converters)
+        module = importlib.import_module(module_name)
+        register_converters = getattr(module, "register_converters", None)
+        if callable(register_converters):
+            register_converters(self)
+        try:
+            return [spec.to_manifest() for spec in self._converters[first_new:]]
+        except ValueError:
+            # Handlers sem nome importavel (lambdas, closures) deixam o modulo fora
+            # do catalogo; ele volta a ser importado em toda execucao.
+            return None
+
+    def resolve_all(self) -> None:
+        # Importa os modulos de todos os conversores (usado pelo daemon antes do fork).
+        for spec in self._converters:
+            spec.resolve()
 
 registry = ConverterRegistry()
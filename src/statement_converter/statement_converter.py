@@ -1,10 +1,36 @@
 # PYTHON_ARGCOMPLETE_OK
 
 import argparse
+import importlib
+import itertools
+import os
 import sys
-from collections.abc import Sequence
-from pathlib import Path
-
+from collections import Counter
+from collections.abc import Iterator, Sequence
+from contextlib import nullcontext
+from pathlib import Path, PurePath
+
+from statement_converter._archive import ArchiveWriteError, ArchiveWriter, has_archive_suffix, is_archive, iter_archive_members
+from statement_converter._batch import (
+    ConversionResult,
+    ConversionTask,
+    convert_file,
+    default_jobs,
+    failed_result,
+    run_routed_conversions,
+    worker_context,
+)
+from statement_converter._cache import ConversionCache, parse_size
+from statement_converter._daemon import forward_to_daemon
+from statement_converter._journal import JOURNAL_NAME, ConversionJournal, input_identity
+from statement_converter._manifest import MANIFEST_NAME, ConversionManifest, converter_fingerprint
+from statement_converter._metrics import memory_limit_supported
+from statement_converter._profiling import ProfileWriter, profiling_requested
+from statement_converter._report import RunReport
+from statement_converter._routing import ConverterRouter, parse_routes, route_in_workers
+from statement_converter._shard import Shard, parse_shard
+from statement_converter._sniff import AUTO_MODEL, DeepSniffRequired, detect_converter, is_auto_model
+from statement_converter._source import STDIO_PATH, StatementSource, is_stdio_path, read_stream_bytes
 from statement_converter.converter_registry import ConverterRegistry, ConverterSpec, registry
 
 try:
@@ -13,6 +39,15 @@ except ImportError:  # pragma: no cover - fallback for environments without the
     argcomplete = None
 
 
+SUBCOMMANDS = {
+    "cache": "statement_converter._cache",
+    "daemon": "statement_converter._daemon",
+    "merge-reports": "statement_converter._report",
+    "serve": "statement_converter._server",
+    "watch": "statement_converter._watch",
+}
+
+
 def _available_combinations(converter_registry: ConverterRegistry) -> str:
     lines = []
     for spec in converter_registry.all():
@@ -30,7 +65,7 @@ def _complete_model(prefix: str, parsed_args, **kwargs) -> list[str]:
     del parsed_args, kwargs
     if not registry.all():
         _ensure_builtin_converters_loaded(registry)
-    candidates: list[str] = []
+    candidates: list[str] = [AUTO_MODEL]
     for spec in registry.all():
         candidates.extend([spec.model, *spec.aliases])
     return sorted(candidate for candidate in set(candidates) if candidate.startswith(prefix))
@@ -49,66 +84,516 @@ def _is_directory_target(path: Path) -> bool:
     return path.exists() and path.is_dir() or not path.exists() and not path.suffix
 
 
-def _collect_input_files(input_dir: Path, input_format: str) -> list[Path]:
-    suffix = _format_suffix(input_format)
-    return sorted(
-        path for path in input_dir.iterdir() if path.is_file() and path.suffix.casefold() == suffix
-    )
+def _scan_directory(directory: Path, recursive: bool) -> Iterator[Path]:
+    # Cada diretorio e listado uma unica vez com os.scandir e os arquivos sao
+    # entregues assim que encontrados, sem montar a lista completa da arvore.
+    with os.scandir(directory) as entries:
+        ordered_entries = sorted(entries, key=lambda entry: entry.name)
+
+    for entry in ordered_entries:
+        if entry.is_file():
+            yield Path(entry.path)
+        elif recursive and entry.is_dir(follow_symlinks=False):
+            yield from _scan_directory(Path(entry.path), recursive)
+
+
+def _matches_input(relative_path: PurePath, suffix: str | None, pattern: str | None) -> bool:
+    if pattern is not None:
+        return relative_path.match(pattern)
+    # Sem sufixo (lote com varios modelos) todo arquivo visivel e candidato.
+    if suffix is None:
+        return not relative_path.name.startswith(".")
+    return relative_path.suffix.casefold() == suffix
+
+
+def _iter_input_files(
+    input_dir: Path,
+    input_format: str | None,
+    recursive: bool = False,
+    pattern: str | None = None,
+) -> Iterator[Path]:
+    suffix = None if input_format is None else _format_suffix(input_format)
+    for path in _scan_directory(input_dir, recursive):
+        if _matches_input(path.relative_to(input_dir), suffix, pattern):
+            yield path
+
+
+def _iter_batch_inputs(
+    input_path: Path,
+    input_format: str | None,
+    recursive: bool = False,
+    pattern: str | None = None,
+    shard: Shard | None = None,
+) -> Iterator[tuple[Path, bytes | None]]:
+    if not is_archive(input_path):
+        for path in _iter_input_files(input_path, input_format, recursive, pattern):
+            yield path, None
+        return
+
+    # Membros de arquivos compactados seguem em memoria ate os conversores, sem
+    # extracao em disco; o caminho arquivo/membro so nomeia a saida e as mensagens.
+    # Extensao, --glob e --shard sao verificados pelo nome, antes de ler o membro.
+    suffix = None if input_format is None else _format_suffix(input_format)
+
+    def accepts(name: PurePath) -> bool:
+        return _matches_input(name, suffix, pattern) and (shard is None or shard.contains(name))
+
+    for member in iter_archive_members(input_path, accepts):
+        yield member.path, member.data
+
+
+def _is_batch_input(path: Path) -> bool:
+    return not is_stdio_path(path) and (path.is_dir() or is_archive(path))
 
 
-def _resolve_output_file(input_file: Path, output_target: Path, output_format: str, batch_mode: bool) -> Path:
+def _is_batch_run(args: argparse.Namespace) -> bool:
+    return getattr(args, "input_files", None) is not None or _is_batch_input(args.input_path)
+
+
+def _read_input_list(source: str) -> list[Path]:
+    text = sys.stdin.read() if source == "-" else Path(source).read_text(encoding="utf-8")
+    # find -print0 separa por NUL, o que preserva nomes com quebra de linha.
+    names = text.split("\0") if "\0" in text else text.splitlines()
+    return [Path(name) for name in names if name.strip()]
+
+
+def _common_input_root(input_files: list[Path]) -> tuple[Path, list[Path]]:
+    # Como em um diretorio, a saida espelha o caminho de cada entrada relativo a
+    # raiz comum; entradas fora do diretorio atual passam a caminhos absolutos.
+    input_files = [Path(os.path.normpath(path)) for path in input_files]
+    try:
+        root = os.path.commonpath([path.parent for path in input_files])
+    except ValueError:
+        root = None
+    if root is None or Path(root).parts[:1] == (os.pardir,):
+        input_files = [Path(os.path.abspath(path)) for path in input_files]
+        root = os.path.commonpath([path.parent for path in input_files])
+    return Path(root), input_files
+
+
+def _resolve_inputs(parser: argparse.ArgumentParser, args: argparse.Namespace) -> None:
+    positionals = [path for path in (args.input_path, args.output_path, *args.extra_inputs) if path is not None]
+    if args.output is None:
+        if args.from_list is not None:
+            parser.error("--from-list exige --output com o diretorio de saida")
+        if args.extra_inputs:
+            parser.error("para converter varias entradas, informe o destino com --output")
+        return
+
+    if args.from_list is not None:
+        try:
+            positionals.extend(_read_input_list(args.from_list))
+        except (OSError, UnicodeDecodeError) as exc:
+            parser.error(f"nao foi possivel ler a lista de entradas {args.from_list}: {exc}")
+    input_files = list(dict.fromkeys(positionals))
+    args.output_path = args.output
+    if len(input_files) == 1:
+        args.input_path = input_files[0]
+        return
+    if not input_files:
+        parser.error("nenhuma entrada foi informada")
+
+    not_files = [str(path) for path in input_files if not path.is_file()]
+    if not_files:
+        parser.error(f"entrada nao encontrada ou que nao e um arquivo: {', '.join(not_files)}")
+    args.input_path, args.input_files = _common_input_root(input_files)
+
+
+def _resolve_output_file(
+    input_file: Path,
+    output_target: Path,
+    output_format: str,
+    batch_mode: bool,
+    input_root: Path | None = None,
+) -> Path:
     suffix = _format_suffix(output_format)
 
     if batch_mode or _is_directory_target(output_target):
+        if input_root is not None:
+            output_target = output_target / input_file.parent.relative_to(input_root)
         output_target.mkdir(parents=True, exist_ok=True)
         return output_target / f"{input_file.stem}{suffix}"
 
     return output_target
 
 
-def _build_run_args(args: argparse.Namespace, input_path: Path, output_path: Path) -> argparse.Namespace:
-    values = vars(args).copy()
-    values["input_path"] = input_path
-    values["output_path"] = output_path
-    return argparse.Namespace(**values)
+def _archive_member_name(input_file: Path, input_root: Path, output_format: str) -> Path:
+    return input_file.parent.relative_to(input_root) / f"{input_file.stem}{_format_suffix(output_format)}"
 
 
-def _run_single_conversion(converter: ConverterSpec, args: argparse.Namespace, input_file: Path, output_file: Path) -> None:
-    converter.handler(_build_run_args(args, input_file, output_file))
+def _message_stream(output_path: Path | None):
+    # Com a saida em stdout as mensagens vao para stderr, sem misturar com os bytes convertidos.
+    return sys.stderr if is_stdio_path(output_path) else sys.stdout
 
 
-def execute_conversion(converter: ConverterSpec, args: argparse.Namespace) -> int:
-    if args.input_path.is_dir():
-        input_files = _collect_input_files(args.input_path, converter.input_format)
-        if not input_files:
-            print(
-                f"Nenhum arquivo {_format_suffix(converter.input_format)} foi encontrado em {args.input_path}.",
-                file=sys.stderr,
-            )
-            return 1
+def report_result(result: ConversionResult) -> None:
+    if result.output:
+        _message_stream(result.output_file).write(result.output)
+    if result.error is not None:
+        print(f"Erro ao converter {result.input_file}: {result.error}", file=sys.stderr)
 
-        success_count = 0
-        failure_count = 0
-        for input_file in input_files:
-            output_file = _resolve_output_file(input_file, args.output_path, converter.output_format, batch_mode=True)
-            try:
-                _run_single_conversion(converter, args, input_file, output_file)
-                success_count += 1
-            except Exception as exc:
-                print(f"Erro ao converter {input_file}: {exc}", file=sys.stderr)
-                failure_count += 1
 
-        print(f"Conversao em lote concluida: {success_count} sucesso(s), {failure_count} falha(s).")
-        return 0 if failure_count == 0 else 1
+def route_file(
+    router: ConverterRouter,
+    input_file: Path,
+    relative_path: PurePath,
+    known_model: str | None = None,
+    data: bytes | None = None,
+    deep: bool = True,
+) -> ConverterSpec | None:
+    # Com deep=False a leitura completa nao acontece aqui: DeepSniffRequired sobe
+    # para quem chamou, que a repassa aos workers.
+    try:
+        converter = router.route(input_file if data is None else data, relative_path, known_model, deep)
+    except (OSError, ValueError) as exc:
+        reason = str(exc)
+    else:
+        if converter is not None:
+            return converter
+        reason = None
+    _report_unrouted(input_file, reason)
+    return None
 
-    output_file = _resolve_output_file(args.input_path, args.output_path, converter.output_format, batch_mode=False)
+
+def _report_unrouted(input_file: Path, reason: str | None) -> None:
+    reason = reason or "nenhuma rota ou modelo corresponde ao arquivo."
+    print(f"Arquivo ignorado {input_file}: {reason}", file=sys.stderr)
+
+
+def _manifest_key(input_root: Path, input_file: Path) -> str:
+    return input_file.relative_to(input_root).as_posix()
+
+
+def _execute_batch(
+    router: ConverterRouter,
+    args: argparse.Namespace,
+    report: RunReport | None = None,
+    profiles: ProfileWriter | None = None,
+) -> int:
+    single_converter = router.single_converter
+    pattern = getattr(args, "glob", None)
+    shard: Shard | None = getattr(args, "shard", None)
+    if getattr(args, "input_files", None) is not None:
+        inputs = iter([(input_file, None) for input_file in args.input_files])
+    else:
+        inputs = _iter_batch_inputs(
+            args.input_path,
+            single_converter.input_format if single_converter is not None else None,
+            recursive=getattr(args, "recursive", False),
+            pattern=pattern,
+            shard=shard,
+        )
     try:
-        _run_single_conversion(converter, args, args.input_path, output_file)
-    except Exception as exc:
-        print(f"Erro ao converter {args.input_path}: {exc}", file=sys.stderr)
+        first_input = next(inputs, None)
+    except ValueError as exc:
+        print(f"Erro ao ler {args.input_path}: {exc}", file=sys.stderr)
         return 1
+    # Em um arquivo compactado o --shard ja filtra a listagem; uma fatia vazia nao e erro.
+    if first_input is None and (shard is None or not is_archive(args.input_path)):
+        description = pattern or (_format_suffix(single_converter.input_format) if single_converter else None)
+        subject = f"Nenhum arquivo {description}" if description else "Nenhum arquivo"
+        print(f"{subject} foi encontrado em {args.input_path}.", file=sys.stderr)
+        return 1
+
+    manifest_name = shard.file_name(MANIFEST_NAME) if shard is not None else MANIFEST_NAME
+    journal_name = shard.file_name(JOURNAL_NAME) if shard is not None else JOURNAL_NAME
+    manifest = ConversionManifest.load(args.output_path, manifest_name) if getattr(args, "incremental", False) else None
+    # Com destino .zip/.tar os workers devolvem os bytes convertidos e uma unica
+    # thread grava o arquivo compactado, sem um arquivo por saida no destino.
+    archive_output = has_archive_suffix(args.output_path)
+    run_args = argparse.Namespace(**vars(args), in_memory_output=True) if archive_output else args
+    # A thread de gravacao do .zip/.tar roda junto com os workers, que por isso nao sao criados por fork.
+    context = worker_context(threaded=archive_output)
+    # O diario so faz sentido com um arquivo por saida; um .zip/.tar parcial nao e retomavel.
+    journal = None
+    if not archive_output:
+        journal = ConversionJournal.open(args.output_path, getattr(args, "resume", False), journal_name)
+    input_identities: dict[str, tuple[int | None, int | None]] = {}
+    fingerprints: dict[str, str] = {}
+    claimed_outputs: set[Path] = set()
+    skipped_count = 0
+    resumed_count = 0
+    unrecognized_count = 0
+    read_failed = False
+    jobs = getattr(args, "jobs", None) or default_jobs()
+    timeout = getattr(args, "timeout", None)
+    # Com varios workers ou --timeout a leitura completa sai do processo principal,
+    # onde uma falha ou um arquivo travado interromperia o lote inteiro.
+    defer_deep_sniff = jobs > 1 or timeout is not None
+
+    def remaining_inputs() -> Iterator[tuple[Path, bytes | None]]:
+        nonlocal read_failed
+        try:
+            yield from itertools.chain([first_input] if first_input is not None else [], inputs)
+        except ValueError as exc:
+            # Um arquivo compactado truncado encerra a leitura, mas os membros ja lidos seguem.
+            read_failed = True
+            print(f"Erro ao ler {args.input_path}: {exc}", file=sys.stderr)
+
+    def build_task(input_file: Path, data: bytes | None, converter: ConverterSpec | None) -> ConversionTask | None:
+        nonlocal skipped_count, resumed_count, unrecognized_count
+        if converter is None:
+            unrecognized_count += 1
+            if report is not None:
+                report.add_ignored(input_file, "unrecognized")
+            return None
+
+        key = _manifest_key(args.input_path, input_file)
+        if archive_output:
+            output_file = _archive_member_name(input_file, args.input_path, converter.output_format)
+        else:
+            output_file = _resolve_output_file(
+                input_file,
+                args.output_path,
+                converter.output_format,
+                batch_mode=True,
+                input_root=args.input_path,
+            )
+        if single_converter is None:
+            # Em lotes mistos fatura.pdf e fatura.csv gerariam o mesmo fatura.ofx.
+            if output_file in claimed_outputs:
+                output_file = output_file.with_name(f"{input_file.name}{output_file.suffix}")
+            claimed_outputs.add(output_file)
+
+        if manifest is not None:
+            if converter.model not in fingerprints:
+                fingerprints[converter.model] = converter_fingerprint(converter)
+            if manifest.is_up_to_date(key, input_file, output_file, converter.model, fingerprints[converter.model]):
+                skipped_count += 1
+                if report is not None:
+                    report.add_ignored(input_file, "skipped")
+                return None
+        if journal is not None:
+            if journal.is_completed(key, input_file, data, output_file):
+                resumed_count += 1
+                if report is not None:
+                    report.add_ignored(input_file, "skipped")
+                return None
+            input_identities[key] = input_identity(input_file, data)
+        return ConversionTask(converter, input_file, output_file, data)
+
+    def routed_inputs() -> Iterator[
+        tuple[tuple[StatementSource, PurePath] | None, tuple[Path, bytes | None, ConverterSpec | None]]
+    ]:
+        # O processo principal so faz a verificacao barata (rotas, manifesto e o
+        # inicio do arquivo); os arquivos que precisam da leitura completa seguem
+        # para os workers assim que sao listados.
+        for input_file, data in remaining_inputs():
+            relative_path = input_file.relative_to(args.input_path)
+            if shard is not None and not shard.contains(relative_path):
+                continue
+            key = _manifest_key(args.input_path, input_file)
+            known_model = manifest.unchanged_model(key, input_file) if manifest is not None else None
+            try:
+                converter = route_file(router, input_file, relative_path, known_model, data, deep=not defer_deep_sniff)
+            except DeepSniffRequired:
+                yield (input_file if data is None else data, relative_path), (input_file, data, None)
+                continue
+            yield None, (input_file, data, converter)
+
+    def pending_tasks() -> Iterator[ConversionTask]:
+        for (input_file, data, converter), deep_routing in route_in_workers(router, routed_inputs(), jobs, timeout, context):
+            if deep_routing is not None:
+                if deep_routing.failure is not None:
+                    # Sem modelo nao ha saida prevista; o resultado aponta para a propria entrada.
+                    handle_result(failed_result(deep_routing.failure, input_file, input_file, data=data))
+                    continue
+                converter = deep_routing.converter
+                if converter is None:
+                    _report_unrouted(input_file, deep_routing.reason)
+            task = build_task(input_file, data, converter)
+            if task is not None:
+                yield task
+
+    counts: Counter[tuple[str | None, bool]] = Counter()
+    write_failed = False
+    written_count = 0
+    finished = False
+    writer: ArchiveWriter | None = None
+
+    def handle_result(result: ConversionResult) -> None:
+        report_result(result)
+        if report is not None:
+            report.add_result(result)
+        if profiles is not None and result.profile_stats is not None:
+            profiles.add(result.input_file.relative_to(args.input_path), result.profile_stats)
+        counts[result.model, result.succeeded] += 1
+        if writer is not None and result.output_data is not None:
+            writer.add(result.output_file.as_posix(), result.output_data)
+
+        key = _manifest_key(args.input_path, result.input_file)
+        if journal is not None:
+            identity = input_identities.pop(key, (None, None))
+            journal.record(key, identity, result.model, result.output_file, result.succeeded)
+        if manifest is not None:
+            if result.succeeded:
+                manifest.record(key, result.input_file, result.output_file, result.model, fingerprints[result.model])
+            else:
+                manifest.discard(key)
 
-    return 0
+    try:
+        with ArchiveWriter(args.output_path) if archive_output else nullcontext() as writer:
+            for result in run_routed_conversions(run_args, pending_tasks(), jobs, router.default, context):
+                handle_result(result)
+        written_count = writer.count if writer is not None else 0
+        finished = True
+    except ArchiveWriteError as exc:
+        write_failed = True
+        print(f"Erro ao gravar {args.output_path}: {exc}", file=sys.stderr)
+    finally:
+        if manifest is not None:
+            manifest.save()
+        if journal is not None:
+            # Sem falhas nao ha o que retomar; caso contrario o diario fica para --resume.
+            failed = any(not succeeded for _, succeeded in counts)
+            journal.close(completed=finished and not failed and not read_failed)
+
+    success_count = sum(count for (_, succeeded), count in counts.items() if succeeded)
+    failure_count = sum(count for (_, succeeded), count in counts.items() if not succeeded)
+    if manifest is not None:
+        print(f"{skipped_count} arquivo(s) sem alteracao ignorado(s).")
+    if resumed_count:
+        print(f"{resumed_count} arquivo(s) ja convertido(s) na execucao anterior ignorado(s).")
+    if unrecognized_count:
+        print(f"{unrecognized_count} arquivo(s) sem modelo reconhecido ignorado(s).")
+    print(f"Conversao em lote concluida: {success_count} sucesso(s), {failure_count} falha(s).")
+    if single_converter is None:
+        for model in sorted({model for model, _ in counts if model is not None}):
+            print(f"  {model}: {counts[model, True]} sucesso(s), {counts[model, False]} falha(s).")
+    if archive_output and not write_failed:
+        print(f"{written_count} saida(s) gravada(s) em {args.output_path}.")
+    return 0 if failure_count == 0 and not read_failed and not write_failed else 1
+
+
+def _execute_single(
+    router: ConverterRouter,
+    args: argparse.Namespace,
+    report: RunReport | None = None,
+    profiles: ProfileWriter | None = None,
+) -> int:
+    data = None
+    if is_stdio_path(args.input_path):
+        # stdin so pode ser lido uma vez: o conteudo segue em memoria para a deteccao e a conversao.
+        data = read_stream_bytes(sys.stdin.buffer)
+    try:
+        converter = router.route(args.input_path if data is None else data, PurePath(args.input_path.name))
+    except ValueError as exc:
+        print(exc, file=sys.stderr)
+        if report is not None:
+            report.add_ignored(args.input_path, "unrecognized")
+        return 1
+    if converter is not None and router.detection_registry is not None:
+        print(f"Modelo identificado: {converter.model}", file=_message_stream(args.output_path))
+        args.model = converter.model
+    if converter is None:
+        print(f"Nenhuma rota ou modelo corresponde a {args.input_path}.", file=sys.stderr)
+        if report is not None:
+            report.add_ignored(args.input_path, "unrecognized")
+        return 1
+    if is_stdio_path(args.output_path):
+        output_file = args.output_path
+    else:
+        output_file = _resolve_output_file(args.input_path, args.output_path, converter.output_format, batch_mode=False)
+    if getattr(args, "timeout", None) is not None:
+        task = ConversionTask(converter, args.input_path, output_file, data)
+        [result] = run_routed_conversions(args, [task], 1, default_converter=converter)
+    else:
+        result = convert_file(converter, args, args.input_path, output_file, data)
+    report_result(result)
+    if report is not None:
+        report.add_result(result)
+    if profiles is not None and result.profile_stats is not None:
+        profiles.add(PurePath(args.input_path.name), result.profile_stats)
+    return 0 if result.succeeded else 1
+
+
+def _profile_writer(args: argparse.Namespace) -> ProfileWriter | None:
+    if not profiling_requested(args):
+        return None
+    profile_path = getattr(args, "profile", None)
+    # Com um diretorio como destino cada entrada ganha o seu .prof; com um
+    # arquivo, os perfis do lote sao somados em um so.
+    per_input = profile_path is not None and _is_directory_target(profile_path)
+    return ProfileWriter(profile_path, getattr(args, "profile_collapsed", None), per_input)
+
+
+def execute_conversion(router: ConverterRouter, args: argparse.Namespace) -> int:
+    report_path = getattr(args, "report", None)
+    profiles = _profile_writer(args)
+    try:
+        with RunReport(report_path, getattr(args, "shard", None)) if report_path else nullcontext() as report:
+            if _is_batch_run(args):
+                return _execute_batch(router, args, report, profiles)
+            return _execute_single(router, args, report, profiles)
+    finally:
+        if profiles is not None:
+            try:
+                profiles.close()
+            except OSError as exc:
+                print(f"Erro ao gravar o perfil: {exc}", file=sys.stderr)
+        cache = ConversionCache.from_args(args)
+        if cache is not None:
+            cache.prune()
+
+
+def add_converter_arguments(parser: argparse.ArgumentParser) -> None:
+    model_argument = parser.add_argument(
+        "--model",
+        help="Modelo/instituicao do conversor, por exemplo: picpay, pb, rico-ofx, c6-credit-csv. "
+        "Use auto para identificar o modelo pelo conteudo do arquivo.",
+    )
+    model_argument.completer = _complete_model
+    parser.add_argument(
+        "--route",
+        action="append",
+        metavar="PADRAO=MODELO",
+        help="Envia os arquivos cujo caminho corresponde a PADRAO para MODELO, por exemplo '*.csv=c6-credit-csv'. "
+        "Pode ser repetido; as rotas tem prioridade sobre --model.",
+    )
+    parser.add_argument(
+        "--due-date",
+        dest="due_date",
+        help="Opcao especifica para C6 CSV -> OFX. Aceita YYYY-MM-DD ou DD/MM/YYYY.",
+    )
+
+
+def add_execution_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "--jobs",
+        "-j",
+        type=int,
+        help="Numero de processos usados na conversao de diretorios. Padrao: quantidade de CPUs.",
+    )
+    parser.add_argument(
+        "--cache",
+        action="store_true",
+        help="Reaproveita conversoes anteriores do mesmo conteudo, modelo e opcoes a partir de um cache em disco.",
+    )
+    parser.add_argument(
+        "--cache-dir",
+        dest="cache_dir",
+        type=Path,
+        help="Diretorio do cache de conversoes. Padrao: ~/.cache/statement-converter.",
+    )
+    parser.add_argument(
+        "--cache-max-size",
+        dest="cache_max_size",
+        help="Tamanho maximo do cache, por exemplo 200M ou 1G. Entradas menos usadas sao removidas. Padrao: 512M.",
+    )
+    parser.add_argument(
+        "--max-memory",
+        dest="max_memory",
+        metavar="TAMANHO",
+        help="Limite de memoria de cada conversao, por exemplo 500M ou 2G. Um arquivo que passa do limite e "
+        "interrompido e contado como falha, sem derrubar o lote.",
+    )
+    parser.add_argument(
+        "--trace-memory",
+        dest="trace_memory",
+        action="store_true",
+        help="Mede com tracemalloc o pico de memoria alocada pelo Python em cada arquivo e o inclui no --report. "
+        "Deixa a conversao mais lenta.",
+    )
 
 
 def build_argument_parser(converter_registry: ConverterRegistry = registry) -> argparse.ArgumentParser:
@@ -120,74 +605,253 @@ def build_argument_parser(converter_registry: ConverterRegistry = registry) -> a
             "Exemplo:\n"
             "  statement-converter --model picpay entrada.pdf saida.ofx\n\n"
             "Conversores disponiveis:\n"
-            f"{_available_combinations(converter_registry)}"
+            f"{_available_combinations(converter_registry)}\n"
+            "  - model=auto identifica o conversor pelo conteudo de cada arquivo de entrada\n\n"
+            "Diretorios com varios modelos:\n"
+            "  statement-converter --model auto --route '*.csv=c6-credit-csv' --due-date 2021-04-05 downloads/ saida/\n\n"
+            "Comandos de manutencao:\n"
+            "  statement-converter watch --model MODELO entrada/ saida/\n"
+            "  statement-converter daemon {run,status,stop} [--socket CAMINHO] [--workers N]\n"
+            "  statement-converter serve [--host HOST] [--port PORTA] [--workers N] [--queue-size N]\n"
+            "  statement-converter cache {stats,prune} [--cache-dir DIR] [--max-size TAMANHO]\n"
+            "  statement-converter merge-reports [--output ARQUIVO.jsonl] RELATORIO.jsonl ..."
         ),
         formatter_class=argparse.RawDescriptionHelpFormatter,
     )
     parser.add_argument("input_path", type=Path, nargs="?")
     parser.add_argument("output_path", type=Path, nargs="?")
-    model_argument = parser.add_argument(
-        "--model",
-        help="Modelo/instituicao do conversor, por exemplo: picpay, pb, rico-ofx, c6-credit-csv.",
+    parser.add_argument(
+        "extra_inputs",
+        type=Path,
+        nargs="*",
+        metavar="ENTRADA",
+        help="Com --output, todos os caminhos posicionais sao entradas convertidas em um unico lote.",
     )
-    model_argument.completer = _complete_model
     parser.add_argument(
-        "--due-date",
-        dest="due_date",
-        help="Opcao especifica para C6 CSV -> OFX. Aceita YYYY-MM-DD ou DD/MM/YYYY.",
+        "--output",
+        "-o",
+        type=Path,
+        metavar="DIRETORIO",
+        help="Diretorio (ou arquivo .zip/.tar) de saida para uma lista de entradas, por exemplo "
+        "'-o saida/ a.pdf b.pdf'. As entradas sao convertidas com o mesmo pool de processos dos diretorios.",
+    )
+    parser.add_argument(
+        "--from-list",
+        dest="from_list",
+        metavar="ARQUIVO",
+        help="Le as entradas de ARQUIVO, uma por linha ou separadas por NUL (find -print0); use - para ler da "
+        "entrada padrao. Exige --output.",
+    )
+    add_converter_arguments(parser)
+    add_execution_arguments(parser)
+    parser.add_argument(
+        "--recursive",
+        "-r",
+        action="store_true",
+        help="Percorre tambem os subdiretorios de input_path, espelhando a estrutura em output_path.",
+    )
+    parser.add_argument(
+        "--glob",
+        help="Padrao aplicado ao caminho relativo dos arquivos do diretorio, por exemplo: '2024/*/*.pdf'. "
+        "Substitui o filtro pela extensao do modelo.",
+    )
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Mantem um manifesto em output_path e converte apenas arquivos novos ou alterados desde a ultima execucao.",
+    )
+    parser.add_argument(
+        "--shard",
+        metavar="I/N",
+        help="Converte apenas a particao I de N das entradas do lote, escolhida por um hash estavel do caminho "
+        "relativo. Rodando 1/N ... N/N em maquinas diferentes cada arquivo e convertido por exatamente um no.",
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Continua um lote interrompido ou com falhas a partir do diario gravado em output_path: arquivos ja "
+        "convertidos, com a saida intacta, sao ignorados e so o restante e as falhas sao convertidos de novo.",
+    )
+    parser.add_argument(
+        "--timeout",
+        type=float,
+        metavar="SEGUNDOS",
+        help="Tempo maximo de cada conversao. As conversoes rodam em processos separados; um arquivo que passa do "
+        "limite ou derruba o processo e contado como falha e o lote segue com um novo processo.",
+    )
+    parser.add_argument(
+        "--report",
+        type=Path,
+        metavar="ARQUIVO.jsonl",
+        help="Grava um relatorio JSONL com uma linha por arquivo (modelo, bytes, paginas, transacoes, tempo de parede "
+        "e de CPU, pico de memoria, erro) e uma linha final com latencias p50/p95 e vazao.",
+    )
+    parser.add_argument(
+        "--profile",
+        type=Path,
+        metavar="ARQUIVO.prof",
+        help="Executa as conversoes sob o cProfile e grava as estatisticas (pstats). Em lotes os perfis sao somados; "
+        "se o destino for um diretorio, cada entrada ganha o seu arquivo .prof.",
+    )
+    parser.add_argument(
+        "--profile-collapsed",
+        dest="profile_collapsed",
+        type=Path,
+        metavar="ARQUIVO.txt",
+        help="Grava tambem as pilhas colapsadas do perfil, no formato lido por flamegraph.pl e speedscope.",
     )
     return parser
 
 
+def _detect_model(
+    parser: argparse.ArgumentParser,
+    args: argparse.Namespace,
+    converter_registry: ConverterRegistry,
+) -> ConverterSpec:
+    try:
+        converter = detect_converter(args.input_path, converter_registry)
+    except (OSError, ValueError) as exc:
+        parser.error(str(exc))
+    print(f"Modelo identificado: {converter.model}", file=_message_stream(args.output_path))
+    args.model = converter.model
+    return converter
+
+
 def validate_args(
     parser: argparse.ArgumentParser,
     args: argparse.Namespace,
     converter_registry: ConverterRegistry = registry,
-) -> ConverterSpec:
-    if not args.model or not args.input_path or not args.output_path:
+) -> ConverterRouter:
+    route_values = getattr(args, "route", None) or []
+    if not (args.model or route_values) or not args.input_path or not args.output_path:
         parser.error(
-            "os parametros --model, input_path e output_path sao obrigatorios para executar uma conversao"
+            "os parametros --model (ou --route), input_path e output_path sao obrigatorios para executar uma conversao"
         )
 
-    converter = converter_registry.find_by_model(args.model)
-    if converter is None:
-        parser.error(
-            f"nenhum conversor foi encontrado para o modelo {args.model}.\n\n"
-            "Use --help para ver os modelos suportados."
-        )
+    try:
+        routes = parse_routes(route_values, converter_registry)
+    except ValueError as exc:
+        parser.error(str(exc))
+
+    converter = None
+    if args.model and not is_auto_model(args.model):
+        converter = converter_registry.find_by_model(args.model)
+        if converter is None:
+            parser.error(
+                f"nenhum conversor foi encontrado para o modelo {args.model}.\n\n"
+                "Use --help para ver os modelos suportados."
+            )
 
-    if not args.input_path.exists():
+    if is_stdio_path(args.input_path):
+        if not is_stdio_path(args.output_path) and _is_directory_target(args.output_path):
+            parser.error("com a entrada - (stdin), output_path deve ser um arquivo ou - (stdout)")
+    elif not args.input_path.exists():
         parser.error(f"o caminho de entrada nao existe: {args.input_path}")
-
-    missing_options = [
-        f"--{option.replace('_', '-')}" for option in converter.required_options if not getattr(args, option, None)
-    ]
-    if missing_options:
-        parser.error(f"o conversor selecionado exige opcoes extras: {', '.join(missing_options)}")
-
-    if args.input_path.is_dir():
+    if is_stdio_path(args.output_path) and _is_batch_run(args):
+        parser.error("a saida - (stdout) so se aplica a um unico arquivo de entrada")
+
+    detection_registry = None
+    if is_auto_model(args.model):
+        if _is_batch_run(args):
+            # Em diretorios o modelo e identificado arquivo a arquivo durante o lote.
+            detection_registry = converter_registry
+        elif not any(PurePath(args.input_path.name).match(route.pattern) for route in routes):
+            if is_stdio_path(args.input_path):
+                # O stdin so e lido na execucao; o modelo e identificado a partir desse conteudo.
+                detection_registry = converter_registry
+            else:
+                converter = _detect_model(parser, args, converter_registry)
+
+    router = ConverterRouter(converter, routes, detection_registry)
+    for routed_converter in router.converters():
+        missing_options = [
+            f"--{option.replace('_', '-')}"
+            for option in routed_converter.required_options
+            if not getattr(args, option, None)
+        ]
+        if missing_options:
+            selected = "o conversor selecionado" if routed_converter is converter else f"o modelo {routed_converter.model}"
+            parser.error(f"{selected} exige opcoes extras: {', '.join(missing_options)}")
+
+    if args.jobs is not None and args.jobs < 1:
+        parser.error("--jobs deve ser um numero inteiro maior ou igual a 1")
+
+    if getattr(args, "timeout", None) is not None and args.timeout <= 0:
+        parser.error("--timeout deve ser maior que zero")
+
+    if args.cache_max_size is not None:
+        try:
+            parse_size(args.cache_max_size)
+        except ValueError as exc:
+            parser.error(str(exc))
+
+    if args.max_memory is not None:
+        try:
+            max_memory = parse_size(args.max_memory)
+        except ValueError as exc:
+            parser.error(str(exc))
+        if max_memory <= 0:
+            parser.error("--max-memory deve ser maior que zero")
+        if not memory_limit_supported():
+            parser.error("--max-memory nao e suportado nesta plataforma (exige RLIMIT_AS e /proc/self/status)")
+
+    if _is_batch_run(args) and not has_archive_suffix(args.output_path):
         if args.output_path.exists() and not args.output_path.is_dir():
-            parser.error("quando input_path for um diretorio, output_path tambem deve ser um diretorio")
+            parser.error(
+                "quando input_path for um diretorio ou arquivo compactado, output_path deve ser um diretorio "
+                "ou um arquivo .zip/.tar"
+            )
         if not args.output_path.exists() and args.output_path.suffix:
-            parser.error("quando input_path for um diretorio, output_path deve apontar para uma pasta")
+            parser.error(
+                "quando input_path for um diretorio ou arquivo compactado, output_path deve apontar para uma pasta "
+                "ou um arquivo .zip/.tar"
+            )
+    if getattr(args, "incremental", False) and (is_archive(args.input_path) or has_archive_suffix(args.output_path)):
+        parser.error("--incremental nao e suportado com arquivos compactados em input_path ou output_path")
+    if getattr(args, "shard", None) is not None:
+        if not _is_batch_run(args):
+            parser.error("--shard so se aplica quando input_path e um diretorio ou arquivo compactado")
+        try:
+            args.shard = parse_shard(args.shard)
+        except ValueError as exc:
+            parser.error(str(exc))
+    if getattr(args, "resume", False):
+        if not _is_batch_run(args):
+            parser.error("--resume so se aplica quando input_path e um diretorio ou arquivo compactado")
+        if has_archive_suffix(args.output_path):
+            parser.error("--resume nao e suportado quando output_path e um arquivo .zip/.tar")
+
+    return router
 
-    return converter
+
+def _uses_stdio(argv: Sequence[str]) -> bool:
+    return STDIO_PATH in argv or f"--from-list={STDIO_PATH}" in argv
 
 
 def main(argv: Sequence[str] | None = None, converter_registry: ConverterRegistry = registry) -> int:
+    argv = list(sys.argv[1:] if argv is None else argv)
+    if argv and argv[0] in SUBCOMMANDS:
+        return importlib.import_module(SUBCOMMANDS[argv[0]]).main(argv[1:])
+
+    # O daemon nao recebe o stdin do cliente nem devolve bytes pelo stdout; pipelines rodam aqui.
+    if converter_registry is registry and not _uses_stdio(argv):
+        forwarded_exit_code = forward_to_daemon(argv)
+        if forwarded_exit_code is not None:
+            return forwarded_exit_code
+
     _ensure_builtin_converters_loaded(converter_registry)
     parser = build_argument_parser(converter_registry)
     if argcomplete is not None:
         argcomplete.autocomplete(parser)
-    argv = list(sys.argv[1:] if argv is None else argv)
 
     if not argv:
         parser.print_help()
         return 0
 
-    args = parser.parse_args(argv)
-    converter = validate_args(parser, args, converter_registry)
-    return execute_conversion(converter, args)
+    args = parser.parse_intermixed_args(argv)
+    _resolve_inputs(parser, args)
+    router = validate_args(parser, args, converter_registry)
+    return execute_conversion(router, args)
 
 
 if __name__ == "__main__":
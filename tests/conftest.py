@@ -0,0 +1,9 @@
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def isolated_environment(tmp_path_factory: pytest.TempPathFactory, monkeypatch: pytest.MonkeyPatch):
+    # O catalogo de conversores e o cache ficam em um diretorio temporario, e um
+    # daemon do usuario rodando na maquina nao atende as chamadas dos testes.
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path_factory.mktemp("xdg-cache")))
+    monkeypatch.setenv("STATEMENT_CONVERTER_NO_DAEMON", "1")
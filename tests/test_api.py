@@ -0,0 +1,190 @@
+import argparse
+import asyncio
+import io
+import multiprocessing
+import subprocess
+import sys
+import time
+from contextlib import aclosing
+from pathlib import Path
+
+import pytest
+
+from statement_converter._ofx_common import StatementData
+from statement_converter.api import convert, convert_many, parse, resolve_converter
+from statement_converter.converter_registry import ConverterRegistry
+
+
+SAMPLES_DIR = Path(__file__).parent.parent / "samples"
+C6_CSV_SAMPLE = """Data de Compra;Nome no Cartão;Final do Cartão;Categoria;Descrição;Parcela;Valor (em US$);Cotação (em R$);Valor (em R$)
+27/01/2021;NOME FICTICIO;7076;Marketing Direto;MERCPAGO CROMANIL;2/3;0;0;74.93
+05/03/2021;NOME FICTICIO;7360;-;"Inclusao de Pagamento    ";Única;0;0;-628.94
+"""
+
+
+def _convert_from_disk(model: str, input_path: Path, output_path: Path, **options) -> bytes:
+    converter = resolve_converter(model)
+    converter.handler(argparse.Namespace(model=model, input_path=input_path, output_path=output_path, **options))
+    return output_path.read_bytes()
+
+
+@pytest.mark.parametrize(
+    ("model", "sample"),
+    [
+        ("bb-cp", "bb-cp.csv"),
+        ("bb-lc", "bb-lcilca.txt"),
+        ("ourocard", "ourocard-clean.ofx"),
+        ("rico-csv", "rico-cc.xlsx"),
+        ("rico-ofx", "rico-cc.xlsx"),
+    ],
+)
+def test_convert_bytes_matches_file_conversion(model: str, sample: str, tmp_path: Path):
+    input_path = SAMPLES_DIR / sample
+
+    expected = _convert_from_disk(model, input_path, tmp_path / "output")
+
+    assert convert(input_path.read_bytes(), model) == expected
+
+
+def test_convert_accepts_binary_file_objects_and_options(tmp_path: Path):
+    input_path = tmp_path / "c6.csv"
+    input_path.write_text(C6_CSV_SAMPLE, encoding="utf-8")
+    expected = _convert_from_disk("c6-csv", input_path, tmp_path / "c6.ofx", due_date="2021-04-05")
+
+    with input_path.open("rb") as input_file:
+        converted = convert(input_file, "c6-csv", due_date="2021-04-05")
+
+    assert converted == expected
+    assert b"<DTASOF>20210405" in converted
+
+
+def test_parse_returns_statement_data_from_buffer():
+    statement = parse(C6_CSV_SAMPLE.encode("utf-8"), "c6-credit-csv", due_date="2021-04-05")
+
+    assert isinstance(statement, StatementData)
+    assert statement.account_id == "7076-7360"
+    assert len(statement.transactions) == 2
+
+
+def test_api_reports_invalid_requests():
+    with pytest.raises(ValueError, match="due_date"):
+        convert(C6_CSV_SAMPLE.encode("utf-8"), "c6-csv")
+
+    with pytest.raises(ValueError, match="modelo-inexistente"):
+        convert(b"", "modelo-inexistente")
+
+    with pytest.raises(ValueError, match="nao produz StatementData"):
+        parse(io.BytesIO(b""), "bb-cp")
+
+
+def _uppercase_stream(source, args, output):
+    content = bytes(source)
+    if content == b"corrompido":
+        raise ValueError("arquivo corrompido")
+    if content == b"lento":
+        time.sleep(30)
+    output.write(content.upper())
+
+
+def _disk_handler_not_expected(args):
+    raise AssertionError("convert_many deve converter em memoria")
+
+
+def _memory_registry() -> ConverterRegistry:
+    test_registry = ConverterRegistry()
+    test_registry.register(
+        input_format="csv",
+        output_format="csv",
+        model="fake",
+        description="Conversor fake em memoria",
+        stream_handler=_uppercase_stream,
+    )(_disk_handler_not_expected)
+    return test_registry
+
+
+def test_convert_many_reports_each_item_without_aborting(tmp_path: Path):
+    input_path = tmp_path / "extrato.csv"
+    input_path.write_bytes(b"arquivo")
+
+    async def collect():
+        sources = [b"um", input_path, b"corrompido", tmp_path / "ausente.csv"]
+        return [item async for item in convert_many(sources, "fake", concurrency=2, converter_registry=_memory_registry())]
+
+    items = sorted(asyncio.run(collect()), key=lambda item: item.index)
+
+    assert [item.output for item in items[:2]] == [b"UM", b"ARQUIVO"]
+    assert items[2].error == "arquivo corrompido"
+    assert not items[3].succeeded and "ausente.csv" in items[3].error
+
+
+def test_convert_many_stops_pending_work_when_consumer_leaves():
+    async def first_result():
+        sources = [b"rapido", b"lento", b"lento", b"lento"]
+        async with aclosing(convert_many(sources, "fake", concurrency=2, converter_registry=_memory_registry())) as items:
+            async for item in items:
+                return item
+
+    started = time.monotonic()
+    item = asyncio.run(first_result())
+
+    assert item.output == b"RAPIDO"
+    assert time.monotonic() - started < 10
+    deadline = time.monotonic() + 5
+    while multiprocessing.active_children() and time.monotonic() < deadline:
+        time.sleep(0.05)
+    assert multiprocessing.active_children() == []
+
+
+CONVERT_MANY_SCRIPT = """
+import asyncio
+import os
+import sys
+import threading
+
+from statement_converter.api import convert_many
+from tests.test_api import _memory_registry
+
+# Reproduz o aviso do Python 3.12 tambem nas versoes anteriores.
+real_fork = os.fork
+
+
+def guarded_fork():
+    if threading.active_count() > 1:
+        raise DeprecationWarning("fork() em um processo com varias threads")
+    return real_fork()
+
+
+os.fork = guarded_fork
+
+
+async def collect():
+    sources = sys.argv[1:]
+    return [item async for item in convert_many(sources, "fake", concurrency=2, converter_registry=_memory_registry())]
+
+
+items = asyncio.run(collect())
+assert sorted(item.output for item in items) == [b"A", b"B"], items
+"""
+
+
+def test_convert_many_does_not_fork_beside_reader_threads(tmp_path: Path):
+    (tmp_path / "a.csv").write_bytes(b"a")
+    (tmp_path / "b.csv").write_bytes(b"b")
+
+    completed = subprocess.run(
+        [
+            sys.executable,
+            "-W",
+            "error::DeprecationWarning",
+            "-c",
+            CONVERT_MANY_SCRIPT,
+            str(tmp_path / "a.csv"),
+            str(tmp_path / "b.csv"),
+        ],
+        cwd=Path(__file__).parent.parent,
+        capture_output=True,
+        text=True,
+        timeout=60,
+    )
+
+    assert completed.returncode == 0, completed.stderr
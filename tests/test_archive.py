@@ -0,0 +1,216 @@
+import io
+import multiprocessing
+import tarfile
+import zipfile
+from pathlib import Path, PurePosixPath
+
+import pytest
+
+from statement_converter import statement_converter
+from statement_converter._batch import worker_context
+from statement_converter._archive import ArchiveWriteError, ArchiveWriter, is_archive, iter_archive_members
+from statement_converter._source import read_source_bytes
+from statement_converter.converter_registry import ConverterRegistry
+
+
+MEMBERS = {
+    "2024/jan.pdf": b"janeiro",
+    "2024/fev.pdf": b"fevereiro",
+    "leia-me.txt": b"texto",
+    ".oculto.pdf": b"oculto",
+    "../fora.pdf": b"fora",
+}
+
+
+def _write_zip(path: Path) -> Path:
+    with zipfile.ZipFile(path, "w") as bundle:
+        for name, data in MEMBERS.items():
+            bundle.writestr(name, data)
+    return path
+
+
+def _write_tar_gz(path: Path) -> Path:
+    with tarfile.open(path, "w:gz") as bundle:
+        for name, data in MEMBERS.items():
+            info = tarfile.TarInfo(name)
+            info.size = len(data)
+            bundle.addfile(info, io.BytesIO(data))
+    return path
+
+
+def _upper_stream(source, args, output):
+    output.write(read_source_bytes(source).upper())
+
+
+def _copy_from_disk(args):
+    # Conversor sem stream_handler: recebe o membro em um arquivo temporario.
+    args.output_path.write_bytes(args.input_path.read_bytes()[::-1])
+    print(f"gerado {args.output_path.name}")
+
+
+def _archive_registry() -> ConverterRegistry:
+    test_registry = ConverterRegistry()
+    test_registry.register(
+        input_format="pdf",
+        output_format="ofx",
+        model="vr",
+        description="Conversor fake em memoria",
+        stream_handler=_upper_stream,
+    )(_copy_from_disk)
+    test_registry.register(
+        input_format="txt",
+        output_format="csv",
+        model="bb-lc",
+        description="Conversor fake em disco",
+    )(_copy_from_disk)
+    return test_registry
+
+
+@pytest.mark.parametrize("write_archive", [_write_zip, _write_tar_gz])
+def test_iter_archive_members_skips_hidden_and_unsafe_names(
+    write_archive,
+    tmp_path: Path,
+    capsys: pytest.CaptureFixture[str],
+):
+    archive = write_archive(tmp_path / f"extratos.{'zip' if write_archive is _write_zip else 'tar.gz'}")
+
+    members = list(iter_archive_members(archive))
+
+    assert is_archive(archive)
+    assert [(member.name, member.data) for member in members] == [
+        (PurePosixPath("2024/jan.pdf"), b"janeiro"),
+        (PurePosixPath("2024/fev.pdf"), b"fevereiro"),
+        (PurePosixPath("leia-me.txt"), b"texto"),
+    ]
+    assert members[0].path == archive / "2024" / "jan.pdf"
+    assert "../fora.pdf" in capsys.readouterr().err
+
+
+def test_iter_archive_members_filters_names_before_reading(tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+    archive = _write_zip(tmp_path / "extratos.zip")
+    read_names: list[str] = []
+    read = zipfile.ZipFile.read
+    monkeypatch.setattr(zipfile.ZipFile, "read", lambda bundle, info: read_names.append(info.filename) or read(bundle, info))
+
+    members = list(iter_archive_members(archive, lambda name: name.suffix == ".txt"))
+
+    assert [member.name for member in members] == [PurePosixPath("leia-me.txt")]
+    assert read_names == ["leia-me.txt"]
+
+
+def test_main_accepts_empty_shard_of_archive(tmp_path: Path, capsys: pytest.CaptureFixture[str]):
+    archive = tmp_path / "extratos.zip"
+    with zipfile.ZipFile(archive, "w") as bundle:
+        bundle.writestr("2024/jan.pdf", b"janeiro")
+    shards = ["1/2", "2/2"]
+
+    exit_codes = [
+        statement_converter.main(
+            ["--model", "vr", "--shard", shard, str(archive), str(tmp_path / f"saida-{index}")],
+            converter_registry=_archive_registry(),
+        )
+        for index, shard in enumerate(shards)
+    ]
+
+    assert exit_codes == [0, 0]
+    assert len(list(tmp_path.glob("saida-*/2024/jan.ofx"))) == 1
+    assert capsys.readouterr().out.count("Conversao em lote concluida: 0 sucesso(s), 0 falha(s).") == 1
+
+
+def test_main_converts_archive_members_in_memory(tmp_path: Path, capsys: pytest.CaptureFixture[str]):
+    archive = _write_zip(tmp_path / "extratos.zip")
+    output_dir = tmp_path / "saida"
+
+    exit_code = statement_converter.main(
+        ["--route", "*.pdf=vr", "--route", "*.txt=bb-lc", "--jobs", "2", str(archive), str(output_dir)],
+        converter_registry=_archive_registry(),
+    )
+
+    captured = capsys.readouterr()
+    assert exit_code == 0
+    assert (output_dir / "2024" / "jan.ofx").read_bytes() == b"JANEIRO"
+    assert (output_dir / "2024" / "fev.ofx").read_bytes() == b"FEVEREIRO"
+    assert (output_dir / "leia-me.csv").read_bytes() == b"otxet"
+    assert "gerado leia-me.csv" in captured.out
+    assert "Conversao em lote concluida: 3 sucesso(s), 0 falha(s)." in captured.out
+    assert not list(tmp_path.glob("**/fora.*"))
+
+
+def test_main_reports_truncated_archive(tmp_path: Path, capsys: pytest.CaptureFixture[str]):
+    archive = _write_tar_gz(tmp_path / "extratos.tar.gz")
+    archive.write_bytes(archive.read_bytes()[:40])
+
+    exit_code = statement_converter.main(
+        ["--model", "vr", str(archive), str(tmp_path / "saida")],
+        converter_registry=_archive_registry(),
+    )
+
+    assert exit_code == 1
+    assert "arquivo compactado invalido ou incompleto" in capsys.readouterr().err
+
+
+@pytest.mark.parametrize("output_name", ["saida.zip", "saida.tar.gz"])
+def test_main_writes_batch_outputs_into_one_archive(output_name: str, tmp_path: Path, capsys: pytest.CaptureFixture[str]):
+    input_dir = tmp_path / "entrada"
+    (input_dir / "2024").mkdir(parents=True)
+    (input_dir / "2024" / "jan.pdf").write_bytes(b"janeiro")
+    (input_dir / "notas.txt").write_bytes(b"texto")
+    output_path = tmp_path / output_name
+
+    exit_code = statement_converter.main(
+        ["--route", "*.pdf=vr", "--route", "*.txt=bb-lc", "--recursive", "--jobs", "2", str(input_dir), str(output_path)],
+        converter_registry=_archive_registry(),
+    )
+
+    captured = capsys.readouterr()
+    assert exit_code == 0
+    assert f"2 saida(s) gravada(s) em {output_path}." in captured.out
+    assert sorted(path.name for path in tmp_path.iterdir()) == sorted(["entrada", output_name])
+    if output_name.endswith(".zip"):
+        with zipfile.ZipFile(output_path) as bundle:
+            assert bundle.getinfo("2024/jan.ofx").compress_type == zipfile.ZIP_DEFLATED
+            contents = {name: bundle.read(name) for name in bundle.namelist()}
+    else:
+        with tarfile.open(output_path, "r:gz") as bundle:
+            contents = {member.name: bundle.extractfile(member).read() for member in bundle.getmembers()}
+    assert contents == {"2024/jan.ofx": b"JANEIRO", "notas.csv": b"otxet"}
+
+
+@pytest.mark.skipif("forkserver" not in multiprocessing.get_all_start_methods(), reason="forkserver indisponivel")
+def test_archive_output_workers_are_not_forked_beside_the_writer_thread(
+    tmp_path: Path,
+    monkeypatch: pytest.MonkeyPatch,
+    capsys: pytest.CaptureFixture[str],
+):
+    start_methods: list[str] = []
+
+    def recording_context(threaded: bool = False):
+        context = worker_context(threaded)
+        start_methods.append(context.get_start_method())
+        return context
+
+    monkeypatch.setattr(statement_converter, "worker_context", recording_context)
+    input_dir = tmp_path / "entrada"
+    input_dir.mkdir()
+    (input_dir / "jan.pdf").write_bytes(b"janeiro")
+
+    exit_code = statement_converter.main(
+        ["--route", "*.pdf=vr", "--jobs", "2", str(input_dir), str(tmp_path / "saida.zip")],
+        converter_registry=_archive_registry(),
+    )
+
+    assert exit_code == 0
+    assert start_methods == ["forkserver"]
+    with zipfile.ZipFile(tmp_path / "saida.zip") as bundle:
+        assert bundle.read("jan.ofx") == b"JANEIRO"
+
+
+def test_archive_writer_reports_write_failures(tmp_path: Path):
+    blocked = tmp_path / "saida.zip"
+    blocked.mkdir()
+
+    writer = ArchiveWriter(blocked, queue_size=1)
+    with pytest.raises(ArchiveWriteError):
+        with writer:
+            for index in range(5):
+                writer.add(f"{index}.ofx", b"dados")
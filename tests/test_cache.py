@@ -0,0 +1,75 @@
+import argparse
+import os
+from pathlib import Path
+
+import pytest
+
+from statement_converter import _cache
+from statement_converter._cache import ConversionCache, parse_size
+from statement_converter.converter_registry import ConverterSpec
+
+
+def _spec(model: str = "c6-credit-csv", required_options: tuple[str, ...] = ("due_date",)) -> ConverterSpec:
+    return ConverterSpec(
+        input_format="csv",
+        output_format="ofx",
+        model=model,
+        handler=lambda args: None,
+        description="Conversor fake para teste",
+        required_options=required_options,
+    )
+
+
+def test_key_depends_on_content_model_and_converter_options(tmp_path: Path):
+    cache = ConversionCache(tmp_path / "cache")
+    first = tmp_path / "fatura.csv"
+    renamed = tmp_path / "outra-pasta-fatura.csv"
+    first.write_bytes(b"conteudo")
+    renamed.write_bytes(b"conteudo")
+    args = argparse.Namespace(due_date="2021-04-05")
+
+    key = cache.key_for(first, _spec(), args)
+
+    assert cache.key_for(renamed, _spec(), args) == key
+    assert cache.key_for(first, _spec(), argparse.Namespace(due_date="2021-05-05")) != key
+    assert cache.key_for(first, _spec(model="c6-pdf"), args) != key
+
+
+def test_prune_evicts_least_recently_used_entries(tmp_path: Path):
+    cache = ConversionCache(tmp_path / "cache", max_size=10)
+    output_file = tmp_path / "saida.ofx"
+    for index, key in enumerate(("aa01", "bb02", "cc03")):
+        output_file.write_bytes(b"x" * 4)
+        cache.store(key, output_file)
+        os.utime(cache._entry_path(key), (1_000 + index, 1_000 + index))
+
+    assert cache.fetch("aa01", tmp_path / "reaproveitado.ofx")
+    assert cache.prune() == 1
+
+    assert cache._entry_path("aa01").exists()
+    assert not cache._entry_path("bb02").exists()
+    assert cache.stats().entries == 2
+    assert cache.stats().total_bytes == 8
+
+
+def test_parse_size_accepts_unit_suffixes():
+    assert parse_size("512") == 512
+    assert parse_size("2K") == 2048
+    assert parse_size("1g") == 1024**3
+    with pytest.raises(ValueError):
+        parse_size("muito")
+
+
+def test_cache_command_reports_and_prunes(tmp_path: Path, capsys: pytest.CaptureFixture[str]):
+    cache = ConversionCache(tmp_path)
+    output_file = tmp_path / "saida.ofx"
+    output_file.write_bytes(b"conteudo")
+    cache.store("abcd", output_file)
+
+    assert _cache.main(["stats", "--cache-dir", str(tmp_path)]) == 0
+    assert "Entradas: 1" in capsys.readouterr().out
+
+    assert _cache.main(["prune", "--cache-dir", str(tmp_path), "--max-size", "0"]) == 0
+    captured = capsys.readouterr()
+    assert "1 entrada(s) removida(s) do cache." in captured.out
+    assert "Entradas: 0" in captured.out
@@ -1,6 +1,9 @@
+import io
 import os
+import sys
 from pathlib import Path
 import pytest
+from src.statement_converter import convert_bb_cp
 from src.statement_converter.convert_bb_cp import parse_csv
 
 SAMPLES_DIR = Path(__file__).parent.parent / "samples"
@@ -25,3 +28,15 @@ def test_parse_csv_bb_cp():
     # Deve ter o formato "123,45" e "C" ou "D"
     assert first_row["Valor"].replace(",", "").replace(".", "").isdigit()
     assert first_row["Type"] in ("C", "D", "")
+
+
+def test_main_reads_stdin_and_writes_stdout(tmp_path, monkeypatch, capsysbinary):
+    sample_file = SAMPLES_DIR / "bb-cp.csv"
+    output_file = tmp_path / "bb-cp.csv"
+    convert_bb_cp.process_csv(sample_file, output_file)
+
+    monkeypatch.setattr(sys, "argv", ["convert-bb-cp", "-", "-"])
+    monkeypatch.setattr(sys, "stdin", io.TextIOWrapper(io.BytesIO(sample_file.read_bytes())))
+    convert_bb_cp.main()
+
+    assert capsysbinary.readouterr().out == output_file.read_bytes()
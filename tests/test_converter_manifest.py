@@ -0,0 +1,85 @@
+import json
+import os
+import pickle
+import subprocess
+import sys
+from pathlib import Path
+
+from statement_converter._converter_manifest import package_key, read_manifest, write_manifest
+from statement_converter.converter_registry import ConverterRegistry, LazyCallable
+
+
+def _run_python(script: str, cache_home: Path) -> str:
+    completed = subprocess.run(
+        [sys.executable, "-c", script],
+        capture_output=True,
+        text=True,
+        env={**os.environ, "XDG_CACHE_HOME": str(cache_home)},
+        check=True,
+    )
+    return completed.stdout.splitlines()[-1]
+
+
+def test_completion_uses_manifest_without_importing_converters(tmp_path: Path):
+    script = (
+        "import json, sys\n"
+        "from statement_converter import statement_converter\n"
+        "models = statement_converter._complete_model('picpay', None)\n"
+        "print(json.dumps([models, sorted(name for name in sys.modules if '.convert_' in name)]))\n"
+    )
+
+    first_models, first_imported = json.loads(_run_python(script, tmp_path))
+    second_models, second_imported = json.loads(_run_python(script, tmp_path))
+
+    assert first_models == second_models == ["picpay", "picpay-2024", "picpay-2025"]
+    assert "statement_converter.convert_picpay_pdf_ofx" in first_imported
+    assert second_imported == []
+    manifest = json.loads((tmp_path / "statement-converter" / "converters.json").read_text(encoding="utf-8"))
+    entry = manifest["modules"]["statement_converter.convert_vr_pdf_ofx"][0]
+    assert entry["model"] == "vr"
+    assert entry["handler"] == "statement_converter.convert_vr_pdf_ofx:_run"
+
+
+def test_manifest_specs_import_handler_module_on_first_call(tmp_path: Path):
+    script = (
+        "import io, json, sys\n"
+        "from statement_converter.converter_registry import registry\n"
+        "registry.load_package_converters('statement_converter')\n"
+        "spec = registry.find_by_model('bb-lc')\n"
+        "before = 'statement_converter.convert_bb_lc' in sys.modules\n"
+        "output = io.BytesIO()\n"
+        "spec.stream_handler(b'', None, output)\n"
+        "print(json.dumps([before, 'statement_converter.convert_bb_lc' in sys.modules, spec.handler.__module__]))\n"
+    )
+    _run_python("from statement_converter.converter_registry import registry; "
+                "registry.load_package_converters('statement_converter'); print()", tmp_path)
+
+    before, after, module = json.loads(_run_python(script, tmp_path))
+
+    assert (before, after) == (False, True)
+    assert module == "statement_converter.convert_bb_lc"
+
+
+def test_manifest_is_ignored_when_package_key_changes(tmp_path: Path):
+    path = tmp_path / "converters.json"
+    write_manifest(path, "chave-antiga", {"statement_converter.convert_vr_pdf_ofx": []})
+
+    assert read_manifest(path, "chave-antiga") == {"statement_converter.convert_vr_pdf_ofx": []}
+    assert read_manifest(path, "chave-nova") is None
+
+    module_file = tmp_path / "convert_fake.py"
+    module_file.write_text("x = 1\n", encoding="utf-8")
+    key = package_key([str(tmp_path)], ["pacote.convert_fake"])
+    module_file.write_text("x = 22\n", encoding="utf-8")
+    assert package_key([str(tmp_path)], ["pacote.convert_fake"]) != key
+
+
+def test_lazy_callable_survives_pickle_and_registry_roundtrip():
+    lazy = pickle.loads(pickle.dumps(LazyCallable("statement_converter._ofx_common", "parse_brl_amount")))
+
+    assert str(lazy("1.234,56")) == "1234.56"
+    assert lazy.__module__ == "statement_converter._ofx_common"
+
+    registry = ConverterRegistry()
+    registry.register(input_format="pdf", output_format="ofx", model="fake", description="Fake")(lazy)
+    assert registry.all()[0].to_manifest()["handler"] == "statement_converter._ofx_common:parse_brl_amount"
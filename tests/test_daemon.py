@@ -0,0 +1,134 @@
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+from statement_converter import _daemon
+
+
+DAEMON_COMMAND = [sys.executable, "-c", "from statement_converter.statement_converter import main; raise SystemExit(main())"]
+
+
+@pytest.fixture
+def running_daemon(tmp_path: Path):
+    socket_path = tmp_path / "daemon.sock"
+    process = subprocess.Popen(
+        [*DAEMON_COMMAND, "daemon", "run", "--socket", str(socket_path), "--workers", "2"],
+        stdout=subprocess.PIPE,
+        text=True,
+    )
+    deadline = time.monotonic() + 30
+    while _daemon.ping(socket_path) is None:
+        if process.poll() is not None or time.monotonic() > deadline:
+            process.kill()
+            pytest.fail("o daemon nao iniciou")
+        time.sleep(0.05)
+
+    yield socket_path, process
+
+    if process.poll() is None:
+        process.terminate()
+        process.wait(timeout=10)
+
+
+def test_forward_to_daemon_returns_none_without_daemon(tmp_path: Path):
+    assert _daemon.forward_to_daemon(["--help"], socket_path=tmp_path / "ausente.sock") is None
+
+
+def test_daemon_converts_forwarded_requests(
+    running_daemon,
+    tmp_path: Path,
+    monkeypatch: pytest.MonkeyPatch,
+    capsys: pytest.CaptureFixture[str],
+):
+    socket_path, process = running_daemon
+    monkeypatch.delenv(_daemon.NO_DAEMON_ENV, raising=False)
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "bb-cp.csv").write_bytes(Path(__file__).parent.joinpath("../samples/bb-cp.csv").read_bytes())
+
+    exit_code = _daemon.forward_to_daemon(["--model", "bb-cp", "bb-cp.csv", "saida.csv"], socket_path=socket_path)
+
+    assert exit_code == 0
+    assert (tmp_path / "saida.csv").read_text(encoding="utf-8").startswith('"Data"')
+
+    exit_code = _daemon.forward_to_daemon(["--model", "desconhecido", "bb-cp.csv", "saida.csv"], socket_path=socket_path)
+
+    assert exit_code == 2
+    assert "nenhum conversor foi encontrado para o modelo desconhecido" in capsys.readouterr().err
+
+    monkeypatch.setenv(_daemon.SOCKET_ENV, str(socket_path))
+    assert _daemon.main(["stop"]) == 0
+    assert process.wait(timeout=10) == 0
+    assert not socket_path.exists()
+
+
+def test_daemon_socket_is_private(running_daemon):
+    socket_path, _ = running_daemon
+
+    assert socket_path.stat().st_mode & 0o777 == 0o600
+
+
+def test_daemon_uses_client_cache_directory(
+    running_daemon,
+    tmp_path: Path,
+    monkeypatch: pytest.MonkeyPatch,
+):
+    socket_path, _ = running_daemon
+    client_cache = tmp_path / "cache-do-cliente"
+    monkeypatch.delenv(_daemon.NO_DAEMON_ENV, raising=False)
+    monkeypatch.setenv("XDG_CACHE_HOME", str(client_cache))
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "bb-cp.csv").write_bytes(Path(__file__).parent.joinpath("../samples/bb-cp.csv").read_bytes())
+
+    exit_code = _daemon.forward_to_daemon(["--cache", "--model", "bb-cp", "bb-cp.csv", "saida.csv"], socket_path=socket_path)
+
+    assert exit_code == 0
+    assert any((client_cache / "statement-converter").iterdir())
+
+
+def test_forward_to_daemon_ignores_paths_that_are_not_own_sockets(tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.delenv(_daemon.NO_DAEMON_ENV, raising=False)
+    fake_socket = tmp_path / "falso.sock"
+    fake_socket.write_text("", encoding="utf-8")
+
+    assert _daemon.forward_to_daemon(["--help"], socket_path=fake_socket) is None
+
+
+def test_forward_to_daemon_ignores_sockets_of_other_users(
+    running_daemon,
+    tmp_path: Path,
+    monkeypatch: pytest.MonkeyPatch,
+):
+    socket_path, _ = running_daemon
+    monkeypatch.delenv(_daemon.NO_DAEMON_ENV, raising=False)
+    monkeypatch.setattr(_daemon.os, "getuid", lambda: 4242)
+
+    assert _daemon.forward_to_daemon(["--help"], socket_path=socket_path) is None
+
+
+def test_default_socket_path_without_runtime_dir_is_in_a_private_directory(monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.delenv(_daemon.SOCKET_ENV, raising=False)
+    monkeypatch.delenv("XDG_RUNTIME_DIR", raising=False)
+
+    socket_path = _daemon.default_socket_path()
+
+    assert socket_path.parent.name == f"statement-converter-{os.getuid()}"
+
+
+def test_daemon_creates_the_socket_directory_private(tmp_path: Path):
+    socket_path = tmp_path / "statement-converter-1000" / "daemon.sock"
+    process = subprocess.Popen([*DAEMON_COMMAND, "daemon", "run", "--socket", str(socket_path), "--workers", "1"])
+    try:
+        deadline = time.monotonic() + 30
+        while _daemon.ping(socket_path) is None:
+            if process.poll() is not None or time.monotonic() > deadline:
+                pytest.fail("o daemon nao iniciou")
+            time.sleep(0.05)
+
+        assert socket_path.parent.stat().st_mode & 0o777 == 0o700
+    finally:
+        process.terminate()
+        process.wait(timeout=10)
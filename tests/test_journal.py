@@ -0,0 +1,32 @@
+from pathlib import Path
+
+from statement_converter._journal import JOURNAL_NAME, ConversionJournal, input_identity
+
+
+def test_journal_resumes_only_verified_outputs(tmp_path: Path):
+    input_file = tmp_path / "a.pdf"
+    input_file.write_bytes(b"extrato")
+    output_dir = tmp_path / "saida"
+    output_file = output_dir / "a.ofx"
+    output_dir.mkdir()
+    output_file.write_text("<OFX>", encoding="utf-8")
+
+    journal = ConversionJournal.open(output_dir, resume=False)
+    journal.record("a.pdf", input_identity(input_file, None), "vr", output_file, succeeded=True)
+    journal.record("b.pdf", (7, None), "vr", output_dir / "b.ofx", succeeded=False)
+    journal.close(completed=False)
+    with (output_dir / JOURNAL_NAME).open("a", encoding="utf-8") as file:
+        file.write('{"input": "c.pdf", "si')
+
+    resumed = ConversionJournal.open(output_dir, resume=True)
+    assert resumed.is_completed("a.pdf", input_file, None, output_file)
+    assert not resumed.is_completed("b.pdf", input_file, b"extrato", output_dir / "b.ofx")
+    assert not resumed.is_completed("c.pdf", input_file, None, output_dir / "c.ofx")
+
+    resumed.record("c.pdf", input_identity(input_file, None), "vr", output_file, succeeded=False)
+    assert ConversionJournal._load(output_dir / JOURNAL_NAME)["c.pdf"].status == "error"
+
+    output_file.write_text("<OF", encoding="utf-8")
+    assert not resumed.is_completed("a.pdf", input_file, None, output_file)
+    resumed.close(completed=True)
+    assert not (output_dir / JOURNAL_NAME).exists()
@@ -0,0 +1,34 @@
+import os
+from pathlib import Path
+
+from statement_converter._manifest import MANIFEST_NAME, ConversionManifest, file_sha256
+
+
+def test_manifest_accepts_touched_input_with_same_content(tmp_path: Path):
+    input_file = tmp_path / "extrato.pdf"
+    output_file = tmp_path / "saida" / "extrato.ofx"
+    input_file.write_bytes(b"conteudo")
+    output_file.parent.mkdir()
+    output_file.write_text("ok", encoding="utf-8")
+
+    manifest = ConversionManifest.load(output_file.parent)
+    manifest.record("extrato.pdf", input_file, output_file, "vr", "v1")
+    manifest.save()
+
+    stat = input_file.stat()
+    os.utime(input_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 5_000_000_000))
+
+    reloaded = ConversionManifest.load(output_file.parent)
+    assert reloaded.is_up_to_date("extrato.pdf", input_file, output_file, "vr", "v1")
+    assert reloaded.get("extrato.pdf").mtime_ns == input_file.stat().st_mtime_ns
+    assert reloaded.get("extrato.pdf").sha256 == file_sha256(input_file)
+    assert not reloaded.is_up_to_date("extrato.pdf", input_file, output_file, "vr", "v2")
+    assert not reloaded.is_up_to_date("extrato.pdf", input_file, output_file, "picpay", "v1")
+
+
+def test_manifest_ignores_corrupted_file(tmp_path: Path):
+    (tmp_path / MANIFEST_NAME).write_text("{nao e json", encoding="utf-8")
+
+    manifest = ConversionManifest.load(tmp_path)
+
+    assert manifest.get("qualquer.pdf") is None
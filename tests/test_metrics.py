@@ -0,0 +1,128 @@
+import io
+import sys
+import zlib
+
+import pytest
+
+from statement_converter import _metrics, convert_vr_pdf_ofx
+from statement_converter._metrics import (
+    STAGES,
+    MemoryLimitExceeded,
+    collect,
+    count,
+    measure,
+    memory_limit,
+    memory_limit_supported,
+    span,
+    stage,
+)
+from statement_converter.api import resolve_converter
+from statement_converter.converter_registry import converter_dependencies
+
+
+def _vr_pdf() -> bytes:
+    blocks = [
+        (10, 800, "123456789012"),
+        (10, 750, "DATA_HORA"),
+        (10, 700, "01/01/2024 14:01:46"),
+        (300, 700, "LOJA"),
+        (700, 700, "Consumo Confirmado"),
+        (1000, 700, "250,00"),
+    ]
+    content = b"\n".join(f"BT 1 0 0 1 {x} {y} Tm ({text}) Tj ET".encode("latin1") for x, y, text in blocks)
+    return b"%PDF-1.4\n1 0 obj\n<< >>\nstream\n" + zlib.compress(content) + b"\nendstream\nendobj\n"
+
+
+@stage("parse")
+def _double(value: int) -> int:
+    return value * 2
+
+
+def test_count_and_span_are_ignored_outside_collect():
+    count("transactions")
+    with span("parse"):
+        pass
+
+    assert _double(2) == 4
+    assert _double.__name__ == "_double"
+
+
+def test_collect_records_counters_and_stage_durations():
+    with collect() as collector:
+        count("transactions", 3)
+        count("pages")
+        with span("extract"):
+            with span("decompress"):
+                pass
+        _double(1)
+        _double(2)
+
+    assert collector.counters == {"transactions": 3, "pages": 1}
+    assert set(collector.stages) == {"extract", "decompress", "parse"}
+    assert collector.stages["extract"] >= collector.stages["decompress"]
+
+
+def test_nested_collect_adds_to_outer_collector():
+    with collect() as outer:
+        count("rows")
+        with collect() as inner:
+            count("rows", 2)
+
+    assert inner.counters == {"rows": 2}
+    assert outer.counters == {"rows": 3}
+
+
+def test_converter_reports_stages_and_counters():
+    output = io.BytesIO()
+
+    with measure() as metrics:
+        convert_vr_pdf_ofx._write_stream(_vr_pdf(), None, output)
+
+    assert b"<STMTTRN>" in output.getvalue()
+    assert metrics.counters == {"streams": 1, "text_elements": 6, "pages": 1, "rows": 3, "transactions": 1}
+    assert set(metrics.stages) == {"read", "decompress", "extract", "parse", "render"}
+    assert set(metrics.stages) <= set(STAGES)
+    assert metrics.wall_seconds >= metrics.stages["extract"]
+
+
+def test_measure_traces_allocation_peak():
+    with measure(trace_allocations=True) as metrics:
+        buffer = bytearray(8 * 1024 * 1024)
+        del buffer
+
+    assert metrics.peak_traced_bytes >= 8 * 1024 * 1024
+    assert metrics.peak_rss_bytes is None
+
+
+@pytest.mark.skipif(not memory_limit_supported(), reason="limite de memoria indisponivel nesta plataforma")
+def test_memory_limit_aborts_allocation_and_restores_limit():
+    with pytest.raises(MemoryLimitExceeded, match="64 MB"):
+        with memory_limit(64 * 1024 * 1024):
+            bytearray(1024 * 1024 * 1024)
+
+    assert len(bytearray(256 * 1024 * 1024)) == 256 * 1024 * 1024
+
+
+@pytest.mark.skipif(not memory_limit_supported(), reason="limite de memoria indisponivel nesta plataforma")
+def test_memory_limit_preloads_dependencies_and_translates_import_errors(monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.delitem(sys.modules, "colorsys", raising=False)
+
+    with pytest.raises(MemoryLimitExceeded, match="64 MB"):
+        with memory_limit(64 * 1024 * 1024, ["colorsys"]):
+            assert "colorsys" in sys.modules
+            raise ImportError("failed to map segment from shared object")
+
+    with pytest.raises(ModuleNotFoundError):
+        with memory_limit(64 * 1024 * 1024):
+            import modulo_inexistente  # noqa: F401
+
+
+def test_memory_limit_requires_readable_address_space(monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setattr(_metrics, "_address_space_bytes", lambda: None)
+
+    assert not memory_limit_supported()
+
+
+def test_converter_dependencies_come_from_the_converter_module():
+    assert converter_dependencies(resolve_converter("rico-ofx")) == ("pandas",)
+    assert converter_dependencies(resolve_converter("vr")) == ()
@@ -1,8 +1,20 @@
 from datetime import datetime
 from decimal import Decimal
+import io
 import re
+from pathlib import Path
 
-from statement_converter._ofx_common import StatementData, StatementTransaction, build_ofx, build_credit_card_ofx
+from statement_converter._ofx_common import (
+    StatementData,
+    StatementTransaction,
+    build_credit_card_ofx,
+    build_ofx,
+    write_credit_card_ofx,
+    write_ofx,
+)
+
+
+SAMPLES_DIR = Path(__file__).parent.parent / "samples"
 
 
 def _statement_transaction() -> StatementTransaction:
@@ -57,3 +69,65 @@ def test_build_credit_card_ofx_generates_distinct_fitids_for_equivalent_transact
 
     assert len(fitids) == 2
     assert fitids[0] != fitids[1]
+
+
+class _PipeOutput(io.BytesIO):
+    def seekable(self) -> bool:
+        return False
+
+
+def _unordered_statement() -> StatementData:
+    return StatementData(
+        account_id="123",
+        account_type="CHECKING",
+        bank_id="BANK",
+        currency="BRL",
+        generated_at=datetime(2025, 1, 31, 12, 0),
+        start_date=None,
+        end_date=None,
+        transactions=[
+            StatementTransaction(datetime(2025, 1, 15), "PIX", Decimal("-5.00"), Decimal("95.00")),
+            StatementTransaction(datetime(2025, 1, 3), "TED", Decimal("100.00"), Decimal("100.00")),
+            StatementTransaction(datetime(2025, 1, 20), "TARIFA", Decimal("-1.50"), None),
+        ],
+    )
+
+
+# Documentos gerados pelo renderizador anterior (build_ofx em strings), antes da escrita em stream.
+GOLDEN_OFX = SAMPLES_DIR / "unordered-statement.ofx"
+GOLDEN_CREDIT_CARD_OFX = SAMPLES_DIR / "unordered-statement-credit-card.ofx"
+BALANCE_AS_OF = datetime(2025, 2, 10)
+
+
+def test_write_ofx_backfills_period_and_balance_in_one_pass(tmp_path):
+    statement = _unordered_statement()
+    output_path = tmp_path / "extrato.ofx"
+
+    with output_path.open("wb") as output:
+        write_ofx(statement, output)
+
+    content = output_path.read_bytes()
+    assert content == GOLDEN_OFX.read_bytes()
+    assert b"<DTSTART>20250103000000\n<DTEND>20250120000000\n<STMTTRN>" in content
+    assert b"<BALAMT>100.00\n<DTASOF>20250120000000" in content
+
+
+def test_write_credit_card_ofx_to_seekable_output_matches_previous_renderer():
+    output = io.BytesIO()
+
+    write_credit_card_ofx(_unordered_statement(), BALANCE_AS_OF, output)
+
+    assert output.getvalue() == GOLDEN_CREDIT_CARD_OFX.read_bytes()
+
+
+def test_writers_without_seek_match_previous_renderer():
+    statement = _unordered_statement()
+    bank_output = _PipeOutput()
+    credit_output = _PipeOutput()
+
+    write_ofx(statement, bank_output)
+    write_credit_card_ofx(statement, BALANCE_AS_OF, credit_output)
+
+    assert bank_output.getvalue() == GOLDEN_OFX.read_bytes()
+    assert credit_output.getvalue() == GOLDEN_CREDIT_CARD_OFX.read_bytes()
+    assert b"<BALAMT>93.50" in credit_output.getvalue()
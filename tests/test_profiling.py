@@ -0,0 +1,116 @@
+import pstats
+import sys
+from pathlib import Path
+
+import pytest
+
+from statement_converter import convert_bb_cp, statement_converter
+from statement_converter._profiling import collapsed_stacks
+from statement_converter.converter_registry import ConverterRegistry
+
+
+SAMPLES_DIR = Path(__file__).parent.parent / "samples"
+ROOT = ("main.py", 1, "main")
+PARSE = ("parser.py", 10, "parse")
+RENDER = ("render.py", 20, "render")
+
+
+def _busy_convert(args):
+    total = sum(index * index for index in range(20_000))
+    args.output_path.write_text(str(total), encoding="utf-8")
+
+
+def _profile_registry() -> ConverterRegistry:
+    test_registry = ConverterRegistry()
+    test_registry.register(
+        input_format="pdf",
+        output_format="ofx",
+        model="vr",
+        description="Conversor fake",
+    )(_busy_convert)
+    return test_registry
+
+
+def test_collapsed_stacks_split_time_between_callers():
+    stats = {
+        ROOT: (1, 1, 0.001, 0.004, {}),
+        PARSE: (2, 2, 0.002, 0.003, {ROOT: (2, 2, 0.002, 0.003)}),
+        RENDER: (1, 1, 0.001, 0.001, {PARSE: (1, 1, 0.001, 0.001)}),
+    }
+
+    assert collapsed_stacks(stats) == {
+        "main (main.py:1)": 1000,
+        "main (main.py:1);parse (parser.py:10)": 2000,
+        "main (main.py:1);parse (parser.py:10);render (render.py:20)": 1000,
+    }
+
+
+def test_main_profile_aggregates_batch(tmp_path: Path, capsys: pytest.CaptureFixture[str]):
+    input_dir = tmp_path / "entrada"
+    input_dir.mkdir()
+    for name in ("a.pdf", "b.pdf"):
+        (input_dir / name).write_bytes(b"extrato")
+    profile_file = tmp_path / "perfil.prof"
+    collapsed_file = tmp_path / "perfil.txt"
+
+    exit_code = statement_converter.main(
+        [
+            "--model",
+            "vr",
+            "--jobs",
+            "2",
+            "--profile",
+            str(profile_file),
+            "--profile-collapsed",
+            str(collapsed_file),
+            str(input_dir),
+            str(tmp_path / "saida"),
+        ],
+        converter_registry=_profile_registry(),
+    )
+
+    capsys.readouterr()
+    assert exit_code == 0
+    calls = {function[2]: stats[1] for function, stats in pstats.Stats(str(profile_file)).stats.items()}
+    assert calls["_busy_convert"] == 2
+    stacks = collapsed_file.read_text(encoding="utf-8").splitlines()
+    assert any("_busy_convert (test_profiling.py:" in line for line in stacks)
+    assert all(line.rpartition(" ")[2].isdigit() for line in stacks)
+
+
+def test_main_profile_directory_writes_one_file_per_input(tmp_path: Path, capsys: pytest.CaptureFixture[str]):
+    input_dir = tmp_path / "entrada"
+    (input_dir / "2024").mkdir(parents=True)
+    (input_dir / "2024" / "jan.pdf").write_bytes(b"extrato")
+    profile_dir = tmp_path / "perfis"
+
+    exit_code = statement_converter.main(
+        ["--model", "vr", "--recursive", "--profile", str(profile_dir), str(input_dir), str(tmp_path / "saida")],
+        converter_registry=_profile_registry(),
+    )
+
+    capsys.readouterr()
+    assert exit_code == 0
+    assert [path.relative_to(profile_dir).as_posix() for path in profile_dir.rglob("*.prof")] == ["2024/jan.pdf.prof"]
+
+
+def test_script_profile_option(tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+    output_file = tmp_path / "saida.csv"
+    profile_file = tmp_path / "script.prof"
+    collapsed_file = tmp_path / "script.txt"
+    argv = [
+        "convert-bb-cp",
+        "--profile",
+        str(profile_file),
+        str(SAMPLES_DIR / "bb-cp.csv"),
+        str(output_file),
+        f"--profile-collapsed={collapsed_file}",
+    ]
+    monkeypatch.setattr(sys, "argv", argv)
+
+    convert_bb_cp.main()
+
+    assert argv == ["convert-bb-cp", str(SAMPLES_DIR / "bb-cp.csv"), str(output_file)]
+    assert output_file.exists()
+    assert any(function[2] == "process_csv" for function in pstats.Stats(str(profile_file)).stats)
+    assert "process_csv (convert_bb_cp.py:" in collapsed_file.read_text(encoding="utf-8")
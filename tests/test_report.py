@@ -0,0 +1,194 @@
+import json
+import shutil
+from pathlib import Path
+
+import pytest
+
+from statement_converter import statement_converter
+from statement_converter._metrics import count, memory_limit_supported
+from statement_converter._report import percentile
+from statement_converter.converter_registry import ConverterRegistry
+
+
+SAMPLES_DIR = Path(__file__).parent.parent / "samples"
+
+
+def _read_report(path: Path) -> list[dict]:
+    return [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines()]
+
+
+def _convert_or_fail(args):
+    data = args.input_path.read_bytes()
+    if data.startswith(b"quebrado"):
+        raise RuntimeError("layout desconhecido")
+    if data.startswith(b"enorme"):
+        data = data * (512 * 1024 * 1024)
+    count("transactions", 2)
+    args.output_path.write_bytes(data * 2)
+
+
+def _failing_registry() -> ConverterRegistry:
+    test_registry = ConverterRegistry()
+    test_registry.register(
+        input_format="pdf",
+        output_format="ofx",
+        model="vr",
+        description="Conversor fake",
+    )(_convert_or_fail)
+    return test_registry
+
+
+def test_percentile_uses_nearest_rank():
+    values = [0.4, 0.1, 0.3, 0.2]
+
+    assert percentile(values, 0.5) == 0.2
+    assert percentile(values, 0.95) == 0.4
+    assert percentile([], 0.5) is None
+
+
+def test_main_report_records_single_conversion(tmp_path: Path):
+    input_file = tmp_path / "bb-cp.csv"
+    shutil.copy(SAMPLES_DIR / "bb-cp.csv", input_file)
+    output_file = tmp_path / "saida.csv"
+    report_file = tmp_path / "relatorio.jsonl"
+
+    exit_code = statement_converter.main(
+        ["--model", "bb-cp", "--report", str(report_file), str(input_file), str(output_file)]
+    )
+
+    assert exit_code == 0
+    record, summary = _read_report(report_file)
+    assert record["type"] == "file"
+    assert record["model"] == "bb-cp"
+    assert record["status"] == "ok"
+    assert record["input_bytes"] == input_file.stat().st_size
+    assert record["output_bytes"] == output_file.stat().st_size
+    assert record["transactions"] > 0
+    assert record["pages"] is None
+    assert record["wall_seconds"] > 0
+    assert record["cpu_seconds"] >= 0
+    assert record["peak_rss_bytes"] > 0
+    assert {"parse", "render"} <= set(record["stages"])
+    assert record["counters"]["rows"] == record["transactions"]
+    assert summary["type"] == "summary"
+    assert summary["succeeded"] == 1
+    assert summary["latency_p95_seconds"] == record["wall_seconds"]
+
+
+def test_main_report_records_failures_and_summary(tmp_path: Path, capsys: pytest.CaptureFixture[str]):
+    input_dir = tmp_path / "entrada"
+    input_dir.mkdir()
+    (input_dir / "a.pdf").write_bytes(b"extrato")
+    (input_dir / "b.pdf").write_bytes(b"quebrado")
+    report_file = tmp_path / "relatorio.jsonl"
+
+    exit_code = statement_converter.main(
+        ["--model", "vr", "--jobs", "2", "--report", str(report_file), str(input_dir), str(tmp_path / "saida")],
+        converter_registry=_failing_registry(),
+    )
+
+    capsys.readouterr()
+    assert exit_code == 1
+    *records, summary = _read_report(report_file)
+    by_name = {Path(record["input"]).name: record for record in records}
+    assert by_name["a.pdf"]["transactions"] == 2
+    assert by_name["a.pdf"]["output_bytes"] == 14
+    assert by_name["b.pdf"]["status"] == "error"
+    assert by_name["b.pdf"]["error_class"] == "RuntimeError"
+    assert by_name["b.pdf"]["error"] == "layout desconhecido"
+    assert by_name["b.pdf"]["output_bytes"] is None
+    assert summary["files"] == 2
+    assert summary["succeeded"] == 1
+    assert summary["failed"] == 1
+    assert summary["input_bytes"] == 15
+    assert summary["latency_p50_seconds"] is not None
+    assert summary["throughput_files_per_second"] > 0
+    assert summary["models"]["vr"]["files"] == 2
+    assert summary["models"]["vr"]["failed"] == 1
+
+
+@pytest.mark.skipif(not memory_limit_supported(), reason="limite de memoria indisponivel nesta plataforma")
+def test_main_max_memory_aborts_only_the_oversized_file(tmp_path: Path, capsys: pytest.CaptureFixture[str]):
+    input_dir = tmp_path / "entrada"
+    input_dir.mkdir()
+    (input_dir / "a.pdf").write_bytes(b"extrato")
+    (input_dir / "b.pdf").write_bytes(b"enorme")
+    (input_dir / "c.pdf").write_bytes(b"extrato")
+    report_file = tmp_path / "relatorio.jsonl"
+
+    exit_code = statement_converter.main(
+        [
+            "--model",
+            "vr",
+            "--jobs",
+            "2",
+            "--max-memory",
+            "256M",
+            "--trace-memory",
+            "--report",
+            str(report_file),
+            str(input_dir),
+            str(tmp_path / "saida"),
+        ],
+        converter_registry=_failing_registry(),
+    )
+
+    output = capsys.readouterr().out
+    assert exit_code == 1
+    assert "2 sucesso(s), 1 falha(s)" in output
+    *records, summary = _read_report(report_file)
+    by_name = {Path(record["input"]).name: record for record in records}
+    assert by_name["b.pdf"]["error_class"] == "MemoryLimitExceeded"
+    assert "256 MB" in by_name["b.pdf"]["error"]
+    assert by_name["a.pdf"]["status"] == by_name["c.pdf"]["status"] == "ok"
+    assert by_name["a.pdf"]["peak_traced_bytes"] > 0
+    assert summary["peak_traced_bytes"] >= by_name["a.pdf"]["peak_traced_bytes"]
+
+
+def test_main_rejects_invalid_max_memory(tmp_path: Path, capsys: pytest.CaptureFixture[str]):
+    input_file = tmp_path / "bb-cp.csv"
+    shutil.copy(SAMPLES_DIR / "bb-cp.csv", input_file)
+
+    with pytest.raises(SystemExit):
+        statement_converter.main(["--model", "bb-cp", "--max-memory", "muito", str(input_file), str(tmp_path / "s.csv")])
+
+    assert "Tamanho invalido" in capsys.readouterr().err
+
+
+def test_merge_reports_combines_shard_reports(tmp_path: Path, capsys: pytest.CaptureFixture[str]):
+    input_dir = tmp_path / "entrada"
+    input_dir.mkdir()
+    for index in range(12):
+        (input_dir / f"{index:02d}.pdf").write_bytes(b"quebrado" if index == 5 else b"extrato")
+    output_dir = tmp_path / "saida"
+
+    reports = []
+    for shard in ["1/3", "2/3", "3/3"]:
+        report_file = tmp_path / f"relatorio-{shard[0]}.jsonl"
+        statement_converter.main(
+            ["--model", "vr", "--shard", shard, "--report", str(report_file), str(input_dir), str(output_dir)],
+            converter_registry=_failing_registry(),
+        )
+        reports.append(report_file)
+    capsys.readouterr()
+
+    converted = [record["input"] for report in reports for record in _read_report(report)[:-1]]
+    assert sorted(Path(name).name for name in converted) == sorted(path.name for path in input_dir.iterdir())
+    # So a particao com a falha mantem o seu diario, com nome proprio no diretorio compartilhado.
+    assert len(list(output_dir.glob(".statement-converter-journal.shard-*-of-3.jsonl"))) == 1
+
+    merged_file = tmp_path / "combinado.jsonl"
+    exit_code = statement_converter.main(["merge-reports", "--output", str(merged_file), *map(str, reports)])
+
+    summary = json.loads(capsys.readouterr().out)
+    assert exit_code == 0
+    assert summary["files"] == 12
+    assert summary["succeeded"] == 11
+    assert summary["failed"] == 1
+    assert summary["reports"] == 3
+    assert summary["shards"] == ["1/3", "2/3", "3/3"]
+    assert summary["counters"]["transactions"] == 22
+    assert summary["wall_seconds"] == max(_read_report(report)[-1]["wall_seconds"] for report in reports)
+    *records, merged_summary = _read_report(merged_file)
+    assert len(records) == 12
+    assert merged_summary == summary
@@ -0,0 +1,172 @@
+import http.client
+import json
+import os
+import threading
+from pathlib import Path
+
+import pytest
+
+from statement_converter._metrics import count, span
+from statement_converter._server import ConversionHTTPServer, ConversionService
+from statement_converter.converter_registry import ConverterRegistry
+
+
+def _uppercase_handler(args):
+    content = args.input_path.read_text(encoding="utf-8")
+    if content == "corrompido":
+        raise ValueError("arquivo corrompido")
+    count("rows")
+    with span("render"):
+        args.output_path.write_text(f"{content.upper()}|{args.due_date}", encoding="utf-8")
+    print("conversao concluida")
+
+
+def _reverse_stream(source, args, output):
+    output.write(bytes(source)[::-1])
+
+
+def _crash_stream(source, args, output):
+    os._exit(1)
+
+
+def _disk_handler_not_expected(args):
+    raise AssertionError("conversores com stream_handler nao devem usar arquivos temporarios")
+
+
+@pytest.fixture
+def http_server():
+    test_registry = ConverterRegistry()
+    test_registry.register(
+        input_format="csv",
+        output_format="ofx",
+        model="c6-credit-csv",
+        description="Conversor fake para teste",
+        required_options=("due_date",),
+    )(_uppercase_handler)
+    test_registry.register(
+        input_format="csv",
+        output_format="csv",
+        model="bb-cp",
+        description="Conversor fake em memoria",
+        stream_handler=_reverse_stream,
+    )(_disk_handler_not_expected)
+    test_registry.register(
+        input_format="csv",
+        output_format="csv",
+        model="crash",
+        description="Conversor fake que derruba o worker",
+        stream_handler=_crash_stream,
+    )(_disk_handler_not_expected)
+    service = ConversionService(test_registry, workers=1, queue_size=1, max_upload_size=32)
+    server = ConversionHTTPServer(("127.0.0.1", 0), service)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+    service.shutdown()
+
+
+def _request(server, method: str, path: str, body: bytes | None = None, headers: dict | None = None):
+    connection = http.client.HTTPConnection(*server.server_address[:2], timeout=10)
+    try:
+        connection.request(method, path, body=body, headers=headers or {}, encode_chunked=not isinstance(body, bytes | None))
+        response = connection.getresponse()
+        return response.status, dict(response.getheaders()), response.read()
+    finally:
+        connection.close()
+
+
+def test_post_converts_upload_with_query_options(http_server):
+    status, headers, body = _request(http_server, "POST", "/convert/c6-credit-csv?due-date=2021-04-05", b"fatura")
+
+    assert status == 200
+    assert headers["Content-Type"] == "application/x-ofx"
+    assert body == b"FATURA|2021-04-05"
+
+
+def test_post_converts_in_memory_when_stream_handler_is_available(http_server):
+    status, headers, body = _request(http_server, "POST", "/convert/bb-cp", b"extrato")
+
+    assert status == 200
+    assert headers["Content-Type"] == "text/csv; charset=utf-8"
+    assert body == b"otartxe"
+
+
+def test_post_accepts_chunked_upload(http_server):
+    status, _, body = _request(
+        http_server,
+        "POST",
+        "/convert/c6-credit-csv?due_date=2021-04-05",
+        iter([b"fat", b"ura"]),
+        {"Transfer-Encoding": "chunked"},
+    )
+
+    assert status == 200
+    assert body == b"FATURA|2021-04-05"
+
+
+def test_post_reports_client_errors(http_server):
+    assert _request(http_server, "POST", "/convert/desconhecido", b"x")[0] == 404
+    assert _request(http_server, "POST", "/convert/c6-credit-csv", b"x")[0] == 400
+    assert _request(http_server, "POST", "/convert/c6-credit-csv?due-date=1", b"x" * 64)[0] == 413
+
+    status, _, body = _request(http_server, "POST", "/convert/c6-credit-csv?due-date=1", b"corrompido")
+    assert status == 422
+    assert json.loads(body) == {"error": "arquivo corrompido"}
+
+
+def test_post_answers_503_when_queue_is_full(http_server):
+    service = http_server.service
+    assert service.try_acquire()
+    assert service.try_acquire()
+    try:
+        status, headers, _ = _request(http_server, "POST", "/convert/c6-credit-csv?due-date=1", b"fatura")
+    finally:
+        service.release()
+        service.release()
+
+    assert status == 503
+    assert headers["Retry-After"] == "1"
+    assert _request(http_server, "POST", "/convert/c6-credit-csv?due-date=1", b"fatura")[0] == 200
+
+
+def test_post_recovers_after_worker_crash(http_server):
+    status, headers, body = _request(http_server, "POST", "/convert/crash", b"extrato")
+
+    assert status == 503
+    assert headers["Retry-After"] == "1"
+    assert "error" in json.loads(body)
+    assert _request(http_server, "POST", "/convert/bb-cp", b"extrato")[2] == b"otartxe"
+    metrics = json.loads(_request(http_server, "GET", "/metrics")[2])
+    assert metrics["pool_restarts"] == 1
+    assert metrics["conversions"] == {"succeeded": 1, "failed": 1}
+
+
+def test_worker_pool_is_never_forked_from_request_threads(http_server, monkeypatch: pytest.MonkeyPatch):
+    real_fork = os.fork
+
+    def guarded_fork():
+        if threading.active_count() > 1:
+            raise AssertionError("fork() com outras threads ativas")
+        return real_fork()
+
+    monkeypatch.setattr(os, "fork", guarded_fork)
+
+    assert _request(http_server, "POST", "/convert/bb-cp", b"extrato")[2] == b"otartxe"
+    assert _request(http_server, "POST", "/convert/crash", b"extrato")[0] == 503
+    assert _request(http_server, "POST", "/convert/bb-cp", b"extrato")[2] == b"otartxe"
+
+
+def test_health_and_metrics_endpoints(http_server):
+    _request(http_server, "POST", "/convert/c6-credit-csv?due-date=1", b"fatura")
+
+    assert json.loads(_request(http_server, "GET", "/health")[2]) == {"status": "ok"}
+    metrics = json.loads(_request(http_server, "GET", "/metrics")[2])
+    assert metrics["conversions"] == {"succeeded": 1, "failed": 0}
+    assert metrics["capacity"] == 2
+    assert metrics["in_flight"] == 0
+    assert metrics["counters"] == {"rows": 1}
+    assert list(metrics["stages_ms"]) == ["render"]
+    models = json.loads(_request(http_server, "GET", "/models")[2])["models"]
+    assert models[0]["required_options"] == ["due_date"]
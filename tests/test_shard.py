@@ -0,0 +1,25 @@
+from pathlib import PurePath
+
+import pytest
+
+from statement_converter._shard import Shard, parse_shard
+
+
+def test_parse_shard_accepts_one_based_partitions():
+    assert parse_shard("2/4") == Shard(2, 4)
+    assert str(parse_shard("1/1")) == "1/1"
+
+    for value in ["0/4", "5/4", "2", "a/b", "1/0"]:
+        with pytest.raises(ValueError, match="particao invalida"):
+            parse_shard(value)
+
+
+def test_shards_split_paths_into_disjoint_partitions():
+    paths = [PurePath(f"{year}/{month:02d}/extrato.pdf") for year in range(2015, 2025) for month in range(1, 13)]
+    shards = [Shard(index, 3) for index in range(1, 4)]
+
+    owners = [[shard for shard in shards if shard.contains(path)] for path in paths]
+
+    assert all(len(owner) == 1 for owner in owners)
+    assert all(sum(owner == [shard] for owner in owners) > 20 for shard in shards)
+    assert Shard(2, 3).file_name(".statement-converter-journal.jsonl") == ".statement-converter-journal.shard-2-of-3.jsonl"
@@ -0,0 +1,97 @@
+import zlib
+from pathlib import Path
+
+import pytest
+
+from statement_converter import _sniff
+from statement_converter._sniff import ContentSample, detect_converter, detect_converters
+from statement_converter.api import convert, resolve_converter
+from statement_converter.convert_picpay_pdf_ofx_2025 import matches_signature as matches_picpay_2025
+from statement_converter.converter_registry import registry
+from tests.test_api import C6_CSV_SAMPLE
+from tests.test_convert_c6_credit_pdf_ofx import build_c6_pdf_fixture
+from tests.test_convert_picpay_pdf_ofx_2024 import make_pdf_like_bytes as make_picpay_2024_pdf
+
+
+SAMPLES_DIR = Path(__file__).parent.parent / "samples"
+
+
+@pytest.fixture(autouse=True)
+def builtin_converters():
+    resolve_converter("bb-cp")
+
+
+@pytest.mark.parametrize(
+    ("sample", "model"),
+    [
+        ("bb-cp.csv", "bb-cp"),
+        ("bb-lcilca.txt", "bb-lc"),
+        ("ourocard-clean.ofx", "ourocard"),
+        ("ourocard-header.ofx", "ourocard"),
+        ("rico-cc.xlsx", "rico-ofx"),
+    ],
+)
+def test_detect_converter_recognizes_samples(sample: str, model: str):
+    assert detect_converter(SAMPLES_DIR / sample, registry).model == model
+
+
+@pytest.mark.parametrize(
+    ("content", "model"),
+    [
+        (build_c6_pdf_fixture(), "c6-credit-pdf"),
+        (make_picpay_2024_pdf([(17.0, 642.958, "MOVIMENTAÇÕES")]), "picpay-2024"),
+        (C6_CSV_SAMPLE.encode("utf-8"), "c6-credit-csv"),
+    ],
+    ids=["c6-pdf", "picpay-2024", "c6-csv"],
+)
+def test_detect_converter_recognizes_buffers(content: bytes, model: str):
+    assert detect_converter(content, registry).model == model
+
+
+def test_xlsx_signature_only_runs_in_deep_pass():
+    loads: list[bool] = []
+    data = (SAMPLES_DIR / "rico-cc.xlsx").read_bytes()
+
+    def load_all() -> bytes:
+        loads.append(True)
+        return data
+
+    sample = ContentSample(data[:64], load_all, "rico-cc.xlsx")
+
+    assert [converter.model for converter in detect_converters(sample, registry)] == ["rico-ofx"]
+    assert loads == [True]
+
+
+def test_pdf_streams_are_decompressed_once_per_pass(monkeypatch: pytest.MonkeyPatch):
+    calls: list[bytes] = []
+    decompress = zlib.decompress
+    monkeypatch.setattr(_sniff.zlib, "decompress", lambda data: calls.append(data) or decompress(data))
+    sample = ContentSample.from_source(build_c6_pdf_fixture())
+
+    assert [converter.model for converter in detect_converters(sample, registry)] == ["c6-credit-pdf"]
+    assert len(calls) == 1
+
+
+def _picpay_2025_pdf(text: str) -> bytes:
+    # Dois mapas de fonte (F2 e F3) e uma pagina com o texto codificado em F3.
+    cmaps = [b"begincmap\n<0001><0060><0020>\nendcmap", b"begincmap\n<0001><0050><0020>\nendcmap"]
+    encoded = b"".join((ord(char) - 0x1F).to_bytes(2, "big") for char in text)
+    page = b"BT /F3 10 Tf 1 0 0 1 20 700 Tm (" + encoded + b")Tj ET"
+    streams = [b"stream\n" + zlib.compress(content) + b"\nendstream\n" for content in [*cmaps, page]]
+    return b"%PDF-1.4\n" + b"".join(streams)
+
+
+def test_picpay_2025_signature_looks_for_encoded_markers():
+    assert matches_picpay_2025(ContentSample.from_source(_picpay_2025_pdf("Extrato de conta")))
+    assert not matches_picpay_2025(ContentSample.from_source(_picpay_2025_pdf("Outro documento")))
+
+
+def test_detect_converter_rejects_unknown_content():
+    with pytest.raises(ValueError, match="identificar automaticamente"):
+        detect_converter(b"coluna;outra\n1;2\n", registry)
+
+
+def test_convert_with_auto_model_matches_explicit_model():
+    content = (SAMPLES_DIR / "bb-cp.csv").read_bytes()
+
+    assert convert(content, "auto") == convert(content, "bb-cp")
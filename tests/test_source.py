@@ -0,0 +1,35 @@
+from pathlib import Path
+
+import pytest
+
+from statement_converter._source import open_output
+
+
+def test_open_output_replaces_the_file_only_on_success(tmp_path: Path):
+    output_path = tmp_path / "extrato.ofx"
+    output_path.write_bytes(b"anterior")
+
+    with pytest.raises(ValueError):
+        with open_output(output_path) as output:
+            output.write(b"<OFX>parcial")
+            raise ValueError("falha no meio da conversao")
+
+    assert output_path.read_bytes() == b"anterior"
+    assert list(tmp_path.iterdir()) == [output_path]
+
+    with open_output(output_path) as output:
+        output.write(b"<OFX>completo</OFX>")
+
+    assert output_path.read_bytes() == b"<OFX>completo</OFX>"
+    assert list(tmp_path.iterdir()) == [output_path]
+
+
+def test_open_output_without_previous_file_leaves_nothing_on_error(tmp_path: Path):
+    output_path = tmp_path / "extrato.ofx"
+
+    with pytest.raises(RuntimeError):
+        with open_output(output_path) as output:
+            output.write(b"<OFX>")
+            raise RuntimeError
+
+    assert not any(tmp_path.iterdir())
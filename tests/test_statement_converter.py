@@ -1,10 +1,69 @@
+import io
+import json
+import os
+import subprocess
+import sys
+import time
 from pathlib import Path
 
 import pytest
 
 from statement_converter import statement_converter
 from statement_converter import convert_picpay_pdf_ofx as picpay_auto_converter
+from statement_converter import convert_picpay_pdf_ofx_2024 as picpay_2024_converter
+from statement_converter import convert_picpay_pdf_ofx_2025 as picpay_2025_converter
 from statement_converter.converter_registry import ConverterRegistry
+from tests.test_convert_picpay_pdf_ofx_2024 import make_pdf_like_bytes as make_picpay_2024_pdf
+
+
+SAMPLES_DIR = Path(__file__).parent.parent / "samples"
+
+
+def _write_converted_file(args):
+    if args.input_path.stem.startswith("broken"):
+        raise ValueError(f"arquivo corrompido: {args.input_path.name}")
+    args.output_path.write_text(f"convertido:{args.input_path.name}", encoding="utf-8")
+    print(f"gerado {args.output_path.name}")
+
+
+def _hang_or_crash(args):
+    if args.input_path.stem == "lento":
+        time.sleep(30)
+    if args.input_path.stem == "crash":
+        os._exit(3)
+    _write_converted_file(args)
+
+
+def _fail_on_bad_content(args):
+    if args.input_path.read_text(encoding="utf-8") == "ruim":
+        raise ValueError(f"arquivo corrompido: {args.input_path.name}")
+    _write_converted_file(args)
+
+
+def _is_picpay_sample(sample) -> bool:
+    return sample.head.startswith(b"PICPAY")
+
+
+def _is_vr_sample(sample) -> bool:
+    return sample.head.startswith(b"VR")
+
+
+def _mixed_registry() -> ConverterRegistry:
+    test_registry = ConverterRegistry()
+    for model, input_format, signature, required_options in [
+        ("picpay", "pdf", _is_picpay_sample, ()),
+        ("vr", "pdf", _is_vr_sample, ()),
+        ("c6-csv", "csv", None, ("due_date",)),
+    ]:
+        test_registry.register(
+            input_format=input_format,
+            output_format="ofx",
+            model=model,
+            description="Conversor fake para teste",
+            required_options=required_options,
+            signature=signature,
+        )(_write_converted_file)
+    return test_registry
 
 
 def test_main_without_args_shows_help(capsys: pytest.CaptureFixture[str]):
@@ -114,33 +173,150 @@ def test_main_requires_due_date_for_c6_csv(capsys: pytest.CaptureFixture[str]):
     assert "--due-date" in captured.err
 
 
-def test_process_picpay_auto_falls_back_to_2024(monkeypatch: pytest.MonkeyPatch, tmp_path: Path):
+def test_process_picpay_auto_selects_layout_by_signature(monkeypatch: pytest.MonkeyPatch, tmp_path: Path):
     calls: list[str] = []
 
-    def fail_2025(input_path: Path, output_path: Path) -> None:
+    def unexpected_2025(input_path: Path, output_path: Path) -> None:
         calls.append("2025")
-        raise ValueError("layout 2025 invalido")
+        raise AssertionError("o layout 2025 nao deveria ser processado")
 
     def succeed_2024(input_path: Path, output_path: Path) -> None:
         calls.append("2024")
         output_path.write_text("ok", encoding="utf-8")
 
-    monkeypatch.setattr(picpay_auto_converter, "process_picpay_pdf_ofx_2025", fail_2025)
-    monkeypatch.setattr(picpay_auto_converter, "process_picpay_pdf_ofx_2024", succeed_2024)
+    monkeypatch.setattr(picpay_2025_converter, "process_pdf", unexpected_2025)
+    monkeypatch.setattr(picpay_2024_converter, "process_pdf", succeed_2024)
 
     input_path = tmp_path / "picpay.pdf"
     output_path = tmp_path / "picpay.ofx"
-    input_path.write_text("fake pdf", encoding="utf-8")
+    input_path.write_bytes(make_picpay_2024_pdf([(17.0, 642.958, "MOVIMENTAÇÕES")]))
 
     args = statement_converter.build_argument_parser().parse_args(
         ["--model", "picpay", str(input_path), str(output_path)]
     )
     picpay_auto_converter.process_pdf(args.input_path, args.output_path)
 
-    assert calls == ["2025", "2024"]
+    assert calls == ["2024"]
     assert output_path.read_text(encoding="utf-8") == "ok"
 
 
+def test_process_picpay_auto_falls_back_to_parsing_without_signature(tmp_path: Path):
+    # O titulo com espaco extra nao bate com a assinatura, mas o parse 2024 o aceita.
+    input_path = tmp_path / "picpay.pdf"
+    input_path.write_bytes(
+        make_picpay_2024_pdf(
+            [
+                (493.230, 719.850, "Conta:"),
+                (529.520, 719.850, "99990001"),
+                (266.052, 642.958, "1 DE JANEIRO DE 2024 A 31 DE DEZEMBRO DE 2024"),
+                (17.000, 642.958, "MOVIMENTAÇÕES "),
+                (47.769, 512.422, "29/07/2024"),
+                (52.345, 502.822, "01:27:18"),
+                (132.995, 507.622, "Pix Enviado"),
+                (341.464, 507.622, "- R$ 25,00"),
+                (420.060, 507.622, "R$ 264,25"),
+            ]
+        )
+    )
+    output_path = tmp_path / "picpay.ofx"
+
+    assert picpay_auto_converter.detect_layout(input_path) is None
+    picpay_auto_converter.process_pdf(input_path, output_path)
+
+    assert "<MEMO>Pix Enviado" in output_path.read_text(encoding="utf-8")
+    assert len(picpay_auto_converter.parse_pdf(input_path.read_bytes()).transactions) == 1
+
+
+def test_process_picpay_auto_rejects_unknown_layout(tmp_path: Path):
+    input_path = tmp_path / "picpay.pdf"
+    input_path.write_bytes(make_picpay_2024_pdf([(17.0, 642.958, "OUTRO BANCO")]))
+
+    with pytest.raises(ValueError, match="layout do PDF do PicPay"):
+        picpay_auto_converter.process_pdf(input_path, tmp_path / "picpay.ofx")
+
+
+def test_main_with_auto_model_detects_converter_from_content(tmp_path: Path, capsys: pytest.CaptureFixture[str]):
+    output_path = tmp_path / "bb-cp.csv"
+
+    exit_code = statement_converter.main(["--model", "auto", str(SAMPLES_DIR / "bb-cp.csv"), str(output_path)])
+
+    captured = capsys.readouterr()
+    assert exit_code == 0
+    assert "Modelo identificado: bb-cp" in captured.out
+    assert output_path.read_text(encoding="utf-8").startswith('"Data","Histórico","Valor","Type"')
+
+
+def test_main_streams_stdin_to_stdout(
+    tmp_path: Path,
+    monkeypatch: pytest.MonkeyPatch,
+    capsysbinary: pytest.CaptureFixture[bytes],
+):
+    output_path = tmp_path / "bb-cp.csv"
+    assert statement_converter.main(["--model", "bb-cp", str(SAMPLES_DIR / "bb-cp.csv"), str(output_path)]) == 0
+    capsysbinary.readouterr()
+    monkeypatch.setattr("sys.stdin", io.TextIOWrapper(io.BytesIO((SAMPLES_DIR / "bb-cp.csv").read_bytes())))
+
+    exit_code = statement_converter.main(["--model", "auto", "-", "-"])
+
+    captured = capsysbinary.readouterr()
+    assert exit_code == 0
+    assert captured.out == output_path.read_bytes()
+    assert b"Modelo identificado: bb-cp" in captured.err
+
+
+class _ClosedPipe(io.RawIOBase):
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        raise BrokenPipeError
+
+
+def test_main_exits_quietly_when_stdout_pipe_is_closed(
+    monkeypatch: pytest.MonkeyPatch,
+    capsys: pytest.CaptureFixture[str],
+):
+    monkeypatch.setattr("sys.stdout", io.TextIOWrapper(io.BufferedWriter(_ClosedPipe())))
+
+    with pytest.raises(SystemExit) as exc_info:
+        statement_converter.main(["--model", "bb-cp", str(SAMPLES_DIR / "bb-cp.csv"), "-"])
+
+    assert exc_info.value.code == 141
+    assert capsys.readouterr().err == ""
+
+
+def test_validate_args_leaves_stdin_for_the_conversion(monkeypatch: pytest.MonkeyPatch):
+    stdin = io.BytesIO(b"conteudo")
+    monkeypatch.setattr("sys.stdin", io.TextIOWrapper(stdin))
+    parser = statement_converter.build_argument_parser(statement_converter.registry)
+    args = parser.parse_intermixed_args(["--model", "auto", "-", "-"])
+    statement_converter._resolve_inputs(parser, args)
+
+    router = statement_converter.validate_args(parser, args)
+
+    assert stdin.tell() == 0
+    assert router.detection_registry is statement_converter.registry
+
+
+def test_main_rejects_stdout_for_batch_input(tmp_path: Path, capsys: pytest.CaptureFixture[str]):
+    with pytest.raises(SystemExit) as exc_info:
+        statement_converter.main(["--model", "vr", str(tmp_path), "-"])
+
+    assert exc_info.value.code == 2
+    assert "so se aplica a um unico arquivo" in capsys.readouterr().err
+
+
+def test_main_with_auto_model_reports_unknown_content(tmp_path: Path, capsys: pytest.CaptureFixture[str]):
+    input_path = tmp_path / "desconhecido.csv"
+    input_path.write_text("coluna;outra\n1;2\n", encoding="utf-8")
+
+    with pytest.raises(SystemExit) as excinfo:
+        statement_converter.main(["--model", "auto", str(input_path), str(tmp_path / "saida.csv")])
+
+    assert excinfo.value.code == 2
+    assert "identificar automaticamente o modelo de desconhecido.csv" in capsys.readouterr().err
+
+
 def test_main_processes_directory_and_continues_after_failures(
     tmp_path: Path,
     capsys: pytest.CaptureFixture[str],
@@ -168,7 +344,7 @@ def test_main_processes_directory_and_continues_after_failures(
     (input_dir / "ignorar.txt").write_text("ignorar", encoding="utf-8")
 
     exit_code = statement_converter.main(
-        ["--model", "vr", str(input_dir), str(output_dir)],
+        ["--model", "vr", "--jobs", "1", str(input_dir), str(output_dir)],
         converter_registry=test_registry,
     )
 
@@ -179,3 +355,577 @@ def test_main_processes_directory_and_continues_after_failures(
     assert not (output_dir / "broken.ofx").exists()
     assert "arquivo corrompido" in captured.err
     assert "1 sucesso(s), 1 falha(s)" in captured.out
+
+
+def test_main_processes_directory_with_worker_pool_in_input_order(
+    tmp_path: Path,
+    capsys: pytest.CaptureFixture[str],
+):
+    test_registry = ConverterRegistry()
+    test_registry.register(
+        input_format="pdf",
+        output_format="ofx",
+        model="vr",
+        description="Conversor fake para teste",
+    )(_write_converted_file)
+
+    input_dir = tmp_path / "entrada"
+    output_dir = tmp_path / "saida"
+    input_dir.mkdir()
+    names = ["a", "b", "broken", "c", "d"]
+    for name in names:
+        (input_dir / f"{name}.pdf").write_text(name, encoding="utf-8")
+
+    exit_code = statement_converter.main(
+        ["--model", "vr", "--jobs", "2", str(input_dir), str(output_dir)],
+        converter_registry=test_registry,
+    )
+
+    captured = capsys.readouterr()
+    assert exit_code == 1
+    assert captured.out.splitlines() == [
+        "gerado a.ofx",
+        "gerado b.ofx",
+        "gerado c.ofx",
+        "gerado d.ofx",
+        "Conversao em lote concluida: 4 sucesso(s), 1 falha(s).",
+    ]
+    assert "arquivo corrompido: broken.pdf" in captured.err
+    assert (output_dir / "d.ofx").read_text(encoding="utf-8") == "convertido:d.pdf"
+    assert not (output_dir / "broken.ofx").exists()
+
+
+def test_main_converts_explicit_inputs_into_output_directory(tmp_path: Path, capsys: pytest.CaptureFixture[str]):
+    test_registry = ConverterRegistry()
+    test_registry.register(
+        input_format="pdf",
+        output_format="ofx",
+        model="vr",
+        description="Conversor fake para teste",
+    )(_write_converted_file)
+
+    input_dir = tmp_path / "entrada"
+    output_dir = tmp_path / "saida"
+    (input_dir / "2024").mkdir(parents=True)
+    (input_dir / "2025").mkdir(parents=True)
+    first = input_dir / "2024" / "a.pdf"
+    second = input_dir / "2025" / "b.pdf"
+    third = input_dir / "2025" / "broken.pdf"
+    for path in (first, second, third):
+        path.write_text(path.stem, encoding="utf-8")
+    (input_dir / "2025" / "fora-da-lista.pdf").write_text("x", encoding="utf-8")
+
+    exit_code = statement_converter.main(
+        ["--model", "vr", "--jobs", "2", str(first), "-o", str(output_dir), str(second), str(third), str(first)],
+        converter_registry=test_registry,
+    )
+
+    captured = capsys.readouterr()
+    assert exit_code == 1
+    assert captured.out.splitlines() == [
+        "gerado a.ofx",
+        "gerado b.ofx",
+        "Conversao em lote concluida: 2 sucesso(s), 1 falha(s).",
+    ]
+    assert (output_dir / "2024" / "a.ofx").read_text(encoding="utf-8") == "convertido:a.pdf"
+    assert (output_dir / "2025" / "b.ofx").exists()
+    assert not (output_dir / "2025" / "fora-da-lista.ofx").exists()
+
+
+def test_main_reads_inputs_from_list(
+    tmp_path: Path,
+    monkeypatch: pytest.MonkeyPatch,
+    capsys: pytest.CaptureFixture[str],
+):
+    test_registry = ConverterRegistry()
+    test_registry.register(
+        input_format="pdf",
+        output_format="ofx",
+        model="vr",
+        description="Conversor fake para teste",
+    )(_write_converted_file)
+
+    monkeypatch.chdir(tmp_path)
+    for name in ("a.pdf", "b c.pdf"):
+        Path(name).write_text(name, encoding="utf-8")
+    Path("lista.txt").write_text("a.pdf\0b c.pdf\0", encoding="utf-8")
+    monkeypatch.setattr("sys.stdin", io.StringIO("a.pdf\n\nb c.pdf\n"))
+
+    for source, output_dir in (("lista.txt", "saida-arquivo"), ("-", "saida-stdin")):
+        exit_code = statement_converter.main(
+            ["--model", "vr", "--jobs", "1", "--from-list", source, "-o", output_dir],
+            converter_registry=test_registry,
+        )
+        assert exit_code == 0
+        assert "2 sucesso(s), 0 falha(s)" in capsys.readouterr().out
+
+    assert Path("saida-arquivo", "b c.ofx").read_text(encoding="utf-8") == "convertido:b c.pdf"
+    assert Path("saida-stdin", "a.ofx").exists()
+
+
+def test_main_rejects_many_inputs_without_output(tmp_path: Path, capsys: pytest.CaptureFixture[str]):
+    for name in ("a.pdf", "b.pdf", "c.pdf"):
+        (tmp_path / name).write_text(name, encoding="utf-8")
+
+    with pytest.raises(SystemExit) as exc_info:
+        statement_converter.main(["--model", "vr", *(str(tmp_path / name) for name in ("a.pdf", "b.pdf", "c.pdf"))])
+
+    assert exc_info.value.code == 2
+    assert "informe o destino com --output" in capsys.readouterr().err
+
+
+def test_main_timeout_and_crash_fail_only_their_files(tmp_path: Path, capsys: pytest.CaptureFixture[str]):
+    test_registry = ConverterRegistry()
+    test_registry.register(
+        input_format="pdf",
+        output_format="ofx",
+        model="vr",
+        description="Conversor fake para teste",
+    )(_hang_or_crash)
+
+    input_dir = tmp_path / "entrada"
+    output_dir = tmp_path / "saida"
+    input_dir.mkdir()
+    for name in ["a", "crash", "lento", "b", "c"]:
+        (input_dir / f"{name}.pdf").write_text(name, encoding="utf-8")
+
+    started = time.monotonic()
+    exit_code = statement_converter.main(
+        ["--model", "vr", "--jobs", "2", "--timeout", "1", str(input_dir), str(output_dir)],
+        converter_registry=test_registry,
+    )
+
+    captured = capsys.readouterr()
+    assert time.monotonic() - started < 15
+    assert exit_code == 1
+    assert captured.out.splitlines() == [
+        "gerado a.ofx",
+        "gerado b.ofx",
+        "gerado c.ofx",
+        "Conversao em lote concluida: 3 sucesso(s), 2 falha(s).",
+    ]
+    assert "terminou inesperadamente (codigo 3)" in captured.err
+    assert "tempo limite de 1s excedido" in captured.err
+    assert sorted(path.name for path in output_dir.glob("*.ofx")) == ["a.ofx", "b.ofx", "c.ofx"]
+
+
+def test_main_timeout_applies_to_single_file(tmp_path: Path, capsys: pytest.CaptureFixture[str]):
+    test_registry = ConverterRegistry()
+    test_registry.register(
+        input_format="pdf",
+        output_format="ofx",
+        model="vr",
+        description="Conversor fake para teste",
+    )(_hang_or_crash)
+    input_file = tmp_path / "lento.pdf"
+    input_file.write_text("lento", encoding="utf-8")
+
+    exit_code = statement_converter.main(
+        ["--model", "vr", "--timeout", "0.5", str(input_file), str(tmp_path / "saida.ofx")],
+        converter_registry=test_registry,
+    )
+
+    assert exit_code == 1
+    assert "tempo limite de 0.5s excedido" in capsys.readouterr().err
+    assert not (tmp_path / "saida.ofx").exists()
+
+
+def test_main_resume_retries_failures_and_damaged_outputs(tmp_path: Path, capsys: pytest.CaptureFixture[str]):
+    test_registry = ConverterRegistry()
+    test_registry.register(
+        input_format="pdf",
+        output_format="ofx",
+        model="vr",
+        description="Conversor fake para teste",
+    )(_fail_on_bad_content)
+
+    input_dir = tmp_path / "entrada"
+    output_dir = tmp_path / "saida"
+    input_dir.mkdir()
+    for name, content in [("a", "a"), ("b", "ruim"), ("c", "c")]:
+        (input_dir / f"{name}.pdf").write_text(content, encoding="utf-8")
+    arguments = ["--model", "vr", str(input_dir), str(output_dir)]
+
+    assert statement_converter.main(arguments, converter_registry=test_registry) == 1
+    journal = output_dir / ".statement-converter-journal.jsonl"
+    assert journal.exists()
+    capsys.readouterr()
+
+    (input_dir / "b.pdf").write_text("b", encoding="utf-8")
+    (output_dir / "c.ofx").write_text("conv", encoding="utf-8")
+    exit_code = statement_converter.main(["--resume", *arguments], converter_registry=test_registry)
+
+    captured = capsys.readouterr()
+    assert exit_code == 0
+    assert captured.out.splitlines() == [
+        "gerado b.ofx",
+        "gerado c.ofx",
+        "1 arquivo(s) ja convertido(s) na execucao anterior ignorado(s).",
+        "Conversao em lote concluida: 2 sucesso(s), 0 falha(s).",
+    ]
+    assert (output_dir / "c.ofx").read_text(encoding="utf-8") == "convertido:c.pdf"
+    assert not journal.exists()
+
+
+def test_main_without_resume_starts_batch_from_scratch(tmp_path: Path, capsys: pytest.CaptureFixture[str]):
+    test_registry = ConverterRegistry()
+    test_registry.register(
+        input_format="pdf",
+        output_format="ofx",
+        model="vr",
+        description="Conversor fake para teste",
+    )(_fail_on_bad_content)
+
+    input_dir = tmp_path / "entrada"
+    input_dir.mkdir()
+    (input_dir / "a.pdf").write_text("a", encoding="utf-8")
+    (input_dir / "b.pdf").write_text("ruim", encoding="utf-8")
+    arguments = ["--model", "vr", str(input_dir), str(tmp_path / "saida")]
+
+    statement_converter.main(arguments, converter_registry=test_registry)
+    capsys.readouterr()
+    statement_converter.main(arguments, converter_registry=test_registry)
+
+    assert "1 sucesso(s), 1 falha(s)" in capsys.readouterr().out
+
+
+def test_main_rejects_invalid_jobs(tmp_path: Path, capsys: pytest.CaptureFixture[str]):
+    input_path = tmp_path / "entrada.pdf"
+    input_path.write_text("fake", encoding="utf-8")
+
+    with pytest.raises(SystemExit) as excinfo:
+        statement_converter.main(["--model", "vr", "--jobs", "0", str(input_path), str(tmp_path / "saida.ofx")])
+
+    assert excinfo.value.code == 2
+    assert "--jobs" in capsys.readouterr().err
+
+
+def test_main_recursive_batch_mirrors_input_tree(tmp_path: Path, capsys: pytest.CaptureFixture[str]):
+    test_registry = ConverterRegistry()
+    test_registry.register(
+        input_format="pdf",
+        output_format="ofx",
+        model="vr",
+        description="Conversor fake para teste",
+    )(_write_converted_file)
+
+    input_dir = tmp_path / "entrada"
+    output_dir = tmp_path / "saida"
+    (input_dir / "2024" / "01").mkdir(parents=True)
+    (input_dir / "2024" / "02").mkdir(parents=True)
+    (input_dir / "raiz.pdf").write_text("raiz", encoding="utf-8")
+    (input_dir / "2024" / "01" / "janeiro.PDF").write_text("jan", encoding="utf-8")
+    (input_dir / "2024" / "02" / "fevereiro.pdf").write_text("fev", encoding="utf-8")
+    (input_dir / "2024" / "02" / "notas.txt").write_text("ignorar", encoding="utf-8")
+
+    exit_code = statement_converter.main(
+        ["--model", "vr", "--jobs", "1", "--recursive", str(input_dir), str(output_dir)],
+        converter_registry=test_registry,
+    )
+
+    captured = capsys.readouterr()
+    assert exit_code == 0
+    assert captured.out.splitlines() == [
+        "gerado janeiro.ofx",
+        "gerado fevereiro.ofx",
+        "gerado raiz.ofx",
+        "Conversao em lote concluida: 3 sucesso(s), 0 falha(s).",
+    ]
+    assert (output_dir / "2024" / "01" / "janeiro.ofx").read_text(encoding="utf-8") == "convertido:janeiro.PDF"
+    assert (output_dir / "2024" / "02" / "fevereiro.ofx").exists()
+    assert (output_dir / "raiz.ofx").exists()
+    assert not (output_dir / "2024" / "02" / "notas.ofx").exists()
+
+
+def test_main_batch_glob_replaces_suffix_filter(tmp_path: Path, capsys: pytest.CaptureFixture[str]):
+    test_registry = ConverterRegistry()
+    test_registry.register(
+        input_format="pdf",
+        output_format="ofx",
+        model="vr",
+        description="Conversor fake para teste",
+    )(_write_converted_file)
+
+    input_dir = tmp_path / "entrada"
+    (input_dir / "conta-a").mkdir(parents=True)
+    (input_dir / "conta-b").mkdir(parents=True)
+    (input_dir / "conta-a" / "fatura.pdf").write_text("a", encoding="utf-8")
+    (input_dir / "conta-b" / "fatura.pdf").write_text("b", encoding="utf-8")
+
+    exit_code = statement_converter.main(
+        ["--model", "vr", "--jobs", "1", "-r", "--glob", "conta-b/*.pdf", str(input_dir), str(tmp_path / "saida")],
+        converter_registry=test_registry,
+    )
+
+    assert exit_code == 0
+    assert not (tmp_path / "saida" / "conta-a").exists()
+    assert (tmp_path / "saida" / "conta-b" / "fatura.ofx").exists()
+
+    exit_code = statement_converter.main(
+        ["--model", "vr", "--glob", "*.csv", str(input_dir), str(tmp_path / "outra")],
+        converter_registry=test_registry,
+    )
+
+    assert exit_code == 1
+    assert "Nenhum arquivo *.csv foi encontrado" in capsys.readouterr().err
+
+
+def test_main_incremental_batch_converts_only_new_or_changed_files(tmp_path: Path, capsys: pytest.CaptureFixture[str]):
+    test_registry = ConverterRegistry()
+    test_registry.register(
+        input_format="pdf",
+        output_format="ofx",
+        model="vr",
+        description="Conversor fake para teste",
+    )(_write_converted_file)
+
+    input_dir = tmp_path / "entrada"
+    output_dir = tmp_path / "saida"
+    input_dir.mkdir()
+    (input_dir / "a.pdf").write_text("a", encoding="utf-8")
+    (input_dir / "b.pdf").write_text("b", encoding="utf-8")
+    argv = ["--model", "vr", "--jobs", "1", "--incremental", str(input_dir), str(output_dir)]
+
+    assert statement_converter.main(argv, converter_registry=test_registry) == 0
+    assert "2 sucesso(s)" in capsys.readouterr().out
+
+    assert statement_converter.main(argv, converter_registry=test_registry) == 0
+    captured = capsys.readouterr()
+    assert "gerado" not in captured.out
+    assert "2 arquivo(s) sem alteracao ignorado(s)." in captured.out
+
+    (input_dir / "b.pdf").write_text("b alterado", encoding="utf-8")
+    (input_dir / "c.pdf").write_text("c", encoding="utf-8")
+    (output_dir / "a.ofx").unlink()
+
+    assert statement_converter.main(argv, converter_registry=test_registry) == 0
+    captured = capsys.readouterr()
+    assert captured.out.splitlines() == [
+        "gerado a.ofx",
+        "gerado b.ofx",
+        "gerado c.ofx",
+        "0 arquivo(s) sem alteracao ignorado(s).",
+        "Conversao em lote concluida: 3 sucesso(s), 0 falha(s).",
+    ]
+
+
+def test_main_reuses_cached_conversion_for_renamed_copy(tmp_path: Path, capsys: pytest.CaptureFixture[str]):
+    calls: list[str] = []
+    test_registry = ConverterRegistry()
+
+    @test_registry.register(
+        input_format="pdf",
+        output_format="ofx",
+        model="vr",
+        description="Conversor fake para teste",
+    )
+    def fake_handler(args):
+        calls.append(args.input_path.name)
+        args.output_path.write_text(f"convertido:{args.input_path.read_text(encoding='utf-8')}", encoding="utf-8")
+
+    cache_dir = tmp_path / "cache"
+    original = tmp_path / "extrato.pdf"
+    copy = tmp_path / "download" / "extrato (1).pdf"
+    copy.parent.mkdir()
+    original.write_text("mesmo conteudo", encoding="utf-8")
+    copy.write_text("mesmo conteudo", encoding="utf-8")
+
+    for input_path, output_path in ((original, tmp_path / "a.ofx"), (copy, tmp_path / "b.ofx")):
+        exit_code = statement_converter.main(
+            ["--model", "vr", "--cache", "--cache-dir", str(cache_dir), str(input_path), str(output_path)],
+            converter_registry=test_registry,
+        )
+        assert exit_code == 0
+
+    assert calls == ["extrato.pdf"]
+    assert (tmp_path / "b.ofx").read_text(encoding="utf-8") == "convertido:mesmo conteudo"
+    assert "Conversao reaproveitada do cache" in capsys.readouterr().out
+
+
+def test_main_dispatches_cache_subcommand(tmp_path: Path, capsys: pytest.CaptureFixture[str]):
+    exit_code = statement_converter.main(["cache", "stats", "--cache-dir", str(tmp_path)])
+
+    assert exit_code == 0
+    assert "Entradas: 0" in capsys.readouterr().out
+
+
+def test_main_routes_mixed_directory_through_one_pool(tmp_path: Path, capsys: pytest.CaptureFixture[str]):
+    input_dir = tmp_path / "downloads"
+    output_dir = tmp_path / "saida"
+    input_dir.mkdir()
+    (input_dir / "a.pdf").write_bytes(b"PICPAY a")
+    (input_dir / "b.pdf").write_bytes(b"VR b")
+    (input_dir / "fatura.csv").write_bytes(b"Data de Compra;Valor")
+    (input_dir / "fatura.pdf").write_bytes(b"PICPAY fatura")
+    (input_dir / "notas.txt").write_bytes(b"lembrete")
+
+    exit_code = statement_converter.main(
+        [
+            "--model", "auto",
+            "--route", "*.csv=c6-csv",
+            "--due-date", "2021-04-05",
+            "--jobs", "2",
+            str(input_dir),
+            str(output_dir),
+        ],
+        converter_registry=_mixed_registry(),
+    )
+
+    captured = capsys.readouterr()
+    assert exit_code == 0
+    assert captured.out.splitlines() == [
+        "gerado a.ofx",
+        "gerado b.ofx",
+        "gerado fatura.ofx",
+        "gerado fatura.pdf.ofx",
+        "1 arquivo(s) sem modelo reconhecido ignorado(s).",
+        "Conversao em lote concluida: 4 sucesso(s), 0 falha(s).",
+        "  c6-csv: 1 sucesso(s), 0 falha(s).",
+        "  picpay: 2 sucesso(s), 0 falha(s).",
+        "  vr: 1 sucesso(s), 0 falha(s).",
+    ]
+    assert "Arquivo ignorado" in captured.err and "notas.txt" in captured.err
+    assert (output_dir / "fatura.ofx").read_text(encoding="utf-8") == "convertido:fatura.csv"
+    assert (output_dir / "fatura.pdf.ofx").read_text(encoding="utf-8") == "convertido:fatura.pdf"
+
+
+def _is_deep_sample(sample) -> bool:
+    if not sample.deep:
+        return False
+    with open(os.environ["SNIFF_LOG"], "a", encoding="utf-8") as file:
+        file.write(f"{os.getpid()}\n")
+    return sample.data().endswith(b"FIM")
+
+
+def test_main_defers_deep_detection_to_workers(
+    tmp_path: Path,
+    monkeypatch: pytest.MonkeyPatch,
+    capsys: pytest.CaptureFixture[str],
+):
+    sniffed_by = tmp_path / "pids.txt"
+    monkeypatch.setenv("SNIFF_LOG", str(sniffed_by))
+    test_registry = _mixed_registry()
+    test_registry.register(
+        input_format="pdf",
+        output_format="ofx",
+        model="deep",
+        description="Conversor fake para teste",
+        signature=_is_deep_sample,
+    )(_write_converted_file)
+    input_dir = tmp_path / "downloads"
+    input_dir.mkdir()
+    (input_dir / "a.pdf").write_bytes(b"conteudo FIM")
+    (input_dir / "b.pdf").write_bytes(b"PICPAY b")
+
+    exit_code = statement_converter.main(
+        ["--model", "auto", "--jobs", "2", str(input_dir), str(tmp_path / "saida")],
+        converter_registry=test_registry,
+    )
+
+    assert exit_code == 0
+    assert capsys.readouterr().out.splitlines()[:2] == ["gerado a.ofx", "gerado b.ofx"]
+    assert str(os.getpid()) not in sniffed_by.read_text(encoding="utf-8").split()
+
+
+def _crashing_deep_sample(sample) -> bool:
+    if not sample.deep:
+        return False
+    data = sample.data()
+    if data.startswith(b"CRASH"):
+        os._exit(3)
+    if data.startswith(b"HANG"):
+        time.sleep(30)
+    return data.endswith(b"FIM")
+
+
+def test_main_reports_deep_detection_failures_per_file(tmp_path: Path, capsys: pytest.CaptureFixture[str]):
+    test_registry = _mixed_registry()
+    test_registry.register(
+        input_format="pdf",
+        output_format="ofx",
+        model="deep",
+        description="Conversor fake para teste",
+        signature=_crashing_deep_sample,
+    )(_write_converted_file)
+    input_dir = tmp_path / "downloads"
+    input_dir.mkdir()
+    (input_dir / "a.pdf").write_bytes(b"CRASH")
+    (input_dir / "b.pdf").write_bytes(b"HANG")
+    (input_dir / "c.pdf").write_bytes(b"conteudo FIM")
+    report_path = tmp_path / "relatorio.jsonl"
+
+    exit_code = statement_converter.main(
+        [
+            "--model",
+            "auto",
+            "--jobs",
+            "2",
+            "--timeout",
+            "1",
+            "--report",
+            str(report_path),
+            str(input_dir),
+            str(tmp_path / "saida"),
+        ],
+        converter_registry=test_registry,
+    )
+
+    captured = capsys.readouterr()
+    assert exit_code == 1
+    assert "gerado c.ofx" in captured.out
+    assert "Conversao em lote concluida: 1 sucesso(s), 2 falha(s)." in captured.out
+    assert "identificacao do modelo terminou inesperadamente (codigo 3)" in captured.err
+    assert "tempo limite de 1s excedido" in captured.err
+    records = [json.loads(line) for line in report_path.read_text(encoding="utf-8").splitlines()]
+    statuses = {Path(record["input"]).name: record["status"] for record in records if record.get("type") == "file"}
+    assert statuses == {"a.pdf": "error", "b.pdf": "error", "c.pdf": "ok"}
+
+
+def test_main_route_requires_options_of_routed_model(tmp_path: Path, capsys: pytest.CaptureFixture[str]):
+    with pytest.raises(SystemExit) as excinfo:
+        statement_converter.main(
+            ["--model", "auto", "--route", "*.csv=c6-csv", str(tmp_path), str(tmp_path / "saida")],
+            converter_registry=_mixed_registry(),
+        )
+
+    assert excinfo.value.code == 2
+    assert "o modelo c6-csv exige opcoes extras: --due-date" in capsys.readouterr().err
+
+
+def test_picpay_conversion_does_not_import_heavy_dependencies(tmp_path: Path):
+    input_file = tmp_path / "picpay.pdf"
+    input_file.write_bytes(
+        make_picpay_2024_pdf(
+            [
+                (493.230, 719.850, "Conta:"),
+                (529.520, 719.850, "99990001"),
+                (266.052, 642.958, "1 DE JANEIRO DE 2023 A 31 DE DEZEMBRO DE 2023"),
+                (17.000, 642.958, "MOVIMENTAÇÕES"),
+                (49.428, 557.622, "Data/Hora"),
+                (49.268, 512.422, "28/03/2023"),
+                (53.844, 502.822, "14:49:30"),
+                (135.992, 507.622, "Pix Recebido"),
+                (340.943, 507.622, "R$ 300,00"),
+                (421.299, 507.622, "R$ 569,15"),
+            ]
+        )
+    )
+    script = (
+        "import json, sys\n"
+        "from statement_converter import statement_converter\n"
+        "exit_code = statement_converter.main(sys.argv[1:])\n"
+        "print(json.dumps([exit_code, sorted(name for name in ('pandas', 'numpy', 'pypdf', 'ofxparse') "
+        "if name in sys.modules)]))\n"
+    )
+
+    completed = subprocess.run(
+        [sys.executable, "-c", script, "--model", "picpay", str(input_file), str(tmp_path / "picpay.ofx")],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+    exit_code, heavy_modules = json.loads(completed.stdout.splitlines()[-1])
+    assert exit_code == 0
+    assert heavy_modules == []
+    assert "<TRNAMT>300.00" in (tmp_path / "picpay.ofx").read_text(encoding="utf-8")
@@ -0,0 +1,178 @@
+import argparse
+import os
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+from statement_converter._routing import ConverterRouter
+from statement_converter._watch import InotifyWatcher, PollingWatcher, _prune_processed, watch_directory
+from statement_converter.converter_registry import ConverterRegistry, ConverterSpec
+
+
+def _wait_for(predicate, timeout: float = 5.0) -> bool:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.02)
+    return False
+
+
+def test_polling_watcher_waits_for_file_to_settle(tmp_path: Path):
+    watcher = PollingWatcher(tmp_path, interval=0, settle=0)
+    input_file = tmp_path / "extrato.pdf"
+    input_file.write_bytes(b"parte 1")
+
+    assert watcher.poll(0) == []
+    assert watcher.poll(0) == [input_file]
+    assert watcher.poll(0) == []
+
+    input_file.write_bytes(b"parte 1 e parte 2")
+
+    assert watcher.poll(0) == []
+    assert watcher.poll(0) == [input_file]
+
+
+def test_inotify_watcher_reports_closed_files(tmp_path: Path):
+    try:
+        watcher = InotifyWatcher(tmp_path)
+    except OSError:
+        pytest.skip("inotify indisponivel")
+
+    try:
+        (tmp_path / "extrato.pdf").write_bytes(b"pdf")
+        assert watcher.poll(2) == [tmp_path / "extrato.pdf"]
+    finally:
+        watcher.close()
+
+
+def test_watch_directory_converts_existing_and_new_files(tmp_path: Path, capsys: pytest.CaptureFixture[str]):
+    def fake_handler(args):
+        args.output_path.write_text(f"convertido:{args.input_path.name}", encoding="utf-8")
+        print(f"gerado {args.output_path.name}")
+
+    converter = ConverterSpec(
+        input_format="pdf",
+        output_format="ofx",
+        model="vr",
+        handler=fake_handler,
+        description="Conversor fake para teste",
+    )
+    inbox = tmp_path / "inbox"
+    outbox = tmp_path / "outbox"
+    inbox.mkdir()
+    (inbox / "antigo.pdf").write_text("antigo", encoding="utf-8")
+    args = argparse.Namespace(input_path=inbox, output_path=outbox, jobs=1, glob=None)
+    stop_event = threading.Event()
+    thread = threading.Thread(
+        target=watch_directory,
+        args=(converter, args, PollingWatcher(inbox, interval=0.02, settle=0), stop_event, 0.02),
+    )
+    thread.start()
+    try:
+        assert _wait_for((outbox / "antigo.ofx").exists)
+        (inbox / "novo.pdf").write_text("novo", encoding="utf-8")
+        (inbox / "ignorar.txt").write_text("ignorar", encoding="utf-8")
+        assert _wait_for((outbox / "novo.ofx").exists)
+    finally:
+        stop_event.set()
+        thread.join(timeout=5)
+
+    assert not thread.is_alive()
+    assert not (outbox / "ignorar.ofx").exists()
+    assert capsys.readouterr().out.splitlines() == ["gerado antigo.ofx", "gerado novo.ofx"]
+
+
+def test_watch_directory_routes_each_file_by_content(tmp_path: Path, capsys: pytest.CaptureFixture[str]):
+    test_registry = ConverterRegistry()
+    for model, marker in [("picpay", b"PICPAY"), ("vr", b"VR")]:
+        def fake_handler(args, model=model):
+            args.output_path.write_text(model, encoding="utf-8")
+
+        test_registry.register(
+            input_format="pdf",
+            output_format="ofx",
+            model=model,
+            description="Conversor fake para teste",
+            signature=lambda sample, marker=marker: sample.head.startswith(marker),
+        )(fake_handler)
+
+    inbox = tmp_path / "inbox"
+    outbox = tmp_path / "outbox"
+    inbox.mkdir()
+    args = argparse.Namespace(input_path=inbox, output_path=outbox, jobs=1, glob=None)
+    stop_event = threading.Event()
+    thread = threading.Thread(
+        target=watch_directory,
+        args=(
+            ConverterRouter(detection_registry=test_registry),
+            args,
+            PollingWatcher(inbox, interval=0.02, settle=0),
+            stop_event,
+            0.02,
+        ),
+    )
+    thread.start()
+    try:
+        (inbox / "picpay.pdf").write_bytes(b"PICPAY extrato")
+        (inbox / "vr.pdf").write_bytes(b"VR extrato")
+        (inbox / "foto.jpg").write_bytes(b"jpg")
+        assert _wait_for(lambda: (outbox / "picpay.ofx").exists() and (outbox / "vr.ofx").exists())
+    finally:
+        stop_event.set()
+        thread.join(timeout=5)
+
+    assert (outbox / "picpay.ofx").read_text(encoding="utf-8") == "picpay"
+    assert (outbox / "vr.ofx").read_text(encoding="utf-8") == "vr"
+    assert not (outbox / "foto.ofx").exists()
+    assert "Arquivo ignorado" in capsys.readouterr().err
+
+
+def test_watch_directory_keeps_watching_after_worker_crash(tmp_path: Path, capsys: pytest.CaptureFixture[str]):
+    def fake_handler(args):
+        if args.input_path.name == "quebra.pdf":
+            os._exit(1)
+        args.output_path.write_text("convertido", encoding="utf-8")
+
+    converter = ConverterSpec(
+        input_format="pdf",
+        output_format="ofx",
+        model="vr",
+        handler=fake_handler,
+        description="Conversor fake para teste",
+    )
+    inbox = tmp_path / "inbox"
+    outbox = tmp_path / "outbox"
+    inbox.mkdir()
+    args = argparse.Namespace(input_path=inbox, output_path=outbox, jobs=2, glob=None)
+    stop_event = threading.Event()
+    thread = threading.Thread(
+        target=watch_directory,
+        args=(converter, args, PollingWatcher(inbox, interval=0.02, settle=0), stop_event, 0.02),
+    )
+    errors: list[str] = []
+    thread.start()
+    try:
+        (inbox / "quebra.pdf").write_text("quebra", encoding="utf-8")
+        assert _wait_for(lambda: errors.append(capsys.readouterr().err) or "quebra.pdf" in "".join(errors))
+        (inbox / "novo.pdf").write_text("novo", encoding="utf-8")
+        assert _wait_for((outbox / "novo.ofx").exists)
+    finally:
+        stop_event.set()
+        thread.join(timeout=5)
+
+    assert not thread.is_alive()
+    errors.append(capsys.readouterr().err)
+    assert "Pool de workers reiniciado antes de converter" in "".join(errors)
+
+
+def test_prune_processed_drops_deleted_and_foreign_paths(tmp_path: Path):
+    kept = tmp_path / "mantido.pdf"
+    kept.write_bytes(b"pdf")
+    processed = {kept: (3, 1), tmp_path / "apagado.pdf": (3, 1), tmp_path / "sub" / "outro.pdf": (3, 1)}
+
+    _prune_processed(processed, tmp_path)
+
+    assert processed == {kept: (3, 1)}